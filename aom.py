@@ -1,49 +1,32 @@
 from abc import ABCMeta, abstractmethod
+from bisect import bisect_right
 import socket
 import struct
 import math
 import time
 import ctypes
-
-import clr
-clr.AddReference("System.Windows.Forms")
-from System.Windows.Forms import Clipboard
-from System.Threading import Thread, ThreadStart, ApartmentState
-
-def set_clipboard_text(text):
-	def run():
-		try:
-			Clipboard.SetText(text)
-			diagnostics.debug("Clipboard text set successfully.")
-		except Exception as e:
-			diagnostics.debug("Error setting clipboard text: " + str(e))
-	thread_start = ThreadStart(run)
-	sta_thread = Thread(thread_start)
-	sta_thread.SetApartmentState(ApartmentState.STA)
-	sta_thread.Start()
-	sta_thread.Join() 
+import json
+import os
+import threading
+import mmap
+from collections import deque
+
+try:
+	Key
+except NameError:
+	class KeyNames(object):
+		"""FreePIE's Key enum outside FreePIE: every key is its own name."""
+		def __getattr__(self, name):
+			if name.startswith("_"):
+				raise AttributeError(name)
+			return name
+	Key = KeyNames()
 
 # === USER CONFIGURABLE INPUTS ===
 THORTLE = 0
 STICK = 1
-MODIFIER_KEYS = [Key.LeftAlt, Key.LeftControl, Key.LeftShift]
-btn_modifier = all(keyboard.getKeyDown(key) for key in MODIFIER_KEYS)
 GlobalCenterKey = Key.F7
-isSideView = joystick[THORTLE].getDown(3)
-centerAll = joystick[THORTLE].getDown(45)
-centerGunView = joystick[THORTLE].getPressed(4)
-centerVGunView = keyboard.getPressed(Key.F1)
-head_y_high = joystick[THORTLE].getPressed(60)
-head_y_highest = joystick[THORTLE].getPressed(59)
-head_y_dynamic = keyboard.getPressed(Key.F6)
-zoomOut = keyboard.getPressed(Key.F4)
-zoomIn = keyboard.getPressed(Key.F5)
-zoomCenter = joystick[THORTLE].getPressed(19)
-openFlaps = joystick[STICK].getPressed(1)
-closeFlaps = joystick[STICK].getPressed(0)
-sixNotifier = keyboard.getPressed(Key.F12)
-isCustomView = joystick[THORTLE].getDown(2)
-stick_y = joystick[STICK].y
+DYNAMIC_Y_AXIS = "Stick y"
 ingame_flaps_release = [Key.F]
 ingame_flaps_retract = [Key.F, Key.LeftShift]
 
@@ -54,846 +37,3010 @@ F_FOUR_PRESET = "f4"
 YAKONE_B_PRESET = "yakodin and b"
 LA_FIVE_PRESET = "la five"
 
-presets_map = {
-	Key.NumberPad0: RESET_PRESET,
-	Key.NumberPad1: LAGG_PRESET,
-	Key.NumberPad3: YAKONE_PRESET,
-	Key.NumberPad2: F_FOUR_PRESET,
-	Key.NumberPad4: YAKONE_B_PRESET,
-	Key.NumberPad4: LA_FIVE_PRESET,
-}
+# Bindings are (action id, trigger, mode). A trigger is "Modifier + ... + Input";
+# the last input fires the binding while every modifier before it is held.
+# Inputs are FreePIE Key names or "Throttle button N" / "Stick button N".
+#   press - fires once when the input goes down
+#   hold  - fires every frame while the input is down
+#   sync  - fires whenever the input level (lock keys: their toggle state)
+#           differs from the state the action tracks (tune.toggle, view.side-hold,
+#           view.custom-hold; other actions track none and cannot sync)
+# Set BINDINGS_FILE to a JSON file {"bindings": [[action, trigger, mode], ...]}
+# to replace DEFAULT_BINDINGS. The table is compiled once at start; duplicate
+# triggers and unknown actions are rejected.
+BINDINGS_FILE = None
+MODIFIERS = "LeftAlt + LeftControl + LeftShift + "
+DEFAULT_BINDINGS = [
+	("preset.reset",                "UpArrow + NumberPad0",       "press"),
+	("preset.lagg",                 "UpArrow + NumberPad1",       "press"),
+	("preset.yakodin",              "UpArrow + NumberPad3",       "press"),
+	("preset.f4",                   "UpArrow + NumberPad2",       "press"),
+	("preset.yakodin-and-b",        "UpArrow + NumberPad4",       "press"),
+	("preset.la-five",              "UpArrow + NumberPad5",       "press"),
+	("preset.copy",                 "UpArrow + NumberPadPeriod",  "press"),
+	("tune.toggle",                 "ScrollLock",                 "sync"),
+	("tune.cycle",                  "RightControl + Insert",      "press"),
+	("tune.adjust-yaw-negative",    "RightShift + Delete",        "hold"),
+	("tune.adjust-yaw-positive",    "RightShift + End",           "hold"),
+	("tune.adjust-pitch-negative",  "RightShift + Insert",        "hold"),
+	("tune.adjust-pitch-positive",  "RightShift + Home",          "hold"),
+	("tune.adjust-x-positive",      "RightShift + LeftArrow",     "hold"),
+	("tune.adjust-x-negative",      "RightShift + RightArrow",    "hold"),
+	("tune.adjust-y-positive",      "RightShift + UpArrow",       "hold"),
+	("tune.adjust-y-negative",      "RightShift + DownArrow",     "hold"),
+	("tune.adjust-z-positive",      "RightShift + PageUp",        "hold"),
+	("tune.adjust-z-negative",      "RightShift + PageDown",      "hold"),
+	("tune.undo",                   "RightShift + Backspace",     "press"),
+	("tune.revert",                 "RightControl + Backspace",   "press"),
+	("view.side-hold",              "Throttle button 3",          "sync"),
+	("view.center-all",             "Throttle button 45",         "hold"),
+	("view.gun-toggle",             "Throttle button 4",          "press"),
+	("view.head-center",            MODIFIERS + "F1",             "press"),
+	("head.high",                   "Throttle button 60",         "press"),
+	("head.highest",                "Throttle button 59",         "press"),
+	("head.dynamic",                MODIFIERS + "F6",             "press"),
+	("zoom.out",                    MODIFIERS + "F4",             "press"),
+	("zoom.in",                     MODIFIERS + "F5",             "press"),
+	("zoom.center",                 "Throttle button 19",         "press"),
+	("helper.flaps-open",           "Stick button 1",             "press"),
+	("helper.flaps-close",          "Stick button 0",             "press"),
+	("helper.check-six",            MODIFIERS + "F12",            "press"),
+	("diagnostics.dump",            MODIFIERS + "F11",            "press"),
+	("profiler.export",             MODIFIERS + "F10",            "press"),
+	("view.custom-hold",            "Throttle button 2",          "sync"),
+]
 
 # opentrack input params for "UDP over network"
 UDP_IP   = "127.0.0.1"
 UDP_PORT = 5555
+# Send-on-change: a pose that moved no more than POSE_EPSILON on every axis is
+# not resent, except once every POSE_KEEPALIVE seconds. None sends every frame.
+POSE_EPSILON   = None
+POSE_KEEPALIVE = 0.5
+# Pose outputs; every pose goes to each of them. "udp" is the OpenTrack input above,
+# "shm" a seqlock slot in the shared memory POSE_MAPPING that a local consumer polls
+# without a socket (reference reader: tools/pose_reader.py).
+OUTPUT_SINKS = ("udp",)
+POSE_MAPPING = "Local\\AomPose.Output"
+# OUTPUT_RATE (Hz) sends poses from a background thread at a fixed rate, rendered
+# OUTPUT_DELAY seconds in the past between the two latest TrackIR samples and
+# extrapolated at most OUTPUT_MAX_EXTRAPOLATION past the newest one.
+# None sends one pose per script frame.
+OUTPUT_RATE              = None
+OUTPUT_DELAY             = 1.0 / 120
+OUTPUT_MAX_EXTRAPOLATION = 0.02
+# EMIT_ON_TRACKIR sends the game-mode pose from trackIR.update as soon as a sample
+# arrives (once per sample) instead of on the next script frame; the frame loop
+# only sends while no sample has arrived or TrackIR has stalled (PROFILER_TRACKIR_STALL).
+EMIT_ON_TRACKIR = False
+# Recenter: zero pose, GlobalCenterKey after CENTER_PRESS_DELAY, tracking again after CENTER_SETTLE_TIME (seconds)
+CENTER_PRESS_DELAY = 0.1
+CENTER_SETTLE_TIME = 0.2
+
+# IL-2 telemetry (TeleOutput packet 0x54000101) received on TELEMETRY_HOST:TELEMETRY_PORT,
+# e.g. 4322 with IL-2 on this PC; None (the default) opens no socket. Use "" as the host
+# only when IL-2 sends from another machine: that listens on every network interface.
+# While a flap position arrived in the last TELEMETRY_STALE seconds, the flap keys are
+# released as soon as the flaps reach FLAPS_OPEN_TARGET / FLAPS_CLOSED_TARGET (0..1),
+# at the latest after the timed durations; without telemetry only the durations apply.
+TELEMETRY_HOST      = "127.0.0.1"
+TELEMETRY_PORT      = None
+TELEMETRY_STALE     = 0.5
+FLAPS_OPEN_TARGET   = 1.0
+FLAPS_CLOSED_TARGET = 0.01
+
+# Diagnostics channels are sampled every DIAGNOSTICS_SAMPLE_INTERVAL seconds into a
+# ring of DIAGNOSTICS_HISTORY samples; the watch window is refreshed every
+# DIAGNOSTICS_PUBLISH_INTERVAL seconds. "diagnostics.dump" prints the history.
+DIAGNOSTICS_SAMPLE_INTERVAL  = 1.0 / 30
+DIAGNOSTICS_PUBLISH_INTERVAL = 0.1
+DIAGNOSTICS_HISTORY          = 300
+
+# Frame profiler: frames slower than PROFILER_FRAME_BUDGET seconds count as overruns,
+# no trackIR.update for PROFILER_TRACKIR_STALL seconds counts as a stall.
+# "profiler.export" writes PROFILER_EXPORT_PATH (.csv or .json), or prints CSV when None.
+PROFILER_FRAME_BUDGET  = 0.002
+PROFILER_TRACKIR_STALL = 0.1
+PROFILER_EXPORT_PATH   = None
+
+# Tuning steps kept per preset for "tune.undo"
+TUNE_UNDO_DEPTH = 1000
+
+# Folder with index.json and one JSON file per preset; None uses the built-in Presets.all.
+# Files are checked for changes every PRESET_POLL_INTERVAL seconds and tuned values are saved back.
+PRESET_DIR           = None
+PRESET_POLL_INTERVAL = 1.0
+
+# Folder for versioned preset exports ("<preset>.v<N>.json"); None only copies to the clipboard
+PRESET_EXPORT_DIR = None
+
+# HUD state for the native overlay (src/Aom.Overlay.D3D11), written whenever it changes to
+# the shared memory named OVERLAY_MAPPING; None (the default) publishes nothing. Aom.App
+# writes "Local\\AomDesktop.OverlayState", the overlay's segment: set that name only
+# while Aom.App is not running, as two writers tear each other's packets.
+OVERLAY_MAPPING = None
+OVERLAY_EVENT   = "Local\\AomDesktop.OverlayUpdated"
+
+# Session recording: raw TrackIR axes, bound inputs, view flags, preset and the sent packet
+# of every frame go to RECORD_PATH, which keeps the last RECORD_FRAMES frames; None records nothing.
+# Replay a file with tools/session_replay.py.
+RECORD_PATH   = None
+RECORD_FRAMES = 360000
+
+# FreePIE runs this whole file on every frame. The classes and tables below are built on
+# the first pass (or on import) and stay in the script's globals for every pass after it.
+if globals().get("starting", True):
+	LOCK_KEYS = {"ScrollLock": 0x91, "NumberLock": 0x90, "CapsLock": 0x14}
+
+	# Monotonic clocks; IronPython 2.7 only has time.clock, which never goes backwards.
+	# `monotonic` is sampled once per frame into AppState.now and drives every timed behaviour,
+	# `perf_counter` is the high-resolution clock for profiling and TrackIR sample times.
+	monotonic = getattr(time, "monotonic", None) or time.clock
+	perf_counter = getattr(time, "perf_counter", None) or time.clock
+
+	class Win32KeyState(object):
+		"""Lock-key toggle bits from a single GetKeyboardState call per frame."""
+		def __init__(self, user32):
+			self._user32 = user32
+			self._buffer = (ctypes.c_ubyte * 256)()
+
+		def capture(self):
+			# GetKeyState syncs this thread's key state with the system before the bulk read
+			self._user32.GetKeyState(0)
+			self._user32.GetKeyboardState(self._buffer)
+
+		def isToggled(self, virtual_key):
+			return (self._buffer[virtual_key] & 0x01) != 0
+
+	class MemoryKeyState(object):
+		"""Pure-Python key state for running off Windows; toggles are set directly."""
+		def __init__(self):
+			self.toggled = set()
+
+		def capture(self):
+			pass
+
+		def isToggled(self, virtual_key):
+			return virtual_key in self.toggled
+
+	class MemoryClipboard(object):
+		"""Clipboard stand-in off Windows: keeps the last text copied."""
+		def __init__(self):
+			self.text = None
+
+		def SetText(self, text):
+			self.text = text
+
+	class NullEvent(object):
+		"""Named-event stand-in off Windows; nobody can wait on it."""
+		def Set(self):
+			return True
 
-def isScrollLock():
-	GetKeyState = ctypes.windll.user32.GetKeyState
-	return (GetKeyState(0x91) & 0x0001) != 0
+	class Platform(object):
+		"""
+		The Windows and .NET services the script uses, resolved on first use.
+
+		Under FreePIE (IronPython) they come from the CLR and user32. Nothing is
+		loaded when the script starts: the WinForms assembly, for example, is only
+		added when a preset is first copied. Without the CLR or Win32, each service
+		falls back to a portable stand-in: Python threads, an in-memory clipboard
+		and key state, a no-op event and silent speech. That lets the classes
+		import and run under CPython on Linux. System.Threading, which the thread
+		helpers need on every call, is resolved once and kept here; owners keep
+		the other services they resolve.
+		"""
+		_threading = None
+
+		@staticmethod
+		def clrThreading():
+			"""System.Threading, or None without the CLR."""
+			if Platform._threading is None:
+				try:
+					import System.Threading
+					Platform._threading = System.Threading
+				except ImportError:
+					Platform._threading = False
+			return Platform._threading or None
+
+		@staticmethod
+		def startThread(run, sta=False):
+			"""Run `run` on a new background thread; `sta` for APIs that need a single-threaded apartment."""
+			threads = Platform.clrThreading()
+			if threads is None:
+				worker = threading.Thread(target=run)
+				worker.daemon = True
+				worker.start()
+				return
+			worker = threads.Thread(threads.ThreadStart(run))
+			if sta:
+				worker.SetApartmentState(threads.ApartmentState.STA)
+			worker.IsBackground = True
+			worker.Start()
+
+		@staticmethod
+		def queueWork(work):
+			"""Run `work()` on the thread pool (a plain thread without the CLR)."""
+			threads = Platform.clrThreading()
+			if threads is None:
+				Platform.startThread(work)
+			else:
+				threads.ThreadPool.QueueUserWorkItem(lambda _: work())
+
+		@staticmethod
+		def clipboard():
+			"""The WinForms Clipboard, adding its assembly on the first call, or a MemoryClipboard."""
+			try:
+				import clr
+				clr.AddReference("System.Windows.Forms")
+				from System.Windows.Forms import Clipboard
+			except ImportError:
+				return MemoryClipboard()
+			return Clipboard
+
+		@staticmethod
+		def keyState():
+			try:
+				return Win32KeyState(ctypes.windll.user32)
+			except AttributeError:
+				return MemoryKeyState()
+
+		@staticmethod
+		def event(name):
+			"""The auto-reset named event `name`, or a NullEvent without the CLR."""
+			threads = Platform.clrThreading()
+			if threads is None:
+				return NullEvent()
+			return threads.EventWaitHandle(False, threads.EventResetMode.AutoReset, name)
+
+		@staticmethod
+		def say(text):
+			try:
+				say = speech.say
+			except NameError:
+				# not running in FreePIE: no speech plugin, callouts are dropped
+				return
+			say(text)
+
+	class PoseTransport(object):
+		"""
+		OpenTrack UDP output over a connected socket.
 
-class TuneMode:
-	def __init__(self, name = "undefined"):
-		self._name = name
-	
-	def modify(self, state, subject, delta):
-		mode = TuneModes.Mode(self._name)
-		var = mode["vars"].get(subject)
-		if not var:
-			return
-		mapper = lambda value, state, delta: (
-			value if mode.get("mappers") is None or mode["mappers"].get(subject) is None
-			else mode["mappers"][subject](value, state, delta)
+		Poses are packed into one reused buffer (`packet`, the last pose packed) by
+		a precompiled Struct. With an epsilon set, unchanged poses are skipped
+		until the keep-alive is due. `sent`, `skipped` and `failed` count packets
+		since start.
+		"""
+		PACKET = struct.Struct('<dddddd')
+		__slots__ = (
+			"socket", "epsilon", "keepalive", "sent", "skipped", "failed",
+			"packet", "_lastTime", "_x", "_y", "_z", "_yaw", "_pitch", "_roll",
 		)
-		state.preset[var] = mapper(state.preset.get(var, 0) + delta, state, delta)
+
+		def __init__(self, address, epsilon=POSE_EPSILON, keepalive=POSE_KEEPALIVE):
+			self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+			self.socket.connect(address)
+			self.epsilon = epsilon
+			self.keepalive = keepalive
+			self.sent = 0
+			self.skipped = 0
+			self.failed = 0
+			self.packet = bytearray(PoseTransport.PACKET.size)
+			self._lastTime = None
+			self._x = self._y = self._z = self._yaw = self._pitch = self._roll = 0
+
+		def send(self, x, y, z, yaw, pitch, roll):
+			epsilon = self.epsilon
+			if epsilon is not None:
+				now = monotonic()
+				if (
+					self._lastTime is not None and now - self._lastTime < self.keepalive
+					and abs(x - self._x) <= epsilon and abs(y - self._y) <= epsilon and abs(z - self._z) <= epsilon
+					and abs(yaw - self._yaw) <= epsilon and abs(pitch - self._pitch) <= epsilon and abs(roll - self._roll) <= epsilon
+				):
+					self.skipped += 1
+					return False
+			PoseTransport.PACKET.pack_into(self.packet, 0, x, y, z, yaw, pitch, roll)
+			try:
+				self.socket.send(self.packet)
+			except socket.error:
+				# nothing listening yet (ICMP port unreachable) must not stop the script
+				self.failed += 1
+				return False
+			self.sent += 1
+			if epsilon is not None:
+				self._lastTime = now
+				self._x, self._y, self._z, self._yaw, self._pitch, self._roll = x, y, z, yaw, pitch, roll
+			return True
+
+	class SharedMemoryPoseSink(object):
+		"""
+		Pose output to a seqlock slot in named shared memory, for local consumers.
+
+		The slot is SLOT_SIZE bytes: "AOMP", uint32 version, uint64 sequence,
+		double send time (monotonic seconds), then the six doubles of the UDP
+		packet. `send` makes the sequence odd, writes the time and pose and
+		makes it even again; a reader copies the slot between two reads of the
+		sequence and keeps the copy only if both are the same even number (see
+		tools/pose_reader.py). There is one writer and no lock, socket or event.
+		Counters match PoseTransport's; nothing is ever skipped or failed.
+		"""
+		MAGIC = b"AOMP"
+		VERSION = 1
+		HEADER = struct.Struct("<4sI")
+		SEQUENCE = struct.Struct("<Q")
+		TIME = struct.Struct("<d")
+		SEQUENCE_OFFSET = 8
+		TIME_OFFSET = 16
+		POSE_OFFSET = 24
+		SLOT_SIZE = 72
+		__slots__ = ("sequence", "sent", "skipped", "failed", "packet", "_view")
+
+		def __init__(self, mapping=POSE_MAPPING):
+			self._view = mmap.mmap(-1, SharedMemoryPoseSink.SLOT_SIZE, tagname=mapping)
+			SharedMemoryPoseSink.HEADER.pack_into(self._view, 0, SharedMemoryPoseSink.MAGIC, SharedMemoryPoseSink.VERSION)
+			# carry on from the last writer, even, so a reader never sees the sequence go back
+			sequence = SharedMemoryPoseSink.SEQUENCE.unpack_from(self._view, SharedMemoryPoseSink.SEQUENCE_OFFSET)[0]
+			self.sequence = sequence + (sequence & 1)
+			self.sent = 0
+			self.skipped = 0
+			self.failed = 0
+			self.packet = bytearray(PoseTransport.PACKET.size)
+
+		def send(self, x, y, z, yaw, pitch, roll):
+			PoseTransport.PACKET.pack_into(self.packet, 0, x, y, z, yaw, pitch, roll)
+			view = self._view
+			sequence = self.sequence
+			SharedMemoryPoseSink.SEQUENCE.pack_into(view, SharedMemoryPoseSink.SEQUENCE_OFFSET, sequence + 1)
+			SharedMemoryPoseSink.TIME.pack_into(view, SharedMemoryPoseSink.TIME_OFFSET, monotonic())
+			view[SharedMemoryPoseSink.POSE_OFFSET:SharedMemoryPoseSink.SLOT_SIZE] = self.packet
+			self.sequence = sequence + 2
+			SharedMemoryPoseSink.SEQUENCE.pack_into(view, SharedMemoryPoseSink.SEQUENCE_OFFSET, sequence + 2)
+			self.sent += 1
+			return True
+
+	class PoseSinks(object):
+		"""
+		Fan-out over several pose sinks, with PoseTransport's interface.
+
+		`create` builds the sinks named in OUTPUT_SINKS and returns a lone sink
+		as is, so the usual single output pays for no extra call. A sink the
+		platform cannot open (named shared memory off Windows) is left out with
+		a debug message; with none left, `create` fails. `packet` is the first
+		sink's; the counters add up over all of them.
+		"""
+		TYPES = {
+			"udp": lambda: PoseTransport((UDP_IP, UDP_PORT)),
+			"shm": SharedMemoryPoseSink,
+		}
+
+		def __init__(self, sinks):
+			self.sinks = tuple(sinks)
+			self.packet = self.sinks[0].packet
+
+		@staticmethod
+		def create(names):
+			if not names:
+				raise ValueError("OUTPUT_SINKS needs at least one sink")
+			unknown = sorted(name for name in names if name not in PoseSinks.TYPES)
+			if unknown:
+				raise ValueError("Unknown output sinks: {} (known: {})".format(", ".join(unknown), ", ".join(sorted(PoseSinks.TYPES))))
+			sinks = []
+			for name in names:
+				try:
+					sinks.append(PoseSinks.TYPES[name]())
+				except (EnvironmentError, TypeError) as e:
+					# e.g. no named shared memory on this platform; the other sinks still get every pose
+					diagnostics.debug("Pose output '{}' disabled: {}".format(name, e))
+			if not sinks:
+				raise ValueError("None of the output sinks {} could be opened on this platform".format(", ".join(names)))
+			return sinks[0] if len(sinks) == 1 else PoseSinks(sinks)
+
+		def send(self, x, y, z, yaw, pitch, roll):
+			sent = False
+			for sink in self.sinks:
+				if sink.send(x, y, z, yaw, pitch, roll):
+					sent = True
+			return sent
+
+		@property
+		def sent(self):
+			return sum(sink.sent for sink in self.sinks)
+
+		@property
+		def skipped(self):
+			return sum(sink.skipped for sink in self.sinks)
+
+		@property
+		def failed(self):
+			return sum(sink.failed for sink in self.sinks)
+
+	class Il2Telemetry(object):
+		"""
+		IL-2 TeleOutput receiver on a non-blocking UDP socket.
+
+		`poll` drains every pending datagram into one reused buffer and parses
+		packet 0x54000101 with unpack_from, like Aom.App's Il2TelemetryPacketReader:
+		a header (packet id, message size, tick, indicator count), then per
+		indicator an id, a value count and that many floats. Indicator 11 is the
+		flap position (0 retracted .. 1 fully extended), 6 the equivalent
+		airspeed in m/s. `fresh` tells whether a flap position arrived in the
+		last `stale` seconds.
+		"""
+		PACKET_ID = 0x54000101
+		HEADER = struct.Struct("<IHIB")
+		INDICATOR = struct.Struct("<HB")
+		VALUE = struct.Struct("<f")
+		EAS = 6
+		FLAPS = 11
+
+		def __init__(self, port=TELEMETRY_PORT, stale=TELEMETRY_STALE, host=TELEMETRY_HOST):
+			self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+			self.socket.setblocking(False)
+			self.socket.bind((host, port))
+			self.stale = stale
+			self.tick = None
+			self.flaps = None
+			self.eas = None
+			self.flapsTime = None
+			self.received = 0
+			self.rejected = 0
+			self._buffer = bytearray(4096)
+
+		def poll(self, now):
+			while True:
+				try:
+					size = self.socket.recv_into(self._buffer)
+				except socket.error:
+					# nothing pending (or an ICMP error from a previous send); try again next frame
+					return
+				if self._parse(size, now):
+					self.received += 1
+				else:
+					self.rejected += 1
+
+		def _parse(self, size, now):
+			buffer = self._buffer
+			if size < Il2Telemetry.HEADER.size:
+				return False
+			packet, length, tick, count = Il2Telemetry.HEADER.unpack_from(buffer, 0)
+			if packet != Il2Telemetry.PACKET_ID or length > size:
+				return False
+			offset = Il2Telemetry.HEADER.size
+			eas = flaps = None
+			for _ in range(count):
+				if offset + Il2Telemetry.INDICATOR.size > length:
+					return False
+				indicator, values = Il2Telemetry.INDICATOR.unpack_from(buffer, offset)
+				offset += Il2Telemetry.INDICATOR.size
+				if offset + values * Il2Telemetry.VALUE.size > length:
+					return False
+				if values:
+					if indicator == Il2Telemetry.EAS:
+						eas = Il2Telemetry.VALUE.unpack_from(buffer, offset)[0]
+					elif indicator == Il2Telemetry.FLAPS:
+						flaps = Il2Telemetry.VALUE.unpack_from(buffer, offset)[0]
+				offset += values * Il2Telemetry.VALUE.size
+			# the event count byte follows the indicators
+			if offset + 1 > length or (eas is None and flaps is None):
+				return False
+			self.tick = tick
+			if eas is not None:
+				self.eas = eas
+			if flaps is not None:
+				self.flaps = min(max(flaps, 0.0), 1.0)
+				self.flapsTime = now
+			return True
+
+		def fresh(self, now):
+			return self.flapsTime is not None and now - self.flapsTime <= self.stale
+
+	class PresetExporter(object):
+		"""
+		Preset export on an STA worker thread, so the frame never waits on WinForms.
+
+		`submit` queues a snapshot of the preset; the worker formats it once and
+		copies the text to the clipboard and/or writes the next "<name>.v<N>.json"
+		in `directory`, then calls `done(preset, text, error)` on the worker.
+		"""
+		def __init__(self, done, directory=PRESET_EXPORT_DIR, clipboard=True):
+			self.done = done
+			self.directory = directory
+			self.clipboard = clipboard
+			self._clipboard = None
+			self._lock = threading.Lock()
+			self._pending = deque()
+			self._busy = False
+
+		def submit(self, preset):
+			snapshot = preset.copy()
+			with self._lock:
+				self._pending.append(snapshot)
+				if self._busy:
+					return
+				self._busy = True
+			# the clipboard only accepts calls from single-threaded apartments
+			Platform.startThread(self._drain, sta=True)
+
+		@staticmethod
+		def format(preset):
+			lines = ['    "{}": {:.4f}'.format(field, value) for field, value in preset.items()]
+			for extra in PresetRecord.EXTRAS:
+				if getattr(preset, extra):
+					lines.append('    "{}": {}'.format(extra, json.dumps(getattr(preset, extra), sort_keys=True)))
+			return "{\n" + ",\n".join(lines) + "\n}"
+
+		def path(self, name):
+			"""First unused versioned file name for `name` in the export directory."""
+			stem = os.path.join(self.directory, name.replace(" ", "-"))
+			version = 1
+			while os.path.exists("{}.v{}.json".format(stem, version)):
+				version += 1
+			return "{}.v{}.json".format(stem, version)
+
+		def _drain(self):
+			while True:
+				with self._lock:
+					if not self._pending:
+						self._busy = False
+						return
+					preset = self._pending.popleft()
+				text, error = None, None
+				try:
+					text = PresetExporter.format(preset)
+					if self.clipboard:
+						if self._clipboard is None:
+							self._clipboard = Platform.clipboard()
+						self._clipboard.SetText(text)
+					if self.directory is not None:
+						with open(self.path(preset.name), "w") as handle:
+							handle.write(text)
+				except Exception as e:
+					error = e
+				self.done(preset, text, error)
+
+	class PoseScheduler(object):
+		"""
+		Fixed-rate pose output on a background thread.
+
+		`send` (same signature as PoseTransport.send) stores the frame's pose
+		stamped with the TrackIR sample time in a two-slot buffer. A pose for a
+		new sample becomes the latest one; a pose for the same sample (view
+		change, recenter, tune mode) replaces both slots so the jump is not
+		smeared. The worker wakes `rate` times a second and sends the pose
+		interpolated at now - `delay` between the two slots, extrapolating at
+		most `maxExtrapolation` past the newest. It exits once no frame has
+		called `send` for `stale` seconds and is restarted by the next `send`.
+		`packet` is the last pose a frame sent, packed like PoseTransport's and
+		written only by the frame thread; the worker packs into the transport's.
+		"""
+		SIZE = 7
+
+		def __init__(self, transport, rate, delay=OUTPUT_DELAY, maxExtrapolation=OUTPUT_MAX_EXTRAPOLATION,
+				sampleTime=None, stale=1.0, start=None):
+			self.transport = transport
+			self.rate = float(rate)
+			self.delay = delay
+			self.maxExtrapolation = maxExtrapolation
+			self.stale = stale
+			self.ticks = 0
+			self._sampleTime = sampleTime or perf_counter
+			self._start = start or PoseScheduler._thread
+			self._lock = threading.Lock()
+			self._slots = ([None] + [0] * (PoseScheduler.SIZE - 1), [None] + [0] * (PoseScheduler.SIZE - 1))
+			self._latest = 0
+			self._heartbeat = None
+			self._running = False
+			self.packet = bytearray(PoseTransport.PACKET.size)
+
+		@staticmethod
+		def _thread(loop):
+			Platform.startThread(loop)
+
+		def send(self, x, y, z, yaw, pitch, roll):
+			PoseTransport.PACKET.pack_into(self.packet, 0, x, y, z, yaw, pitch, roll)
+			sampled = self._sampleTime()
+			with self._lock:
+				latest = self._slots[self._latest]
+				cut = sampled is None or latest[0] is None or sampled <= latest[0]
+				if not cut:
+					self._latest ^= 1
+					latest = self._slots[self._latest]
+				latest[0], latest[1], latest[2], latest[3], latest[4], latest[5], latest[6] = sampled, x, y, z, yaw, pitch, roll
+				if cut:
+					self._slots[self._latest ^ 1][:] = latest
+				self._heartbeat = perf_counter()
+				start = not self._running
+				self._running = True
+			if start:
+				self._start(self._loop)
+			return True
+
+		def pose(self, now):
+			"""(x, y, z, yaw, pitch, roll) rendered for time `now`."""
+			with self._lock:
+				newest = list(self._slots[self._latest])
+				older = list(self._slots[self._latest ^ 1])
+			if newest[0] is None or newest[0] == older[0]:
+				return tuple(newest[1:])
+			at = min(now - self.delay, newest[0] + self.maxExtrapolation)
+			if at <= older[0]:
+				return tuple(older[1:])
+			u = (at - older[0]) / (newest[0] - older[0])
+			return tuple(older[axis] + (newest[axis] - older[axis]) * u for axis in range(1, PoseScheduler.SIZE))
+
+		def tick(self, now):
+			self.ticks += 1
+			x, y, z, yaw, pitch, roll = self.pose(now)
+			return self.transport.send(x, y, z, yaw, pitch, roll)
+
+		def _loop(self):
+			try:
+				# 1 ms Sleep granularity instead of the default 15.6 ms tick
+				winmm = ctypes.windll.winmm
+				winmm.timeBeginPeriod(1)
+			except AttributeError:
+				winmm = None
+			period = 1.0 / self.rate
+			due = perf_counter()
+			try:
+				while True:
+					now = perf_counter()
+					with self._lock:
+						if now - self._heartbeat > self.stale:
+							self._running = False
+							return
+					# sleep to half a millisecond before the tick, then yield until it is due
+					while now < due:
+						time.sleep(max(0, due - now - 0.0005))
+						now = perf_counter()
+					self.tick(now)
+					due += period
+					if now - due > period:
+						due = now + period
+			finally:
+				if winmm is not None:
+					winmm.timeEndPeriod(1)
+
+	class Timer(object):
+		"""A callback armed on a TimerWheel; owners keep theirs and re-arm it instead of allocating."""
+		__slots__ = ("callback", "due", "order", "bucket")
+
+		def __init__(self, callback):
+			self.callback = callback
+			self.due = None
+			self.order = 0
+			self.bucket = None
+
+		@property
+		def active(self):
+			return self.due is not None
+
+	class TimerWheel(object):
+		"""
+		Hashed timer wheel on the frame clock.
+
+		A timer due at `t` sits in bucket int(t / resolution) % size. `advance`
+		visits only the buckets of the ticks since the previous call (the current
+		tick again, as it may hold timers due later within it) and fires the due
+		timers in deadline order, then arming order, with the frame time; timers a whole turn or
+		more ahead stay in their bucket. Arming, re-arming and cancelling are
+		O(1). `now` is the frame time of the last `advance`. Timers belong to
+		the frame thread: arm them only from frame code and timer callbacks.
+		"""
+		RESOLUTION = 0.01
+		SIZE = 256
+
+		def __init__(self, resolution=RESOLUTION, size=SIZE, now=0.0):
+			self.resolution = resolution
+			self.now = now
+			self.fired = 0
+			self._armed = 0
+			self._buckets = [set() for _ in range(size)]
+			self._tick = int(now / resolution)
+
+		def schedule(self, timer, due):
+			"""Arm (or re-arm) `timer` to fire at frame time `due`."""
+			if timer.bucket is not None:
+				timer.bucket.discard(timer)
+			# a deadline already behind the wheel goes into the next bucket visited
+			tick = max(int(due / self.resolution), self._tick)
+			timer.bucket = self._buckets[tick % len(self._buckets)]
+			timer.bucket.add(timer)
+			timer.due = due
+			# bucket sets iterate in no fixed order; ties fire in the order they were armed
+			timer.order = self._armed
+			self._armed += 1
+
+		def after(self, timer, delay):
+			self.schedule(timer, self.now + delay)
+
+		def cancel(self, timer):
+			if timer.bucket is not None:
+				timer.bucket.discard(timer)
+			timer.bucket = None
+			timer.due = None
+
+		def advance(self, now):
+			self.now = now
+			tick = int(now / self.resolution)
+			buckets = self._buckets
+			first = max(self._tick, tick - len(buckets) + 1)
+			self._tick = tick
+			due = None
+			for index in range(first, tick + 1):
+				bucket = buckets[index % len(buckets)]
+				if bucket:
+					for timer in bucket:
+						if timer.due <= now:
+							if due is None:
+								due = []
+							due.append(timer)
+			if due is None:
+				return
+			due.sort(key=lambda timer: (timer.due, timer.order))
+			for timer in due:
+				# an earlier callback may have cancelled or re-armed it
+				if timer.due is None or timer.due > now:
+					continue
+				self.cancel(timer)
+				self.fired += 1
+				timer.callback(now)
+
+	class Callout(object):
+		"""One cached phrase with its priority, rate limit and queue state."""
+		__slots__ = ("text", "priority", "interval", "pending", "limited", "timer")
+
+		def __init__(self, text, priority, interval):
+			self.text = text
+			self.priority = priority
+			self.interval = interval
+			self.pending = False
+			self.limited = False
+			self.timer = Timer(self._release)
+
+		def _release(self, now):
+			self.limited = False
+
+	class SpeechQueue(object):
+		"""
+		Speech callouts spoken on a thread-pool worker instead of the frame thread.
+
+		`say` looks the phrase up in the cache, drops it if the same phrase is
+		still waiting or was queued less than its interval ago, and queues it by
+		priority. A rate-limited phrase arms its timer on `timers` to lift the
+		limit, so phrases with an interval are for the frame thread only. A
+		worker is started only when the queue was idle and drains it, highest
+		priority (lowest number) first.
+		"""
+		MODE = 0
+		STATUS = 1
+		REPEAT = 2
+
+		def __init__(self, timers, run=None):
+			self._timers = timers
+			self._run = run or Platform.queueWork
+			self._lock = threading.Lock()
+			self._queues = tuple(deque() for _ in range(SpeechQueue.REPEAT + 1))
+			self._cache = {}
+			self._busy = False
+			self.spoken = 0
+			self.merged = 0
+			self.limited = 0
+
+		def say(self, text, priority=STATUS, interval=0):
+			callout = self._cache.get(text)
+			if callout is None:
+				callout = self._cache[text] = Callout(text, priority, interval)
+			with self._lock:
+				if callout.pending:
+					self.merged += 1
+					return
+				if callout.limited:
+					self.limited += 1
+					return
+				if callout.interval:
+					callout.limited = True
+					self._timers.after(callout.timer, callout.interval)
+				callout.pending = True
+				self._queues[callout.priority].append(callout)
+				if self._busy:
+					return
+				self._busy = True
+			self._run(self._drain)
+
+		def _drain(self):
+			while True:
+				with self._lock:
+					callout = None
+					for queue in self._queues:
+						if queue:
+							callout = queue.popleft()
+							break
+					if callout is None:
+						self._busy = False
+						return
+					callout.pending = False
+				try:
+					Platform.say(callout.text)
+					self.spoken += 1
+				except Exception as e:
+					diagnostics.debug("Speech failed: " + str(e))
+
+	class InputSnapshot(object):
+		"""
+		Every bound key, button, axis and lock-key state read once per frame.
+
+		Consumers register the inputs they need up front and keep the returned
+		slot; after `capture` the current value is `values[slot]`. `load` makes
+		the next `capture` take recorded values instead of reading the devices.
+		"""
+		JOYSTICKS = {"Throttle": THORTLE, "Stick": STICK}
+
+		def __init__(self, keyState):
+			self.keyState = keyState
+			self.values = []
+			self._reads = []
+			self._slots = {}
+			self._loaded = None
+
+		def _slot(self, ident, read, code):
+			slot = self._slots.get(ident)
+			if slot is None:
+				slot = self._slots[ident] = len(self._reads)
+				self._reads.append((read, code))
+				self.values.append(read(code))
+			return slot
+
+		def input(self, token, kind):
+			"""Slot for `token` read as "pressed", "down" or "toggled" (lock keys only)."""
+			parts = token.split()
+			if len(parts) == 3 and parts[0] in InputSnapshot.JOYSTICKS and parts[1] == "button" and parts[2].isdigit():
+				index, button = InputSnapshot.JOYSTICKS[parts[0]], int(parts[2])
+				device = joystick[index]
+				read = device.getPressed if kind == "pressed" else device.getDown
+				return self._slot((kind, index, button), read, button)
+			if kind == "toggled" and token in LOCK_KEYS:
+				return self._slot((kind, token), self.keyState.isToggled, LOCK_KEYS[token])
+			try:
+				key = getattr(Key, token)
+			except AttributeError:
+				raise ValueError("Unknown binding input '{}'".format(token))
+			read = keyboard.getPressed if kind == "pressed" else keyboard.getKeyDown
+			return self._slot((kind, key), read, key)
+
+		def axis(self, token):
+			"""Slot for a joystick axis such as "Stick y"."""
+			parts = token.split()
+			if len(parts) != 2 or parts[0] not in InputSnapshot.JOYSTICKS:
+				raise ValueError("Unknown axis '{}'".format(token))
+			index = InputSnapshot.JOYSTICKS[parts[0]]
+			device = joystick[index]
+			return self._slot(("axis", index, parts[1]), lambda name: getattr(device, name), parts[1])
+
+		def slots(self):
+			"""[(slot, ident), ...] in slot order; ident is ("axis", joystick, name) for axes."""
+			return sorted((slot, ident) for ident, slot in self._slots.items())
+
+		def load(self, values):
+			if len(values) != len(self.values):
+				raise ValueError("Expected {} input values, got {}".format(len(self.values), len(values)))
+			self._loaded = values
+
+		def capture(self):
+			loaded = self._loaded
+			if loaded is not None:
+				self._loaded = None
+				self.values[:] = loaded
+				return
+			self.keyState.capture()
+			values = self.values
+			slot = 0
+			for read, code in self._reads:
+				values[slot] = read(code)
+				slot += 1
+
+	class TuneMode:
+		def __init__(self, name = "undefined"):
+			self._name = name
+	
+		def modify(self, state, subject, delta):
+			mode = TuneModes.Mode(self._name)
+			var = mode["vars"].get(subject)
+			if not var:
+				return
+			mapper = lambda value, state, delta: (
+				value if mode.get("mappers") is None or mode["mappers"].get(subject) is None
+				else mode["mappers"][subject](value, state, delta)
+			)
+			state.preset.tune(var, mapper(getattr(state.preset, var) + delta, state, delta))
+
+		def vars(self):
+			"""Preset fields this mode tunes."""
+			mode = TuneModes.Mode(self._name)
+			return list(mode["vars"].values()) if mode else []
 	
-	@property
-	def name(self): return self._name
+		@property
+		def name(self): return self._name
 	
-	@name.setter
-	def name(self, new_name): 
-		self._name = new_name
-
-class Presets:
-	all = {
-		RESET_PRESET: {
-			"deltaX1": 0,
-			"deltaY1": 0,
-			"deltaZ1": 0,
-			"deltaX0": 0,
-			"deltaY0": 0,
-			"deltaZ2_1": 0,
-			"deltaZ2_2": 0,
-			"deltaX2_1": 0,
-			"deltaY2_1": 0,
-			"deltaY2_2": 0,
-			"deltaX2_4": 0,
-			"deltaY2_4": 0,
-			"deltaZ2_4": 0,
-			"deltaYLow": 0,
-   			"deltaYHigh": 0,
-			"syaw": 0,
-			"spitch": 0
-		},
-		LAGG_PRESET: {
-			"deltaX0": 0.2500,
-			"deltaX1": 1.2804,
-			"deltaX2_1": 1.6000,
-			"deltaX2_4": 0.0,
-			"deltaY0": 0.1000,
-			"deltaY1": -0.1304,
-			"deltaY2_1": 1.1000,
-			"deltaY2_2": 1.6000,
-			"deltaY2_4": -4.4500,
-			"deltaYHigh": 1.4000,
-			"deltaYLow": -0.6500,
-			"deltaZ1": 6.5200,
-			"deltaZ2_1": -4.0,
-			"deltaZ2_2": 7.4900,
-			"deltaZ2_4": 8.4500,
-			"manual_yaw": -140.0,
-			"spitch": -1.0,
-			"syaw": -2.5000,
-		},
-		YAKONE_PRESET: {
-			"deltaX0": 0.0400,
-			"deltaX1": 1.4504,
-			"deltaX2_1": 2.5500,
-			"deltaX2_4": -0.4500,
-			"deltaY0": -0.0100,
-			"deltaY1": 2.8100,
-			"deltaY2_1": 1.1000,
-			"deltaY2_2": 3.4500,
-			"deltaY2_4": -5.0400,
-			"deltaYHigh": 3.7000,
-			"deltaYLow": -1.0500,
-			"deltaZ1": 6.6000,
-			"deltaZ2_1": -4.2000,
-			"deltaZ2_2": 8.6900,
-			"deltaZ2_4": 6.4400,
-			"manual_yaw": -140.0000,
-			"spitch": -1.5000,
-			"syaw": -1.0000,
-		},
-		F_FOUR_PRESET: {
-			"deltaX1": 1.58,
-			"deltaY1": 0.94,
-			"deltaZ1": 5.02,
-			"deltaX0": 0,
-			"deltaY0": 0.22,
-			"deltaZ2_1": -5.85,
-			"deltaZ2_2": 8.75,
-			"deltaX2_1": 3.5,
-			"deltaY2_1": 0.75,
-			"deltaY2_2": 3.05,
-			"deltaX2_4": 0,
-			"deltaY2_4": -5.35,
-			"deltaZ2_4": 3.99,
-			"deltaYLow": -0.55,
-   			"deltaYHigh": 2.55,
-			"syaw": -1.5,
-			"spitch": -1
-		},
-  		YAKONE_B_PRESET: {
-			"deltaX1": 1.18,
-			"deltaY1": 2.19,
-			"deltaZ1": 1.04,
-			"deltaX0": 0.0,
-			"deltaY0": 0.1,
-			"deltaZ2_1": -4.99,
-			"deltaZ2_2": 5.74,
-			"deltaX2_1": 3.55,
-			"deltaY2_1": 0.55,
-			"deltaY2_2": 3.6,
-			"deltaX2_4": -0.3,
-			"deltaY2_4": -5.95,
-			"deltaZ2_4": 5.29,
-			"deltaYLow": -0.9,
-   			"deltaYHigh": 2.3,
-			"syaw": -2.5,
-			"spitch": -2
-		},
-		LA_FIVE_PRESET: {
-			"deltaX0": 0.0,
-			"deltaX1": 1.1904,
-			"deltaX2_1": 3.2500,
-			"deltaX2_4": -0.2500,
-			"deltaY0": 0.0,
-			"deltaY1": -2.7200,
-			"deltaY2_1": 1.2500,
-			"deltaY2_2": 1.4500,
-			"deltaY2_4": -3.9500,
-			"deltaYHigh": 1.2500,
-			"deltaYLow": -0.7500,
-			"deltaZ1": 6.7804,
-			"deltaZ2_1": -4.3000,
-			"deltaZ2_2": 6.3000,
-			"deltaZ2_4": 0.3500,
-			"manual_yaw": -134.5000,
-			"spitch": -1.0000,
-			"syaw": -2.0000,
+		@name.setter
+		def name(self, new_name): 
+			self._name = new_name
+
+	class PresetRecord(object):
+		"""
+		Camera preset compiled from a `Presets.all` entry; missing fields default to 0.
+
+		An entry may also carry "curves": {"x"|"y"|"z": curve spec} selecting the
+		auto-corner response curve per axis (see AutoCornerCurve); unset axes are linear.
+		"prediction": {TrackIR axis: filter spec} filters and predicts raw TrackIR
+		axes (see PoseFilter); unset axes pass through untouched.
+		"""
+		CURVE_AXES = ("x", "y", "z")
+		EXTRAS = ("curves", "prediction")
+		FIELDS = (
+			"deltaX0", "deltaX1", "deltaX2_1", "deltaX2_4",
+			"deltaY0", "deltaY1", "deltaY2_1", "deltaY2_2", "deltaY2_4", "deltaYHigh", "deltaYLow",
+			"deltaZ1", "deltaZ2_1", "deltaZ2_2", "deltaZ2_4",
+			"manual_yaw", "spitch", "syaw",
+		)
+		__slots__ = ("name",) + EXTRAS + FIELDS
+
+		def __init__(self, name, values=None):
+			values = values or {}
+			unknown = sorted(key for key in values if key not in PresetRecord.FIELDS and key not in PresetRecord.EXTRAS)
+			if unknown:
+				raise ValueError("Preset '{}' has unknown fields: {}".format(name, ", ".join(unknown)))
+			self.name = name
+			for field in PresetRecord.FIELDS:
+				value = values.get(field, 0.0)
+				if isinstance(value, bool) or not isinstance(value, (int, float)):
+					raise ValueError("Preset '{}' field '{}' must be a number, got {!r}".format(name, field, value))
+				setattr(self, field, float(value))
+			self.curves = dict(values.get("curves") or {})
+			for axis, spec in self.curves.items():
+				if axis not in PresetRecord.CURVE_AXES:
+					raise ValueError("Preset '{}' has a curve for unknown axis '{}'".format(name, axis))
+				AutoCornerCurve.shape(spec)
+			self.prediction = dict(values.get("prediction") or {})
+			for axis, spec in self.prediction.items():
+				if axis not in TrackIRSample.FIELDS:
+					raise ValueError("Preset '{}' has a prediction filter for unknown axis '{}'".format(name, axis))
+				PoseFilter.create(spec)
+
+		def items(self):
+			return [(field, getattr(self, field)) for field in PresetRecord.FIELDS]
+
+		def copy(self):
+			values = dict(self.items())
+			values["curves"] = dict(self.curves)
+			values["prediction"] = dict(self.prediction)
+			return PresetRecord(self.name, values)
+
+	class LayeredPreset(PresetRecord):
+		"""
+		Effective preset: an untouched base record plus this session's tuning.
+
+		Fields are resolved once from `base` when the layer is created; `tune`
+		records the change in `overrides` and on the undo stack and updates the
+		field in place, so the pose math keeps reading plain attributes. `undo`
+		and `revert` are O(1) per step or field; the base is never written.
+		`revision` counts the changes, so readers can tell when values moved.
+		"""
+		__slots__ = ("base", "overrides", "history", "tables", "revision")
+
+		def __init__(self, base):
+			self.name = base.name
+			self.curves = base.curves
+			self.prediction = base.prediction
+			for field in PresetRecord.FIELDS:
+				setattr(self, field, getattr(base, field))
+			self.base = base
+			self.overrides = {}
+			self.history = deque(maxlen=TUNE_UNDO_DEPTH)
+			self.tables = None
+			self.revision = 0
+
+		def tune(self, field, value):
+			self.history.append((field, field in self.overrides, getattr(self, field)))
+			self.overrides[field] = value
+			setattr(self, field, value)
+			self.revision += 1
+
+		def undo(self):
+			"""Roll back the last tune or revert step; False when there is nothing to undo."""
+			if not self.history:
+				return False
+			field, overridden, value = self.history.pop()
+			if overridden:
+				self.overrides[field] = value
+			else:
+				self.overrides.pop(field, None)
+			setattr(self, field, value)
+			self.revision += 1
+			return True
+
+		def revert(self, field):
+			"""Drop this session's override of `field`; undo restores it."""
+			if field not in self.overrides:
+				return False
+			self.history.append((field, True, getattr(self, field)))
+			del self.overrides[field]
+			setattr(self, field, getattr(self.base, field))
+			self.revision += 1
+			return True
+
+	class AutoCornerCurve(object):
+		"""
+		Response curve for one auto-corner axis between autoCornerStart and autoCornerEnd.
+
+		"linear" keeps the original ensureMapRange mapping. Every other shape is
+		sampled once into a SIZE-entry table of 0..1 values when the preset loads
+		and read back with one interpolated lookup per frame. Both read the same
+		signed position t = (yaw - start) / span: linear returns t, a table
+		returns its value at |t| with the sign of t (the linear mapping is odd in
+		t too, so a [[0, 0], [1, 1]] table equals it) and holds its end value past
+		|t| = 1. The preset delta scales the result at lookup time, so tuning never
+		rebuilds the table.
+
+		Specs: "linear", "ease-in", "ease-out", "ease-in-out", or
+		["piecewise", [[t, v], ...]] / ["spline", [[t, v], ...]] with t and v in 0..1.
+		"""
+		SIZE = 256
+		__slots__ = ("spec", "start", "span", "step", "table")
+
+		def __init__(self, spec, start, end):
+			self.spec = spec
+			self.start = start
+			self.span = end - start
+			self.step = 0
+			self.table = None
+			shape = AutoCornerCurve.shape(spec)
+			if shape is not None and self.span != 0:
+				last = AutoCornerCurve.SIZE - 1
+				self.table = [float(shape(index / float(last))) for index in range(AutoCornerCurve.SIZE)]
+				self.step = last / float(self.span)
+
+		def map(self, value, scale):
+			if self.span == 0:
+				return 0
+			table = self.table
+			if table is None:
+				return 0 + ((value - self.start) / self.span) * (scale - 0)
+			position = (value - self.start) * self.step
+			negative = position < 0
+			if negative:
+				position = -position
+			if position >= AutoCornerCurve.SIZE - 1:
+				unit = table[-1]
+			else:
+				index = int(position)
+				unit = table[index] + (table[index + 1] - table[index]) * (position - index)
+			return -unit * scale if negative else unit * scale
+
+		@staticmethod
+		def shape(spec):
+			"""Unit shape t -> 0..1 for a curve spec, or None for linear."""
+			if isinstance(spec, str):
+				name, points = spec, None
+			else:
+				name, points = spec[0], (spec[1] if len(spec) > 1 else None)
+			if name == "linear":
+				return None
+			if name == "ease-in":
+				return lambda t: t * t
+			if name == "ease-out":
+				return lambda t: t * (2 - t)
+			if name == "ease-in-out":
+				return lambda t: t * t * (3 - 2 * t)
+			if name == "piecewise" or name == "spline":
+				points = sorted((float(t), float(v)) for t, v in (points or []))
+				xs = [t for t, _ in points]
+				if len(points) < 2 or len(set(xs)) != len(xs):
+					raise ValueError("Curve '{}' needs at least two points with distinct t".format(name))
+				return AutoCornerCurve._piecewise(points) if name == "piecewise" else AutoCornerCurve._spline(points)
+			raise ValueError("Unknown auto-corner curve '{}'".format(name))
+
+		@staticmethod
+		def _segment(xs, t):
+			for index in range(1, len(xs) - 1):
+				if t < xs[index]:
+					return index - 1
+			return len(xs) - 2
+
+		@staticmethod
+		def _piecewise(points):
+			xs = [t for t, _ in points]
+			ys = [v for _, v in points]
+			def evaluate(t):
+				t = min(max(t, xs[0]), xs[-1])
+				i = AutoCornerCurve._segment(xs, t)
+				return ys[i] + (ys[i + 1] - ys[i]) * (t - xs[i]) / (xs[i + 1] - xs[i])
+			return evaluate
+
+		@staticmethod
+		def _spline(points):
+			# Monotone cubic Hermite (Fritsch-Carlson), so the curve never overshoots its points
+			xs = [t for t, _ in points]
+			ys = [v for _, v in points]
+			count = len(points)
+			widths = [xs[i + 1] - xs[i] for i in range(count - 1)]
+			slopes = [(ys[i + 1] - ys[i]) / widths[i] for i in range(count - 1)]
+			tangents = [slopes[0]] + [
+				0.0 if slopes[i - 1] * slopes[i] <= 0 else (slopes[i - 1] + slopes[i]) / 2
+				for i in range(1, count - 1)
+			] + [slopes[-1]]
+			for i in range(count - 1):
+				if slopes[i] == 0:
+					tangents[i] = tangents[i + 1] = 0.0
+					continue
+				a, b = tangents[i] / slopes[i], tangents[i + 1] / slopes[i]
+				if a * a + b * b > 9:
+					tau = 3 / math.sqrt(a * a + b * b)
+					tangents[i], tangents[i + 1] = tau * a * slopes[i], tau * b * slopes[i]
+			def evaluate(t):
+				t = min(max(t, xs[0]), xs[-1])
+				i = AutoCornerCurve._segment(xs, t)
+				h = widths[i]
+				u = (t - xs[i]) / h
+				return (
+					(2 * u ** 3 - 3 * u ** 2 + 1) * ys[i] + (u ** 3 - 2 * u ** 2 + u) * h * tangents[i]
+					+ (-2 * u ** 3 + 3 * u ** 2) * ys[i + 1] + (u ** 3 - u ** 2) * h * tangents[i + 1]
+				)
+			return evaluate
+
+	class PoseFilter(object):
+		"""
+		Smoothing and look-ahead for one TrackIR axis, O(1) per sample.
+
+		`update(value, now)` returns the filtered value extrapolated `lead`
+		seconds ahead along the estimated velocity; the first sample and repeated
+		timestamps pass the value through. Specs are [type, {parameter: value}]:
+		  ["one-euro", {"minCutoff": 1.0, "beta": 0.0, "dCutoff": 1.0, "lead": 0}]
+		  ["alpha-beta", {"alpha": 0.5, "beta": 0.1, "lead": 0}]
+		  ["velocity", {"lead": 0}]
+		"""
+		TYPES = {
+			"one-euro": {"minCutoff": 1.0, "beta": 0.0, "dCutoff": 1.0, "lead": 0.0},
+			"alpha-beta": {"alpha": 0.5, "beta": 0.1, "lead": 0.0},
+			"velocity": {"lead": 0.0},
 		}
-	}
-
-class TuneModes: 
-	MODES = [
-		{
-	  		"name": "isAuto", 			
-			"vars": {
-				"yaw": "manual_yaw", 
-				"x": "deltaX1", 
-				"y": "deltaY1", 
-				"z": "deltaZ1"
+		__slots__ = ("kind", "minCutoff", "beta", "dCutoff", "alpha", "lead", "_time", "_value", "_velocity", "_output")
+
+		def __init__(self, kind, params):
+			self.kind = kind
+			self.minCutoff = self.beta = self.dCutoff = self.alpha = 0.0
+			for name, value in params.items():
+				setattr(self, name, float(value))
+			self._time = None
+			self._value = 0.0
+			self._velocity = 0.0
+			self._output = 0.0
+
+		@staticmethod
+		def create(spec):
+			if isinstance(spec, str):
+				kind, params = spec, {}
+			else:
+				kind, params = spec[0], (spec[1] if len(spec) > 1 else {})
+			defaults = PoseFilter.TYPES.get(kind)
+			if defaults is None:
+				raise ValueError("Unknown prediction filter '{}'".format(kind))
+			unknown = sorted(name for name in params if name not in defaults)
+			if unknown:
+				raise ValueError("Prediction filter '{}' has unknown parameters: {}".format(kind, ", ".join(unknown)))
+			values = dict(defaults)
+			values.update(params)
+			for name, value in values.items():
+				if isinstance(value, bool) or not isinstance(value, (int, float)):
+					raise ValueError("Prediction filter '{}' parameter '{}' must be a number, got {!r}".format(kind, name, value))
+			return PoseFilter(kind, values)
+
+		@staticmethod
+		def _smoothing(cutoff, dt):
+			return 1.0 / (1.0 + 1.0 / (2 * math.pi * cutoff * dt))
+
+		def update(self, value, now):
+			if self._time is None:
+				self._time = now
+				self._value = self._output = value
+				return value
+			dt = now - self._time
+			if dt <= 0:
+				return self._output
+			self._time = now
+			kind = self.kind
+			if kind == "one-euro":
+				velocity = (value - self._value) / dt
+				self._velocity += PoseFilter._smoothing(self.dCutoff, dt) * (velocity - self._velocity)
+				cutoff = self.minCutoff + self.beta * abs(self._velocity)
+				self._value += PoseFilter._smoothing(cutoff, dt) * (value - self._value)
+			elif kind == "alpha-beta":
+				estimate = self._value + self._velocity * dt
+				residual = value - estimate
+				self._value = estimate + self.alpha * residual
+				self._velocity += self.beta * residual / dt
+			else:
+				self._velocity = (value - self._value) / dt
+				self._value = value
+			self._output = self._value + self._velocity * self.lead
+			return self._output
+
+	class GameFlags(object):
+		"""View flags toggled by actions and read by the pose math every frame."""
+		VIEW = (
+			"isSideView", "isCustomView", "isGunViewAtCenter",
+			"isZoomIn", "isZoomOut",
+			"isHeadCenter", "isHeadHigh", "isHeadHighest", "isHeadDynamic",
+		)
+		__slots__ = VIEW + ("manual_yaw", "y_offset", "centering")
+
+		def __init__(self):
+			self.isSideView = False
+			self.isCustomView = False
+			self.isGunViewAtCenter = False
+			self.isZoomIn = False
+			self.isZoomOut = False
+			self.isHeadCenter = False
+			self.isHeadHigh = False
+			self.isHeadHighest = False
+			self.isHeadDynamic = False
+			self.manual_yaw = 0
+			self.y_offset = 0
+			self.centering = False
+
+	class TrackIRSample(object):
+		FIELDS = ("yaw", "pitch", "roll", "x", "y", "z")
+		__slots__ = FIELDS
+
+		def __init__(self):
+			self.yaw = 0
+			self.pitch = 0
+			self.roll = 0
+			self.x = 0
+			self.y = 0
+			self.z = 0
+
+	class Presets:
+		all = {
+			RESET_PRESET: {
+				"deltaX1": 0,
+				"deltaY1": 0,
+				"deltaZ1": 0,
+				"deltaX0": 0,
+				"deltaY0": 0,
+				"deltaZ2_1": 0,
+				"deltaZ2_2": 0,
+				"deltaX2_1": 0,
+				"deltaY2_1": 0,
+				"deltaY2_2": 0,
+				"deltaX2_4": 0,
+				"deltaY2_4": 0,
+				"deltaZ2_4": 0,
+				"deltaYLow": 0,
+	   			"deltaYHigh": 0,
+				"syaw": 0,
+				"spitch": 0
+			},
+			LAGG_PRESET: {
+				"deltaX0": 0.2500,
+				"deltaX1": 1.2804,
+				"deltaX2_1": 1.6000,
+				"deltaX2_4": 0.0,
+				"deltaY0": 0.1000,
+				"deltaY1": -0.1304,
+				"deltaY2_1": 1.1000,
+				"deltaY2_2": 1.6000,
+				"deltaY2_4": -4.4500,
+				"deltaYHigh": 1.4000,
+				"deltaYLow": -0.6500,
+				"deltaZ1": 6.5200,
+				"deltaZ2_1": -4.0,
+				"deltaZ2_2": 7.4900,
+				"deltaZ2_4": 8.4500,
+				"manual_yaw": -140.0,
+				"spitch": -1.0,
+				"syaw": -2.5000,
 			},
-			"mappers": {
-				"yaw": lambda x, state, delta: max(-state.autoCornerEnd, min(-state.autoCornerStart, x)),
-				"x": lambda x, state, delta: (
-					max(0.0004, x) if delta > 0 and x > -0.0004 else min(-0.0004, x) if delta < 0 and x < 0.0004 else x
-				),
-				"y": lambda x, state, delta: (
-					max(0.0004, x) if delta > 0 and x > -0.0004 else min(-0.0004, x) if delta < 0 and x < 0.0004 else x
-				),
-				"z": lambda x, state, delta: (
-					max(0.0004, x) if delta > 0 and x > -0.0004 else min(-0.0004, x) if delta < 0 and x < 0.0004 else x
-				),
+			YAKONE_PRESET: {
+				"deltaX0": 0.0400,
+				"deltaX1": 1.4504,
+				"deltaX2_1": 2.5500,
+				"deltaX2_4": -0.4500,
+				"deltaY0": -0.0100,
+				"deltaY1": 2.8100,
+				"deltaY2_1": 1.1000,
+				"deltaY2_2": 3.4500,
+				"deltaY2_4": -5.0400,
+				"deltaYHigh": 3.7000,
+				"deltaYLow": -1.0500,
+				"deltaZ1": 6.6000,
+				"deltaZ2_1": -4.2000,
+				"deltaZ2_2": 8.6900,
+				"deltaZ2_4": 6.4400,
+				"manual_yaw": -140.0000,
+				"spitch": -1.5000,
+				"syaw": -1.0000,
+			},
+			F_FOUR_PRESET: {
+				"deltaX1": 1.58,
+				"deltaY1": 0.94,
+				"deltaZ1": 5.02,
+				"deltaX0": 0,
+				"deltaY0": 0.22,
+				"deltaZ2_1": -5.85,
+				"deltaZ2_2": 8.75,
+				"deltaX2_1": 3.5,
+				"deltaY2_1": 0.75,
+				"deltaY2_2": 3.05,
+				"deltaX2_4": 0,
+				"deltaY2_4": -5.35,
+				"deltaZ2_4": 3.99,
+				"deltaYLow": -0.55,
+	   			"deltaYHigh": 2.55,
+				"syaw": -1.5,
+				"spitch": -1
+			},
+	  		YAKONE_B_PRESET: {
+				"deltaX1": 1.18,
+				"deltaY1": 2.19,
+				"deltaZ1": 1.04,
+				"deltaX0": 0.0,
+				"deltaY0": 0.1,
+				"deltaZ2_1": -4.99,
+				"deltaZ2_2": 5.74,
+				"deltaX2_1": 3.55,
+				"deltaY2_1": 0.55,
+				"deltaY2_2": 3.6,
+				"deltaX2_4": -0.3,
+				"deltaY2_4": -5.95,
+				"deltaZ2_4": 5.29,
+				"deltaYLow": -0.9,
+	   			"deltaYHigh": 2.3,
+				"syaw": -2.5,
+				"spitch": -2
+			},
+			LA_FIVE_PRESET: {
+				"deltaX0": 0.0,
+				"deltaX1": 1.1904,
+				"deltaX2_1": 3.2500,
+				"deltaX2_4": -0.2500,
+				"deltaY0": 0.0,
+				"deltaY1": -2.7200,
+				"deltaY2_1": 1.2500,
+				"deltaY2_2": 1.4500,
+				"deltaY2_4": -3.9500,
+				"deltaYHigh": 1.2500,
+				"deltaYLow": -0.7500,
+				"deltaZ1": 6.7804,
+				"deltaZ2_1": -4.3000,
+				"deltaZ2_2": 6.3000,
+				"deltaZ2_4": 0.3500,
+				"manual_yaw": -134.5000,
+				"spitch": -1.0000,
+				"syaw": -2.0000,
 			}
-   		},
-		{"name": "isZoomIn", 		"vars": {"z": "deltaZ2_1"}},
-		{"name": "isZoomOut", 		"vars": {"z": "deltaZ2_2"}},
-		{"name": "isCenter", 		"vars": {"x": "deltaX0", "y": "deltaY0"}},
-		{"name": "isManualShiftX", 	"vars": {"x": "deltaX2_1"}},
-		{"name": "isManualShiftY1", "vars": {"y": "deltaY2_1"}},
-		{"name": "isManualShiftY2", "vars": {"y": "deltaY2_2"}},
-		{"name": "isDynamicYLow", 	"vars": {"y": "deltaYLow"}},
-		{"name": "isDynamicYHigh", 	"vars": {"y": "deltaYHigh"}},
-		{"name": "isCustomView", 	"vars": {"yaw": "syaw", "pitch": "spitch", "x": "deltaX2_4", "y": "deltaY2_4", "z": "deltaZ2_4"}},
-	]
+		}
+
+		@staticmethod
+		def compile():
+			return dict((name, PresetRecord(name, values)) for name, values in Presets.all.items())
+
+	class PresetStore(object):
+		"""
+		Presets by name, optionally backed by PRESET_DIR.
+
+		Without a directory this is just the compiled Presets.all. With one, the
+		index ("index.json": {"presets": {name: file}}) is read at start, seeded
+		from Presets.all when missing, and each preset file is parsed the first
+		time the preset is selected. `poll` runs every frame but only every
+		`interval` seconds hands a scan to a pool worker: the worker writes back
+		the session layers (state.layers) that were tuned, then compares the
+		index and loaded files against the mtime/size it last saw and parses the
+		changed ones. The next `poll` swaps the parsed records in and drops their
+		layers, re-basing the active preset, so disk edits show up without
+		restarting FreePIE.
+		"""
+		INDEX = "index.json"
+
+		def __init__(self, directory=PRESET_DIR, interval=PRESET_POLL_INTERVAL, run=None):
+			self.directory = directory
+			self.interval = interval
+			self._run = run or Platform.queueWork
+			self._records = Presets.compile() if directory is None else {}
+			self._files = {}
+			self._saved = {}
+			self._stamps = {}
+			self._lock = threading.Lock()
+			self._ready = deque()
+			self._busy = False
+			self._nextPoll = None
+			if directory is not None:
+				self._files = self._readIndex()
+
+		def __contains__(self, name):
+			return name in self._records or name in self._files
+
+		def __getitem__(self, name):
+			record = self.get(name)
+			if record is None:
+				raise KeyError(name)
+			return record
+
+		def __setitem__(self, name, record):
+			self._records[name] = record
+
+		def names(self):
+			return sorted(set(self._records) | set(self._files))
+
+		def get(self, name, default=None):
+			record = self._records.get(name)
+			if record is None and name in self._files:
+				try:
+					record = self._load(name, self._files[name])
+				except Exception as e:
+					diagnostics.debug("Error loading preset '{}': {}".format(name, e))
+					return default
+				self._records[name] = record
+				self._saved[name] = record.items()
+			return default if record is None else record
+
+		def poll(self, now, state):
+			if self.directory is None:
+				return
+			while self._ready:
+				with self._lock:
+					kind, name, value = self._ready.popleft()
+				if kind == "index":
+					self._files = value
+				elif name in self._files:
+					self._records[name] = value
+					self._saved[name] = value.items()
+					if state.preset.name == name:
+						state.preset = value
+					else:
+						state.layers.pop(name, None)
+			if self._nextPoll is not None and now < self._nextPoll:
+				return
+			self._nextPoll = now + self.interval
+			if self._busy:
+				return
+			tuned = [
+				(self._files[name], preset.copy()) for name, preset in state.layers.items()
+				if name in self._files and preset.items() != self._saved.get(name)
+			]
+			for _, record in tuned:
+				self._saved[record.name] = record.items()
+			self._busy = True
+			loaded = [(name, self._files[name]) for name in self._files if name in self._records]
+			self._run(lambda: self._scan(tuned, loaded))
+
+		def _path(self, file_name):
+			return os.path.join(self.directory, file_name)
+
+		def _stamp(self, path):
+			stat = os.stat(path)
+			return (stat.st_mtime, stat.st_size)
+
+		def _changed(self, path):
+			try:
+				stamp = self._stamp(path)
+			except OSError:
+				return False
+			with self._lock:
+				return self._stamps.get(path) != stamp
+
+		def _load(self, name, file_name):
+			path = self._path(file_name)
+			with self._lock:
+				self._stamps[path] = self._stamp(path)
+			with open(path) as handle:
+				return PresetRecord(name, json.load(handle))
+
+		def _write(self, file_name, text):
+			path = self._path(file_name)
+			temp = path + ".tmp"
+			with open(temp, "w") as handle:
+				handle.write(text)
+			if os.path.exists(path):
+				os.remove(path)
+			os.rename(temp, path)
+			with self._lock:
+				self._stamps[path] = self._stamp(path)
+
+		def _readIndex(self):
+			path = self._path(PresetStore.INDEX)
+			if not os.path.exists(path):
+				if not os.path.isdir(self.directory):
+					os.makedirs(self.directory)
+				files = {}
+				for name, record in Presets.compile().items():
+					files[name] = name.replace(" ", "-") + ".json"
+					self._write(files[name], PresetExporter.format(record))
+				self._write(PresetStore.INDEX, json.dumps({"presets": files}, indent=4, sort_keys=True))
+			with self._lock:
+				self._stamps[path] = self._stamp(path)
+			with open(path) as handle:
+				return dict(json.load(handle)["presets"])
+
+		def _scan(self, tuned, loaded):
+			try:
+				for file_name, record in tuned:
+					self._write(file_name, PresetExporter.format(record))
+				if self._changed(self._path(PresetStore.INDEX)):
+					index = self._readIndex()
+					self._publish("index", None, index)
+				for name, file_name in loaded:
+					if self._changed(self._path(file_name)):
+						self._publish("preset", name, self._load(name, file_name))
+			except Exception as e:
+				diagnostics.debug("Error syncing presets: " + str(e))
+			finally:
+				self._busy = False
+
+		def _publish(self, kind, name, value):
+			with self._lock:
+				self._ready.append((kind, name, value))
+
+	class TuneModes: 
+		MODES = [
+			{
+		  		"name": "isAuto", 			
+				"vars": {
+					"yaw": "manual_yaw", 
+					"x": "deltaX1", 
+					"y": "deltaY1", 
+					"z": "deltaZ1"
+				},
+				"mappers": {
+					"yaw": lambda x, state, delta: max(-state.autoCornerEnd, min(-state.autoCornerStart, x)),
+					"x": lambda x, state, delta: (
+						max(0.0004, x) if delta > 0 and x > -0.0004 else min(-0.0004, x) if delta < 0 and x < 0.0004 else x
+					),
+					"y": lambda x, state, delta: (
+						max(0.0004, x) if delta > 0 and x > -0.0004 else min(-0.0004, x) if delta < 0 and x < 0.0004 else x
+					),
+					"z": lambda x, state, delta: (
+						max(0.0004, x) if delta > 0 and x > -0.0004 else min(-0.0004, x) if delta < 0 and x < 0.0004 else x
+					),
+				}
+	   		},
+			{"name": "isZoomIn", 		"vars": {"z": "deltaZ2_1"}},
+			{"name": "isZoomOut", 		"vars": {"z": "deltaZ2_2"}},
+			{"name": "isCenter", 		"vars": {"x": "deltaX0", "y": "deltaY0"}},
+			{"name": "isManualShiftX", 	"vars": {"x": "deltaX2_1"}},
+			{"name": "isManualShiftY1", "vars": {"y": "deltaY2_1"}},
+			{"name": "isManualShiftY2", "vars": {"y": "deltaY2_2"}},
+			{"name": "isDynamicYLow", 	"vars": {"y": "deltaYLow"}},
+			{"name": "isDynamicYHigh", 	"vars": {"y": "deltaYHigh"}},
+			{"name": "isCustomView", 	"vars": {"yaw": "syaw", "pitch": "spitch", "x": "deltaX2_4", "y": "deltaY2_4", "z": "deltaZ2_4"}},
+		]
 	
-	@staticmethod
-	def Mode(name): 
-		for mode in TuneModes.MODES:
-			if mode["name"] == name:
-				return mode
-		return None
-
-	@staticmethod
-	def Index(name): 
-		index = -1
-		for mode in TuneModes.MODES:
-			index = index + 1
-			if mode["name"] == name:
-				return index
-		return index
+		@staticmethod
+		def Mode(name): 
+			for mode in TuneModes.MODES:
+				if mode["name"] == name:
+					return mode
+			return None
+
+		@staticmethod
+		def Index(name): 
+			index = -1
+			for mode in TuneModes.MODES:
+				index = index + 1
+				if mode["name"] == name:
+					return index
+			return index
 	
-	@staticmethod
-	def NextMode(name):
-		index = TuneModes.Index(name)
-		next_index = (index + 1) % len(TuneModes.MODES)
-		return TuneModes.MODES[next_index]
-
-class AppState:
-	def __init__(self):
-		self.udpSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-		self.tuneMode = None
-		self.preset = {}
-		self.game = {}
-		self.trackir = {}
-		self.autoCornerEnd   = 140 #126.41
-		self.autoCornerStart = 30.0
-		self.autoCornerX_end = 140 #170
-		self.flaps_control = FlapsManagement(
-			open_keys=ingame_flaps_release,
-			close_keys=ingame_flaps_retract,
-			duration_open=3,
-			duration_close=4
+		@staticmethod
+		def NextMode(name):
+			index = TuneModes.Index(name)
+			next_index = (index + 1) % len(TuneModes.MODES)
+			return TuneModes.MODES[next_index]
+
+	class AppState(object):
+		__slots__ = (
+			"transport", "output", "tuneMode", "presets", "_preset", "game",
+			"trackir", "trackirBack", "trackirSample", "trackirTime", "input",
+			"layers", "autoCornerEnd", "autoCornerStart", "autoCornerX_end", "autoCurves", "prediction",
+			"poseDirty", "now", "timers", "centerPress", "centerSettle",
+			"callouts", "exporter", "telemetry", "flaps_control", "checkSix", "diagnostics", "profiler", "recorder", "overlay",
 		)
-		self.checkSix = CheckSixManagement()
-
-	def copy_preset_to_clipboard(self):
-		current_preset = self.preset
-		# Generate JSON-like string
-		preset_str = "{\n"
-		for k, v in sorted(current_preset.items()):
-			if isinstance(v, float):
-				preset_str += '    "{}": {:.4f},\n'.format(k, v)
+
+		def __init__(self):
+			self.transport = PoseSinks.create(OUTPUT_SINKS)
+			self.output = self.transport if OUTPUT_RATE is None else PoseScheduler(
+				self.transport, OUTPUT_RATE, sampleTime=lambda: self.trackirTime
+			)
+			self.trackirTime = None
+			self.tuneMode = None
+			self.presets = PresetStore()
+			self.layers = {}
+			self.game = GameFlags()
+			self.trackir = TrackIRSample()
+			self.trackirBack = TrackIRSample()
+			self.trackirSample = 0
+			self.input = InputSnapshot(Platform.keyState())
+			self.autoCornerEnd   = 140 #126.41
+			self.autoCornerStart = 30.0
+			self.autoCornerX_end = 140 #170
+			self.preset = PresetRecord(RESET_PRESET)
+			self.now = monotonic()
+			self.timers = TimerWheel(now=self.now)
+			self.centerPress = Timer(self._pressCenter)
+			self.centerSettle = Timer(self._settleCenter)
+			self.callouts = SpeechQueue(self.timers)
+			self.exporter = PresetExporter(self._exported)
+			self.telemetry = None
+			if TELEMETRY_PORT is not None:
+				try:
+					self.telemetry = Il2Telemetry()
+				except socket.error as e:
+					# e.g. Aom.App already listens on the port; flaps stay timed
+					diagnostics.debug("IL-2 telemetry disabled: " + str(e))
+			self.flaps_control = FlapsManagement(
+				open_keys=ingame_flaps_release,
+				close_keys=ingame_flaps_retract,
+				callouts=self.callouts,
+				timers=self.timers,
+				duration_open=3,
+				duration_close=4,
+				telemetry=self.telemetry
+			)
+			self.checkSix = CheckSixManagement(self.timers, self.callouts, self.flaps_control)
+			self.diagnostics = Diagnostics.standard(self)
+			self.profiler = FrameProfiler()
+			self.recorder = None if RECORD_PATH is None else SessionRecorder(RECORD_PATH)
+			self.overlay = None
+			if OVERLAY_MAPPING is not None:
+				try:
+					self.overlay = OverlayFeed(OVERLAY_MAPPING)
+				except (EnvironmentError, TypeError) as e:
+					# no named shared memory on this platform; the HUD just stays empty
+					diagnostics.debug("Overlay feed disabled: " + str(e))
+
+		@property
+		def preset(self):
+			return self._preset
+
+		@preset.setter
+		def preset(self, preset):
+			# a plain record becomes the base of a new session layer; tuning only writes the layer.
+			# Known by identity, not class: only the layer kept under its name belongs to this session.
+			if self.layers.get(preset.name) is not preset:
+				preset = self.layers[preset.name] = LayeredPreset(preset)
+			self._preset = preset
+			self.poseDirty = True
+			# curve tables depend only on the curve specs, so each layer compiles them once
+			if preset.tables is None:
+				preset.tables = tuple(
+					AutoCornerCurve(preset.curves.get(axis, "linear"), self.autoCornerStart, self.autoCornerEnd)
+					for axis in PresetRecord.CURVE_AXES
+				)
+			self.autoCurves = preset.tables
+			# fresh filter state per switch, so a new preset never predicts from the old one's history
+			self.prediction = tuple(
+				(axis, PoseFilter.create(preset.prediction[axis]))
+				for axis in TrackIRSample.FIELDS if axis in preset.prediction
+			)
+
+		def _exported(self, preset, text, error):
+			if error is None:
+				self.callouts.say("preset copied")
 			else:
-				preset_str += '    "{}": {},\n'.format(k, float(v))
-		preset_str += "}"
-		
-		# Copy to clipboard
-		set_clipboard_text(preset_str)
+				diagnostics.debug("Error exporting preset: " + str(error))
+				self.callouts.say("preset export failed")
  
-	def update_y_axis_state(self, center, shift_1, shift_2, shift_dynamic):
-		pass
-		# """Update Y-axis state flags in the context."""
-		self.game["isHeadCenter"] = center
-		self.game["isHeadHigh"] = shift_1
-		self.game["isHeadHighest"] = shift_2
-		self.game["isHeadDynamic"] = shift_dynamic
-
-class IAction(object):
-	__metaclass__ = ABCMeta
-
-	@abstractmethod
-	def handle(self):
-		pass
-
-class ChangePresetAction(IAction):
-	def __init__(self, payload = "reset"):
-		self._payload = payload
+		def select(self, name):
+			"""Make `name` the active preset, reusing its session layer (and tuning) if it has one."""
+			layer = self.layers.get(name)
+			self.preset = layer if layer is not None else (self.presets.get(name) or PresetRecord(name))
+
+		def recenter(self):
+			"""Start the timed zero-pose / GlobalCenterKey recenter; _sync sends the zeros while it runs."""
+			self.game.centering = True
+			self.timers.schedule(self.centerPress, self.now + CENTER_PRESS_DELAY)
+			self.timers.schedule(self.centerSettle, self.now + CENTER_SETTLE_TIME)
+
+		def _pressCenter(self, now):
+			keyboard.setPressed(GlobalCenterKey)
+
+		def _settleCenter(self, now):
+			self.game.centering = False
+
+		def update_y_axis_state(self, center, shift_1, shift_2, shift_dynamic):
+			pass
+			# """Update Y-axis state flags in the context."""
+			self.game.isHeadCenter = center
+			self.game.isHeadHigh = shift_1
+			self.game.isHeadHighest = shift_2
+			self.game.isHeadDynamic = shift_dynamic
+
+	class IAction(object):
+		__metaclass__ = ABCMeta
+
+		@abstractmethod
+		def handle(self):
+			pass
+
+	class ChangePresetAction(IAction):
+		def __init__(self, payload = "reset"):
+			self._payload = payload
+			self._announcement = str(payload) + " preset loaded"
 	
-	def handle(self, state):
-		state.preset = Presets.all.get(self._payload, {})
-		speech.say(str(self._payload) + " preset loaded")
-
-class SwitchMode(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		state.tuneMode = TuneMode() if state.tuneMode == None else None
-		speech.say("TuneMode: Please select tune mode") if state.tuneMode != None else speech.say("Game mode")
-
-class SwitchTuneMode(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		mode = state.tuneMode
-		if (mode != None):
-			if (mode.name == "undefined"):
-				state.tuneMode = TuneMode(TuneModes.MODES[0]["name"])
-			else:
-				state.tuneMode = TuneMode(TuneModes.NextMode(state.tuneMode.name)["name"])
-				state.game["centerPendingFrameTimer"] = 5
-			speech.say(state.tuneMode.name)
-
-class Tuner(IAction):
-	def __init__(self, subject, delta):
-		self._subject = subject
-		self._delta = delta
+		def handle(self, state):
+			state.select(self._payload)
+			state.callouts.say(self._announcement)
+
+	class SwitchMode(IAction):
+		def __init__(self):
+			pass
+
+		def isActive(self, state):
+			return state.tuneMode != None
+
+		def handle(self, state):
+			state.tuneMode = TuneMode() if state.tuneMode == None else None
+			state.callouts.say("TuneMode: Please select tune mode" if state.tuneMode != None else "Game mode", SpeechQueue.MODE)
+
+	class SwitchTuneMode(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			mode = state.tuneMode
+			if (mode != None):
+				if (mode.name == "undefined"):
+					state.tuneMode = TuneMode(TuneModes.MODES[0]["name"])
+				else:
+					state.tuneMode = TuneMode(TuneModes.NextMode(state.tuneMode.name)["name"])
+					state.recenter()
+				state.callouts.say(state.tuneMode.name, SpeechQueue.MODE)
+
+	class Tuner(IAction):
+		def __init__(self, subject, direction):
+			self._subject = subject
+			self._direction = direction
 	
-	def handle(self, state):
-		mode = state.tuneMode
-		if (mode != None and mode.name != "undefined"):
-			state.tuneMode.modify(state, self._subject, self._delta)		
-
-class SwitchSideView(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		isSideView = state.game.get("isSideView", False)
-		state.game["isSideView"] = not isSideView
-
-class CenterGlobalView(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		state.update_y_axis_state(center=False, shift_1=False, shift_2=False, shift_dynamic = False)
-		state.game["isZoomIn"] = False
-		state.game["isZoomOut"] = False
-		state.game["isSideView"] = False
-		state.game["centerPendingFrameTimer"] = 5
+		def step(self, mode_name):
+			if self._subject == "yaw" or self._subject == "pitch":
+				return 0.5
+			return 0.01 if mode_name == "isAuto" or mode_name == "isCenter" else 0.05
+
+		def handle(self, state):
+			mode = state.tuneMode
+			if (mode != None and mode.name != "undefined"):
+				state.tuneMode.modify(state, self._subject, self._direction * self.step(mode.name))
+
+	class UndoTuning(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			if state.tuneMode != None:
+				state.callouts.say("undo" if state.preset.undo() else "nothing to undo")
+
+	class RevertTuning(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			"""Back to the base preset for every field the current tune mode adjusts."""
+			if state.tuneMode != None:
+				reverted = [field for field in state.tuneMode.vars() if state.preset.revert(field)]
+				state.callouts.say("reverted" if reverted else "nothing to revert")
+
+	class SwitchSideView(IAction):
+		def __init__(self):
+			pass
+
+		def isActive(self, state):
+			return state.game.isSideView
+
+		def handle(self, state):
+			isSideView = state.game.isSideView
+			state.game.isSideView = not isSideView
+
+	class CenterGlobalView(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			state.update_y_axis_state(center=False, shift_1=False, shift_2=False, shift_dynamic = False)
+			state.game.isZoomIn = False
+			state.game.isZoomOut = False
+			state.game.isSideView = False
+			state.recenter()
   
-class HeadYCenter(IAction):
-	def __init__(self):
-		pass
+	class HeadYCenter(IAction):
+		def __init__(self):
+			pass
 
-	def handle(self, state):
-		state.update_y_axis_state(center=True, shift_1=False, shift_2=False, shift_dynamic = False)
+		def handle(self, state):
+			state.update_y_axis_state(center=True, shift_1=False, shift_2=False, shift_dynamic = False)
 
-class HeadYHigh(IAction):
-	def __init__(self):
-		pass
+	class HeadYHigh(IAction):
+		def __init__(self):
+			pass
 
-	def handle(self, state):
-		state.update_y_axis_state(center=False, shift_1=True, shift_2=False, shift_dynamic = False)
+		def handle(self, state):
+			state.update_y_axis_state(center=False, shift_1=True, shift_2=False, shift_dynamic = False)
 
-class HeadYHighest(IAction):
-	def __init__(self):
-		pass
+	class HeadYHighest(IAction):
+		def __init__(self):
+			pass
 
-	def handle(self, state):
-		state.game["manual_yaw"] = 0
-		state.update_y_axis_state(center=False, shift_1=False, shift_2=True, shift_dynamic = False)
+		def handle(self, state):
+			state.game.manual_yaw = 0
+			state.update_y_axis_state(center=False, shift_1=False, shift_2=True, shift_dynamic = False)
   
-class HeadYDynamic(IAction):
-	def __init__(self):
-		pass
+	class HeadYDynamic(IAction):
+		def __init__(self):
+			pass
 
-	def handle(self, state):
-		state.update_y_axis_state(center=False, shift_1=False, shift_2=False, shift_dynamic = True)
+		def handle(self, state):
+			state.update_y_axis_state(center=False, shift_1=False, shift_2=False, shift_dynamic = True)
 
-class ZoomIn(IAction):
-	def __init__(self):
-		pass
+	class ZoomIn(IAction):
+		def __init__(self):
+			pass
 
-	def handle(self, state):
-		state.game["isZoomIn"] = True
-		state.game["isZoomOut"] = False
+		def handle(self, state):
+			state.game.isZoomIn = True
+			state.game.isZoomOut = False
 
-class ZoomOut(IAction):
-	def __init__(self):
-		pass
+	class ZoomOut(IAction):
+		def __init__(self):
+			pass
 
-	def handle(self, state):
-		state.game["isZoomIn"] = False
-		state.game["isZoomOut"] = True
+		def handle(self, state):
+			state.game.isZoomIn = False
+			state.game.isZoomOut = True
 
-class ZoomMiddle(IAction):
-	def __init__(self):
-		pass
+	class ZoomMiddle(IAction):
+		def __init__(self):
+			pass
 
-	def handle(self, state):
-		state.game["isZoomIn"] = False
-		state.game["isZoomOut"] = False
+		def handle(self, state):
+			state.game.isZoomIn = False
+			state.game.isZoomOut = False
   
-class FlapsOpen(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		state.flaps_control.open_flap(current_time = time.time())
-
-class FlapsClose(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		state.flaps_control.close_flap(current_time = time.time())
-
-class ToggleCheckSixNotification(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		state.checkSix.switchCheckSix()
-		speech.say("check six activated") if state.checkSix.isCheckSixActivated else speech.say("check six disabled")
-
-class SwitchCustomView(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		isCustomView = state.game.get("isCustomView", False)
-		state.game["isCustomView"] = not isCustomView
-
-class GunView(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		isGunViewAtCenter = state.game.get("isGunViewAtCenter", False)
-		state.game["isGunViewAtCenter"] = not isGunViewAtCenter
-
-class CopyToClipboard(IAction):
-	def __init__(self):
-		pass
-
-	def handle(self, state):
-		speech.say("preset copied")
-		state.copy_preset_to_clipboard()
-
-class FlapsManagement:
-	def __init__(self, open_keys, close_keys, duration_open=3, duration_close=4):
-		"""
-		Initialize the flaps control logic.
-
-		Args:
-			open_keys (list): Keys for opening the flaps.
-			close_keys (list): Keys for closing the flaps.
-			duration_open (int): Duration for the flaps to stay open.
-			duration_close (int): Duration for the flaps to stay closed.
-		"""
-		self.current_time = None
-		self.open_keys = open_keys
-		self.close_keys = close_keys
-		self.duration_open = duration_open
-		self.duration_close = duration_close
-		self.flap_flags = {
-			"flap_open_start_time": None,
-			"flap_close_start_time": None,
-			"is_flap_opening": False,
-			"is_flap_closing": False,
-			"flap_opened": False,
-		}
-		self.last_speech_time = time.time()
-		self.isFlapAction = False
+	class FlapsOpen(IAction):
+		def __init__(self):
+			pass
 
-	def _toggle_flap_state(self, is_opening, current_time):
-		"""Toggle flap state between opening and closing."""
-		self.flap_flags["flap_opened"] = is_opening
-		self.flap_flags["is_flap_opening"] = is_opening
-		self.flap_flags["is_flap_closing"] = not is_opening
-		self.flap_flags["flap_open_start_time"] = current_time if is_opening else None
-		self.flap_flags["flap_close_start_time"] = current_time if not is_opening else None
+		def handle(self, state):
+			state.flaps_control.open_flap(current_time = state.now)
 
-	def _handle_flap_action(self, action, current_time):
-		"""
-		Handle flap action (opening or closing).
-		
-		Args:
-			action (str): Either "is_flap_opening" or "is_flap_closing".
-			current_time (float): Current time in seconds.
-		"""
-		start_time_key = "flap_open_start_time" if action == "is_flap_opening" else "flap_close_start_time"
-		duration = self.duration_open if action == "is_flap_opening" else self.duration_close
-		keys = self.open_keys if action == "is_flap_opening" else self.close_keys
-		if self.flap_flags[start_time_key] is not None and (current_time - self.flap_flags[start_time_key]) < duration:
-			if self.isFlapAction == False:
-				self.isFlapAction = True
-				for key in keys:
-					keyboard.setKeyDown(key)
-		elif self.flap_flags[start_time_key] is not None and (current_time - self.flap_flags[start_time_key]) > duration:
-			if self.isFlapAction == True:
-				self.isFlapAction = False
-				for key in keys:
-					keyboard.setKeyUp(key)
-				self.flap_flags[action] = False
-				self.flap_flags[start_time_key] = None
+	class FlapsClose(IAction):
+		def __init__(self):
+			pass
 
-	def isFlapOpend(self):
-		return self.flap_flags["flap_opened"]
+		def handle(self, state):
+			state.flaps_control.close_flap(current_time = state.now)
+
+	class ToggleCheckSixNotification(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			state.checkSix.switchCheckSix()
+			state.callouts.say("check six activated" if state.checkSix.isCheckSixActivated else "check six disabled")
+
+	class DumpDiagnostics(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			state.diagnostics.dump()
+
+	class ExportProfile(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			if PROFILER_EXPORT_PATH is None:
+				for line in state.profiler.csv().splitlines():
+					diagnostics.debug(line)
+			else:
+				state.profiler.export(PROFILER_EXPORT_PATH)
+				state.callouts.say("profile exported")
+
+	class SwitchCustomView(IAction):
+		def __init__(self):
+			pass
+
+		def isActive(self, state):
+			return state.game.isCustomView
+
+		def handle(self, state):
+			isCustomView = state.game.isCustomView
+			state.game.isCustomView = not isCustomView
+
+	class GunView(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			isGunViewAtCenter = state.game.isGunViewAtCenter
+			state.game.isGunViewAtCenter = not isGunViewAtCenter
+
+	class CopyToClipboard(IAction):
+		def __init__(self):
+			pass
+
+		def handle(self, state):
+			state.exporter.submit(state.preset)
+
+	class FlapsManagement:
+		def __init__(self, open_keys, close_keys, callouts, timers, duration_open=3, duration_close=4, telemetry=None):
+			"""
+			Initialize the flaps control logic.
+
+			Args:
+				open_keys (list): Keys for opening the flaps.
+				close_keys (list): Keys for closing the flaps.
+				callouts (SpeechQueue): Queue for the repeated "Flaps" callout.
+				timers (TimerWheel): Frame timers for the key holds and the callout.
+				duration_open (int): Duration for the flaps to stay open.
+				duration_close (int): Duration for the flaps to stay closed.
+				telemetry (Il2Telemetry): Measured flap position; keys are released once
+					it reaches the target, and the durations become an upper bound.
+			"""
+			self.open_keys = open_keys
+			self.close_keys = close_keys
+			self.callouts = callouts
+			self.timers = timers
+			self.duration_open = duration_open
+			self.duration_close = duration_close
+			self.telemetry = telemetry
+			self.flap_flags = {
+				"flap_open_start_time": None,
+				"flap_close_start_time": None,
+				"is_flap_opening": False,
+				"is_flap_closing": False,
+				"flap_opened": False,
+			}
+			self.held = None
+			self.release = Timer(self._release)
+			self.reminder = Timer(self._remind)
+
+		def _toggle_flap_state(self, is_opening, current_time):
+			"""Toggle flap state between opening and closing."""
+			self.flap_flags["flap_opened"] = is_opening
+			self.flap_flags["is_flap_opening"] = is_opening
+			self.flap_flags["is_flap_closing"] = not is_opening
+			self.flap_flags["flap_open_start_time"] = current_time if is_opening else None
+			self.flap_flags["flap_close_start_time"] = current_time if not is_opening else None
+
+		def _move(self, is_opening, current_time):
+			"""Hold the keys for the new direction until the release timer (or telemetry) ends the move."""
+			self._releaseKeys()
+			self._toggle_flap_state(is_opening, current_time)
+			self.held = self.open_keys if is_opening else self.close_keys
+			for key in self.held:
+				keyboard.setKeyDown(key)
+			self.timers.schedule(self.release, current_time + (self.duration_open if is_opening else self.duration_close))
+			self._watch()
+
+		def _releaseKeys(self):
+			if self.held is not None:
+				for key in self.held:
+					keyboard.setKeyUp(key)
+				self.held = None
+
+		def _release(self, current_time):
+			self.timers.cancel(self.release)
+			self._releaseKeys()
+			self.flap_flags["is_flap_opening"] = False
+			self.flap_flags["is_flap_closing"] = False
+			self.flap_flags["flap_open_start_time"] = None
+			self.flap_flags["flap_close_start_time"] = None
+
+		def _reached(self, current_time):
+			"""Whether fresh telemetry shows the flaps at the target of the current move."""
+			telemetry = self.telemetry
+			if telemetry is None or not telemetry.fresh(current_time):
+				return False
+			if self.flap_flags["is_flap_opening"]:
+				return telemetry.flaps >= FLAPS_OPEN_TARGET
+			return telemetry.flaps <= FLAPS_CLOSED_TARGET
+
+		def _watch(self):
+			# the "Flaps" reminder runs while the flaps are down, starting with the next frame
+			if self.flap_flags["flap_opened"] and not self.reminder.active:
+				self.timers.after(self.reminder, 0)
+
+		def _remind(self, current_time):
+			if self.flap_flags["flap_opened"]:
+				self.callouts.say("Flaps", SpeechQueue.REPEAT, 1.0)
+				self.timers.schedule(self.reminder, current_time + 1.0)
+
+		def isFlapOpend(self):
+			return self.flap_flags["flap_opened"]
  
-	def open_flap(self, current_time):
-		self.isFlapAction = False
-		if self.flap_flags["is_flap_closing"]:
-			for key in self.close_keys:
-				keyboard.setKeyUp(key)
-		if self.flap_flags["is_flap_closing"] or not self.flap_flags["flap_opened"]:
-			self._toggle_flap_state(True, current_time)
+		def open_flap(self, current_time):
+			if self.flap_flags["is_flap_closing"] or not self.flap_flags["flap_opened"]:
+				self._move(True, current_time)
 	
-	def close_flap(self, current_time):
-		self.isOpening = False
-		if self.flap_flags["is_flap_opening"]:
-			for key in self.open_keys:
-				keyboard.setKeyUp(key)
-		self._toggle_flap_state(False, current_time)
+		def close_flap(self, current_time):
+			self._move(False, current_time)
 	
-	def update(self, current_time):
-		self._handle_flap_action("is_flap_opening", current_time)
-		self._handle_flap_action("is_flap_closing", current_time)
-		
-		# Voice feedback for flaps
-		if (current_time - self.last_speech_time) >= 1.0 and self.flap_flags["flap_opened"]:
-			speech.say("Flaps")
-			self.last_speech_time = current_time
-
-class CheckSixManagement: 
-	def __init__(self):
-		self.isCheckSixActivated = False
-		self.six_lastSpeechTime = time.time()
-		self.last_yaw_six_time  = time.time()
-  
-	def switchCheckSix(self):
-		self.isCheckSixActivated = not self.isCheckSixActivated
-		self.last_yaw_six_time  = time.time()
+		def update(self, current_time):
+			"""Follow the measured flap position; the timed parts run on the timer wheel."""
+			telemetry = self.telemetry
+			if telemetry is None or not telemetry.fresh(current_time):
+				return
+			if self.held is not None:
+				if self._reached(current_time):
+					self._release(current_time)
+			else:
+				# flaps moved from the cockpit (or a timed move over/undershot) still count
+				self.flap_flags["flap_opened"] = telemetry.flaps > FLAPS_CLOSED_TARGET
+				self._watch()
+
+	class CheckSixManagement: 
+		"""
+		"six" callout when check six is on and the pilot has not looked back
+		(|yaw| > 140) for 6 seconds, repeated every 2 seconds and held back
+		while the flaps are down. `update` only stamps the last look back; the
+		deadline is a timer that re-arms itself from that stamp when it fires.
+		"""
+		LOOK_BACK_YAW = 140
+		DEADLINE = 6.0
+		REPEAT = 2.0
+
+		def __init__(self, timers, callouts, flaps):
+			self.timers = timers
+			self.callouts = callouts
+			self.flaps = flaps
+			self.isCheckSixActivated = False
+			self.last_yaw_six_time = None
+			self.deadline = Timer(self._due)
+
+		def switchCheckSix(self):
+			self.isCheckSixActivated = not self.isCheckSixActivated
+			self.last_yaw_six_time = self.timers.now
+			if self.isCheckSixActivated:
+				self.timers.schedule(self.deadline, self.last_yaw_six_time + CheckSixManagement.DEADLINE)
+			else:
+				self.timers.cancel(self.deadline)
 	  
-	def update(self, state):
-		if abs(state.trackir.get("yaw", 0)) > 140:
-			self.last_yaw_six_time = time.time()
-		if (
-			(time.time() - self.six_lastSpeechTime) >= 2.0 and 
-			not state.flaps_control.isFlapOpend() and 
-			time.time() - self.last_yaw_six_time > 6
-			and self.isCheckSixActivated
-		):
-			speech.say("six")
-			self.six_lastSpeechTime = time.time()
-
-class EventStream:
-	@staticmethod
-	def actions(state):
-		if state.game.get("centerPendingFrameTimer", None) is not None:
-			return
-  
-		for pad_key, preset_name in presets_map.items():
-			if keyboard.getKeyDown(Key.UpArrow) and keyboard.getPressed(pad_key):
-				yield ChangePresetAction(preset_name)
-	
-		if keyboard.getKeyDown(Key.UpArrow) and keyboard.getPressed(Key.NumberPadPeriod):
-				yield CopyToClipboard()
-   
-		if isScrollLock() and state.tuneMode == None:
-			yield SwitchMode()
-
-		if not isScrollLock() and state.tuneMode != None:
-			yield SwitchMode()
-   
-		if keyboard.getPressed(Key.Insert) and keyboard.getKeyDown(Key.RightControl) and state.tuneMode != None:
-			yield SwitchTuneMode()
-
-		if state.tuneMode:
-			mode = state.tuneMode.name
-			xyz = 0.01 if mode == "isAuto" else 0.05
-			xyz = 0.01 if mode == "isCenter" else xyz
-			tuner_map = {
-				Key.Delete:      ("yaw",   -1, 0.5),
-				Key.End:         ("yaw",   +1, 0.5),
-				Key.Insert:      ("pitch", -1, 0.5),
-				Key.Home:        ("pitch", +1, 0.5),
-				Key.LeftArrow:   ("x",     +1, xyz),
-				Key.RightArrow:  ("x",     -1, xyz),
-				Key.UpArrow:     ("y",     +1, xyz),
-				Key.DownArrow:   ("y",     -1, xyz),
-				Key.PageUp:      ("z",     +1, xyz),
-				Key.PageDown:    ("z",     -1, xyz),
+		def update(self, state):
+			if abs(state.trackir.yaw) > CheckSixManagement.LOOK_BACK_YAW:
+				self.last_yaw_six_time = state.now
+
+		def _due(self, now):
+			if not self.isCheckSixActivated:
+				return
+			due = self.last_yaw_six_time + CheckSixManagement.DEADLINE
+			if now < due:
+				self.timers.schedule(self.deadline, due)
+			elif self.flaps.isFlapOpend():
+				self.timers.schedule(self.deadline, now + 1.0)
+			else:
+				self.callouts.say("six", SpeechQueue.REPEAT, CheckSixManagement.REPEAT)
+				self.timers.schedule(self.deadline, now + CheckSixManagement.REPEAT)
+
+	class Binding(object):
+		__slots__ = ("actionId", "trigger", "mode", "action", "slot", "modifiers")
+
+	class BindingTable(object):
+		"""Bindings compiled once into a flat list that is walked in table order every frame."""
+		MODES = ("press", "hold", "sync")
+
+		def __init__(self, bindings, snapshot):
+			self.bindings = bindings
+			self.input = snapshot
+
+		@staticmethod
+		def actions():
+			actions = {
+				"preset.reset": ChangePresetAction(RESET_PRESET),
+				"preset.lagg": ChangePresetAction(LAGG_PRESET),
+				"preset.yakodin": ChangePresetAction(YAKONE_PRESET),
+				"preset.f4": ChangePresetAction(F_FOUR_PRESET),
+				"preset.yakodin-and-b": ChangePresetAction(YAKONE_B_PRESET),
+				"preset.la-five": ChangePresetAction(LA_FIVE_PRESET),
+				"preset.copy": CopyToClipboard(),
+				"tune.toggle": SwitchMode(),
+				"tune.cycle": SwitchTuneMode(),
+				"tune.undo": UndoTuning(),
+				"tune.revert": RevertTuning(),
+				"view.side-hold": SwitchSideView(),
+				"view.center-all": CenterGlobalView(),
+				"view.gun-toggle": GunView(),
+				"view.head-center": HeadYCenter(),
+				"view.custom-hold": SwitchCustomView(),
+				"head.high": HeadYHigh(),
+				"head.highest": HeadYHighest(),
+				"head.dynamic": HeadYDynamic(),
+				"zoom.out": ZoomOut(),
+				"zoom.in": ZoomIn(),
+				"zoom.center": ZoomMiddle(),
+				"helper.flaps-open": FlapsOpen(),
+				"helper.flaps-close": FlapsClose(),
+				"helper.check-six": ToggleCheckSixNotification(),
+				"diagnostics.dump": DumpDiagnostics(),
+				"profiler.export": ExportProfile(),
 			}
+			for subject in ("x", "y", "z", "yaw", "pitch"):
+				actions["tune.adjust-" + subject + "-positive"] = Tuner(subject, +1)
+				actions["tune.adjust-" + subject + "-negative"] = Tuner(subject, -1)
+			return actions
+
+		@staticmethod
+		def load(snapshot, path=None):
+			if path is None:
+				return BindingTable.compile(DEFAULT_BINDINGS, snapshot)
+			with open(path) as handle:
+				return BindingTable.compile(json.load(handle)["bindings"], snapshot)
+
+		@staticmethod
+		def compile(entries, snapshot):
+			actions = BindingTable.actions()
+			bindings = []
+			seen = {}
+			for entry in entries:
+				action_id, trigger, mode = entry
+				if action_id not in actions:
+					if not action_id.startswith("preset."):
+						raise ValueError("Unknown binding action '{}'".format(action_id))
+					actions[action_id] = ChangePresetAction(action_id[len("preset."):])
+				if mode not in BindingTable.MODES:
+					raise ValueError("Binding '{}' has unknown mode '{}'".format(action_id, mode))
+				if mode == "sync" and not hasattr(actions[action_id], "isActive"):
+					raise ValueError("Binding '{}' cannot sync: the action tracks no state".format(action_id))
+				inputs = [token.strip() for token in trigger.split("+")]
+				chord = (inputs[-1], frozenset(inputs[:-1]))
+				if chord in seen:
+					raise ValueError("Trigger '{}' is bound to both '{}' and '{}'".format(trigger, seen[chord], action_id))
+				seen[chord] = action_id
+
+				binding = Binding()
+				binding.actionId = action_id
+				binding.trigger = trigger
+				binding.mode = mode
+				binding.action = actions[action_id]
+				binding.slot = BindingTable._slot(snapshot, inputs[-1], mode)
+				binding.modifiers = tuple(snapshot.input(token, "down") for token in inputs[:-1])
+				bindings.append(binding)
+			return BindingTable(bindings, snapshot)
+
+		@staticmethod
+		def _slot(snapshot, token, mode):
+			if mode == "press":
+				return snapshot.input(token, "pressed")
+			if mode == "sync" and token in LOCK_KEYS:
+				return snapshot.input(token, "toggled")
+			return snapshot.input(token, "down")
+
+		def dispatch(self, state):
+			if state.game.centering:
+				return
+			values = self.input.values
+			for binding in self.bindings:
+				if binding.mode == "sync":
+					if values[binding.slot] == binding.action.isActive(state):
+						continue
+				elif not values[binding.slot]:
+					continue
+				held = True
+				for slot in binding.modifiers:
+					if not values[slot]:
+						held = False
+						break
+				if held:
+					binding.action.handle(state)
+					# actions are what move the view flags and tune the preset
+					state.poseDirty = True
 	
-			for key, (axis, direction, delta) in tuner_map.items():
-				if keyboard.getKeyDown(key) and keyboard.getKeyDown(Key.RightShift):
-					yield Tuner(axis, direction * delta)
-  
-		if isSideView != state.game.get("isSideView", False):
-			yield SwitchSideView()
-   
-		if centerAll:
-			yield CenterGlobalView()
-		if centerGunView:
-			yield GunView()
-		if centerVGunView and btn_modifier:
-			yield HeadYCenter()
-		if head_y_high:
-			yield HeadYHigh()
-		if head_y_highest:
-			yield HeadYHighest()
-		if head_y_dynamic and btn_modifier:
-			yield HeadYDynamic()
-		if zoomOut and btn_modifier:
-			yield ZoomOut()
-		if zoomIn and btn_modifier:
-			yield ZoomIn()
-		if zoomCenter:
-			yield ZoomMiddle()
-		if openFlaps:
-			yield FlapsOpen()
-		if closeFlaps:
-			yield FlapsClose()
-		if sixNotifier and btn_modifier:
-			yield ToggleCheckSixNotification()
-		if isCustomView != state.game.get("isCustomView", False):
-			yield SwitchCustomView()
-	
-class Diagnostics:
-	@staticmethod
-	def watch(state): 
-		diagnostics.watch(state.preset["deltaX1"])
-		diagnostics.watch(state.preset["deltaY1"])
-		diagnostics.watch(state.preset["deltaZ1"])	
+	class Diagnostics(object):
+		"""
+		Registered channels sampled into a fixed-size ring buffer.
+
+		`update` reads every channel once per `sampleInterval` seconds into the
+		next preallocated row and hands the latest row to FreePIE's watch window,
+		each value under its channel name, once per `publishInterval`; other
+		frames cost one clock comparison.
+		`history` and `dump` return the buffered samples, oldest first.
+		"""
+		def __init__(self, sampleInterval=DIAGNOSTICS_SAMPLE_INTERVAL, publishInterval=DIAGNOSTICS_PUBLISH_INTERVAL, size=DIAGNOSTICS_HISTORY):
+			self.sampleInterval = sampleInterval
+			self.publishInterval = publishInterval
+			self.size = size
+			self.names = []
+			self._reads = []
+			self._times = [None] * size
+			self._rows = None
+			self._head = 0
+			self._count = 0
+			self._nextSample = None
+			self._nextPublish = None
+
+		def channel(self, name, read):
+			"""Register `read()` as channel `name`; channels are fixed by the first sample."""
+			if self._rows is not None:
+				raise ValueError("Diagnostics channel '{}' registered after sampling started".format(name))
+			if name in self.names:
+				raise ValueError("Duplicate diagnostics channel '{}'".format(name))
+			self.names.append(name)
+			self._reads.append(read)
+
+		@staticmethod
+		def _next(due, now, interval):
+			# keep the phase unless a stall put us more than one interval behind
+			return now + interval if due is None or now - due >= interval else due + interval
+
+		def update(self, now):
+			if self._nextSample is not None and now < self._nextSample:
+				return
+			self._nextSample = Diagnostics._next(self._nextSample, now, self.sampleInterval)
+			if self._rows is None:
+				self._rows = [[0] * len(self._reads) for _ in range(self.size)]
+			row = self._rows[self._head]
+			column = 0
+			for read in self._reads:
+				row[column] = read()
+				column += 1
+			self._times[self._head] = now
+			self._head = (self._head + 1) % self.size
+			self._count = min(self._count + 1, self.size)
+			if self._nextPublish is None or now >= self._nextPublish:
+				self._nextPublish = Diagnostics._next(self._nextPublish, now, self.publishInterval)
+				# FreePIE labels a watch call written in the script with the text of its argument,
+				# which would give every channel the same label; called through the bound method,
+				# each value gets its channel name as the label (the indexer) instead
+				watch = diagnostics.watch
+				column = 0
+				for name in self.names:
+					watch(row[column], name)
+					column += 1
+
+		def history(self):
+			"""[(time, {channel: value}), ...] for the buffered samples, oldest first."""
+			start = (self._head - self._count) % self.size
+			samples = []
+			for offset in range(self._count):
+				index = (start + offset) % self.size
+				samples.append((self._times[index], dict(zip(self.names, self._rows[index]))))
+			return samples
+
+		def dump(self):
+			"""Write the buffered history to the FreePIE console as CSV lines."""
+			diagnostics.debug(",".join(["time"] + self.names))
+			for when, values in self.history():
+				diagnostics.debug(",".join(["{:.3f}".format(when)] + [str(values[name]) for name in self.names]))
+
+		@staticmethod
+		def standard(state):
+			"""Preset fields, TrackIR axes and output/speech counters."""
+			channels = Diagnostics()
+			for field in PresetRecord.FIELDS:
+				channels.channel("preset." + field, lambda field=field: getattr(state.preset, field))
+			for field in TrackIRSample.FIELDS:
+				channels.channel("trackir." + field, lambda field=field: getattr(trackIR, field))
+			output = state.transport
+			channels.channel("output.sent", lambda: output.sent)
+			channels.channel("output.skipped", lambda: output.skipped)
+			channels.channel("output.failed", lambda: output.failed)
+			callouts = state.callouts
+			channels.channel("speech.spoken", lambda: callouts.spoken)
+			return channels
+
+	class OverlayFeed(object):
+		"""
+		HUD state for the native overlay, in the shared-memory packet Aom.App writes.
+
+		The packet is OverlaySharedStatePacket v1: int32 version, int32 payload
+		length, int64 start sequence, int64 end sequence, then the snapshot as
+		camelCase JSON. `publish` runs every frame but only compares a tuple of
+		the shown state with the last one; on a change it formats the snapshot
+		and writes it seqlock style (start sequence, payload, end sequence), so a
+		reader copying the packet mid-write sees the sequences differ and keeps
+		its previous frame. The update event is set after every write.
+		"""
+		VERSION = 1
+		HEADER = struct.Struct("<iiq")
+		END = struct.Struct("<q")
+		HEADER_SIZE = 24
+		CAPACITY = 64 * 1024
+		VIEWS = (
+			("isSideView", "side view"), ("isCustomView", "custom view"), ("isGunViewAtCenter", "gun view"),
+			("isZoomIn", "zoom in"), ("isZoomOut", "zoom out"),
+			("isHeadCenter", "head center"), ("isHeadHigh", "head high"),
+			("isHeadHighest", "head highest"), ("isHeadDynamic", "head dynamic"),
+		)
 
-			
-		diagnostics.watch(state.preset["deltaX0"])
-		diagnostics.watch(state.preset["deltaY0"])
+		def __init__(self, mapping, event=OVERLAY_EVENT):
+			self._view = mmap.mmap(-1, OverlayFeed.CAPACITY, tagname=mapping)
+			self._event = Platform.event(event)
+			# carry on from whoever wrote the segment last, so readers see the sequence move
+			self.sequence = OverlayFeed.END.unpack_from(self._view, 16)[0]
+			self._last = None
+
+		def publish(self, state):
+			game = state.game
+			flaps = state.flaps_control.flap_flags
+			mode = state.tuneMode
+			current = (
+				state.preset.name, None if mode is None else mode.name,
+				game.isSideView, game.isCustomView, game.isGunViewAtCenter, game.isZoomIn, game.isZoomOut,
+				game.isHeadCenter, game.isHeadHigh, game.isHeadHighest, game.isHeadDynamic,
+				flaps["is_flap_opening"], flaps["is_flap_closing"], flaps["flap_opened"],
+				state.checkSix.isCheckSixActivated, state.trackirSample > 0, state.profiler.stalled,
+			)
+			if current == self._last:
+				return False
+			self._last = current
+			self.write(json.dumps(OverlayFeed.snapshot(state), separators=(",", ":")).encode("utf-8"))
+			return True
 
-		diagnostics.watch(state.preset["deltaZ2_1"])
-		diagnostics.watch(state.preset["deltaZ2_2"])
+		def write(self, payload):
+			if OverlayFeed.HEADER_SIZE + len(payload) > OverlayFeed.CAPACITY:
+				raise ValueError("Overlay snapshot is too large for the shared memory packet ({} bytes)".format(len(payload)))
+			self.sequence += 1
+			view = self._view
+			OverlayFeed.HEADER.pack_into(view, 0, OverlayFeed.VERSION, len(payload), self.sequence)
+			view[OverlayFeed.HEADER_SIZE:OverlayFeed.HEADER_SIZE + len(payload)] = payload
+			OverlayFeed.END.pack_into(view, 16, self.sequence)
+			self._event.Set()
+
+		@staticmethod
+		def snapshot(state):
+			"""OverlaySharedStateSnapshot fields for the current state."""
+			game = state.game
+			flaps = state.flaps_control.flap_flags
+			views = [label for flag, label in OverlayFeed.VIEWS if getattr(game, flag)]
+			runtime = ["Game mode" if state.tuneMode is None else "Tune mode: " + state.tuneMode.name]
+			if flaps["is_flap_opening"] or flaps["is_flap_closing"]:
+				runtime.append("flaps opening" if flaps["is_flap_opening"] else "flaps closing")
+			elif flaps["flap_opened"]:
+				runtime.append("flaps down")
+			if state.checkSix.isCheckSixActivated:
+				runtime.append("check six")
+			return {
+				"isVisible": True,
+				"currentPresetDisplayName": state.preset.name,
+				"liveTrackIrStatus": "waiting" if not state.trackirSample else "stalled" if state.profiler.stalled else "connected",
+				"udpStreamingStatus": "streaming to {}:{}".format(UDP_IP, UDP_PORT),
+				"outputPoseSummary": ", ".join(views) if views else "free look",
+				"runtimeStateSummary": ", ".join(runtime),
+				"trackIrRateSummary": "",
+				"udpRateSummary": "",
+				# wall-clock time; the frame clock is monotonic and has no epoch
+				"updatedAtUtc": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+			}
 
-		diagnostics.watch(state.preset["deltaX2_1"])
 
-		diagnostics.watch(state.preset["deltaY2_1"])
+	class FrameProfiler(object):
+		"""
+		Per-stage frame timings in fixed-bucket histograms.
 
-		diagnostics.watch(state.preset["deltaY2_2"])
+		`begin` starts a frame, `mark(stage)` charges the time since the previous
+		mark to `stage` and `end` records the frame total, counting it as an
+		overrun when it exceeds `budget`. `sample` is hooked to trackIR.update;
+		`end` counts a stall once when no sample arrived within `stall` seconds.
+		"""
+		STAGES = ("input", "timers", "sync", "flaps", "check-six", "pose", "output", "bindings", "presets", "diagnostics", "frame")
+		INPUT, TIMERS, SYNC, FLAPS, CHECK_SIX, POSE, OUTPUT, BINDINGS, PRESETS, DIAGNOSTICS, FRAME = range(len(STAGES))
+		# bucket upper edges in seconds; the last bucket holds everything slower
+		EDGES = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
+
+		def __init__(self, budget=PROFILER_FRAME_BUDGET, stall=PROFILER_TRACKIR_STALL, clock=perf_counter):
+			self.budget = budget
+			self.stall = stall
+			self.clock = clock
+			count = len(FrameProfiler.STAGES)
+			self.histograms = [[0] * (len(FrameProfiler.EDGES) + 1) for _ in range(count)]
+			self.totals = [0.0] * count
+			self.maxima = [0.0] * count
+			self.frames = 0
+			self.overruns = 0
+			self.stalls = 0
+			self.stalled = False
+			self.lastOverrun = None
+			self._current = [0.0] * count
+			self._started = None
+			self._last = None
+			self._lastSample = None
+
+		def begin(self):
+			self._started = self._last = self.clock()
+			current = self._current
+			for stage in range(len(current)):
+				current[stage] = 0.0
+
+		def mark(self, stage):
+			now = self.clock()
+			self._record(stage, now - self._last)
+			self._current[stage] += now - self._last
+			self._last = now
+
+		def sample(self):
+			self._lastSample = self.clock()
+
+		def end(self):
+			now = self.clock()
+			elapsed = now - self._started
+			self._record(FrameProfiler.FRAME, elapsed)
+			self.frames += 1
+			if elapsed > self.budget:
+				self.overruns += 1
+				self._current[FrameProfiler.FRAME] = elapsed
+				self.lastOverrun = dict(zip(FrameProfiler.STAGES, self._current))
+			stalled = self._lastSample is not None and now - self._lastSample > self.stall
+			if stalled and not self.stalled:
+				self.stalls += 1
+			self.stalled = stalled
+
+		def _record(self, stage, elapsed):
+			self.histograms[stage][bisect_right(FrameProfiler.EDGES, elapsed)] += 1
+			self.totals[stage] += elapsed
+			if elapsed > self.maxima[stage]:
+				self.maxima[stage] = elapsed
+
+		def report(self):
+			"""Counters plus per-stage count/mean/max (seconds) and histogram buckets."""
+			stages = {}
+			for stage, name in enumerate(FrameProfiler.STAGES):
+				count = sum(self.histograms[stage])
+				stages[name] = {
+					"count": count,
+					"mean": self.totals[stage] / count if count else 0.0,
+					"max": self.maxima[stage],
+					"histogram": list(self.histograms[stage]),
+				}
+			return {
+				"frames": self.frames, "overruns": self.overruns, "stalls": self.stalls,
+				"budget": self.budget, "edges": list(FrameProfiler.EDGES),
+				"lastOverrun": self.lastOverrun, "stages": stages,
+			}
 
-		diagnostics.watch(state.preset["deltaX2_4"])
-		diagnostics.watch(state.preset["deltaY2_4"])
-		diagnostics.watch(state.preset["deltaZ2_4"])
+		def csv(self):
+			"""One row per stage: count, mean and max in microseconds, then the bucket counts."""
+			edges = ["le_{:g}us".format(edge * 1e6) for edge in FrameProfiler.EDGES] + ["slower"]
+			lines = [",".join(["stage", "count", "mean_us", "max_us"] + edges)]
+			report = self.report()
+			for name in FrameProfiler.STAGES:
+				stage = report["stages"][name]
+				lines.append(",".join(
+					[name, str(stage["count"]), "{:.1f}".format(stage["mean"] * 1e6), "{:.1f}".format(stage["max"] * 1e6)]
+					+ [str(bucket) for bucket in stage["histogram"]]
+				))
+			return "\n".join(lines) + "\n"
+
+		def export(self, path):
+			"""Write the report to `path`: CSV for a .csv file, JSON otherwise."""
+			with open(path, "w") as handle:
+				if path.lower().endswith(".csv"):
+					handle.write(self.csv())
+				else:
+					json.dump(self.report(), handle, indent=2, sort_keys=True)
+
+	class SessionRecorder(object):
+		"""
+		Every frame's inputs, view state and sent packet as fixed-size binary frames.
+
+		`capture` packs the raw TrackIR axes, the y latch, the frame's pose packet,
+		the TrackIR sample count, preset and tune mode ids, the view flags, the
+		active preset's field values (so tuning shows up in the recording) and
+		every InputSnapshot slot (buttons as bits, axes as doubles) into the next
+		slot of a preallocated ring; `start` fixes the input layout and checks
+		that the header fits. Every `flushInterval` seconds a pool worker copies
+		the new frames into `path`, memory-mapped when possible, which keeps the
+		last `capacity` frames behind a header. The header's JSON names the
+		slots, presets, tune modes and preset fields the frames refer to and the
+		struct formats to decode a frame. `close` writes what is left; a preset
+		that no longer fits the header stops the recording instead.
+		"""
+		MAGIC = b"AOMREC02"
+		HEADER = struct.Struct("<8sQI")  # magic, frames written, metadata length
+		HEADER_SIZE = 65536
+		# time, raw yaw/pitch/roll/x/y/z, y_offset, packet, sample, preset, tune mode, view flags
+		FRAME = struct.Struct("<8d48xIHhH6x")
+		PACKET_OFFSET = 64
+		VALUES = struct.Struct("<{}d".format(len(PresetRecord.FIELDS)))
+		RING = 4096
+		FLUSH_INTERVAL = 0.25
+
+		def __init__(self, path, capacity=RECORD_FRAMES, flushInterval=FLUSH_INTERVAL, run=None):
+			self.path = path
+			self.capacity = capacity
+			self.flushInterval = flushInterval
+			self._run = run or Platform.queueWork
+			self.presets = []
+			self.tuneModes = ["undefined"] + [mode["name"] for mode in TuneModes.MODES]
+			self._presetIds = {}
+			self._modeIds = dict((name, index) for index, name in enumerate(self.tuneModes))
+			self._lock = threading.Lock()
+			self._busy = False
+			self._dirty = True
+			self._inputs = None
+			self._ring = None
+			self._file = None
+			self._mapped = None
+			self._nextFlush = None
+			self._metadataSize = 0
+			self._values = bytearray(SessionRecorder.VALUES.size)
+			self._valuesOf = None
+			self._revision = None
+			self.stopped = False
+			self.written = 0
+			self.flushed = 0
+			self.dropped = 0
+
+		def start(self, state):
+			"""Fix the input layout and open the file; ValueError when the header cannot hold the layout."""
+			for name in state.presets.names():
+				self._presetIds[name] = len(self.presets)
+				self.presets.append(name)
+			snapshot = state.input
+			slots = snapshot.slots()
+			self._axes = [slot for slot, ident in slots if ident[0] == "axis"]
+			self._buttons = [slot for slot, ident in slots if ident[0] != "axis"]
+			self._words = (len(self._buttons) + 63) // 64
+			self._inputs = struct.Struct("<{}Q{}d".format(self._words, len(self._axes)))
+			self._args = [0] * (self._words + len(self._axes))
+			self.size = SessionRecorder.FRAME.size + SessionRecorder.VALUES.size + self._inputs.size
+			self.layout = {
+				"frame": SessionRecorder.FRAME.format, "values": SessionRecorder.VALUES.format, "inputs": self._inputs.format,
+				"size": self.size, "capacity": self.capacity, "packetOffset": SessionRecorder.PACKET_OFFSET,
+				"buttons": [[str(part) for part in ident] for _, ident in slots if ident[0] != "axis"],
+				"axes": [[str(part) for part in ident] for _, ident in slots if ident[0] == "axis"],
+				"flags": list(GameFlags.VIEW),
+				"fields": list(PresetRecord.FIELDS),
+			}
+			if not self._fits():
+				raise ValueError("Recording metadata does not fit the {} byte header".format(SessionRecorder.HEADER_SIZE))
+			self._ring = bytearray(self.size * SessionRecorder.RING)
+			length = SessionRecorder.HEADER_SIZE + self.size * self.capacity
+			self._file = open(self.path, "w+b")
+			self._file.truncate(length)
+			try:
+				self._mapped = mmap.mmap(self._file.fileno(), length)
+			except (EnvironmentError, ValueError):
+				# no mapping (e.g. a network share): the worker seeks and writes instead
+				self._mapped = None
+
+		def _metadata(self):
+			self.layout["presets"] = list(self.presets)
+			self.layout["tuneModes"] = self.tuneModes
+			return json.dumps(self.layout, sort_keys=True).encode("utf-8")
+
+		def _fits(self):
+			return SessionRecorder.HEADER.size + len(self._metadata()) <= SessionRecorder.HEADER_SIZE
+
+		def capture(self, state, now):
+			if self.stopped:
+				return
+			if self._inputs is None:
+				self.start(state)
+			name = state.preset.name
+			preset = self._presetIds.get(name)
+			if preset is None:
+				self.presets.append(name)
+				if not self._fits():
+					# frames with this preset could not be decoded; keep what is recorded so far
+					self.presets.pop()
+					diagnostics.debug("Recording stopped: preset '{}' does not fit the header".format(name))
+					self.close()
+					return
+				preset = self._presetIds[name] = len(self.presets) - 1
+				self._dirty = True
+			mode = state.tuneMode
+			game = state.game
+			flags = 0
+			bit = 1
+			for flag in GameFlags.VIEW:
+				if getattr(game, flag):
+					flags |= bit
+				bit <<= 1
+			values = state.input.values
+			args = self._args
+			bits = 0
+			bit = 1
+			for slot in self._buttons:
+				if values[slot]:
+					bits |= bit
+				bit <<= 1
+			for word in range(self._words):
+				args[word] = (bits >> (word * 64)) & 0xFFFFFFFFFFFFFFFF
+			index = self._words
+			for slot in self._axes:
+				args[index] = values[slot]
+				index += 1
+			at = (self.written % SessionRecorder.RING) * self.size
+			ring = self._ring
+			SessionRecorder.FRAME.pack_into(
+				ring, at, now, trackIR.yaw, trackIR.pitch, trackIR.roll, trackIR.x, trackIR.y, trackIR.z,
+				game.y_offset, state.trackirSample & 0xFFFFFFFF, preset,
+				-1 if mode is None else self._modeIds.get(mode.name, 0), flags,
+			)
+			packet = SessionRecorder.PACKET_OFFSET + at
+			# the output's packet is the frame's own pose; with OUTPUT_RATE set, the
+			# scheduler's worker may be packing into the transport's buffer right now
+			ring[packet:packet + PoseTransport.PACKET.size] = state.output.packet
+			layer = state.preset
+			if layer is not self._valuesOf or layer.revision != self._revision:
+				# repacked only when a tuning step, undo, revert or switch changed them
+				self._valuesOf = layer
+				self._revision = layer.revision
+				SessionRecorder.VALUES.pack_into(self._values, 0, *[getattr(layer, field) for field in PresetRecord.FIELDS])
+			values = at + SessionRecorder.FRAME.size
+			ring[values:values + SessionRecorder.VALUES.size] = self._values
+			self._inputs.pack_into(ring, values + SessionRecorder.VALUES.size, *args)
+			self.written += 1
+			if self._nextFlush is None or now >= self._nextFlush:
+				self._nextFlush = now + self.flushInterval
+				self.flush()
+
+		def flush(self):
+			"""Hand the frames captured since the last flush to a worker, unless one is still writing."""
+			with self._lock:
+				if self._busy or self._inputs is None:
+					return
+				self._busy = True
+			start, end = self.flushed, self.written
+			if end - start > SessionRecorder.RING:
+				# the worker fell a whole ring behind; those frames were overwritten
+				self.dropped += end - start - SessionRecorder.RING
+				start = end - SessionRecorder.RING
+			self.flushed = end
+			metadata = None
+			if self._dirty:
+				# start and capture made sure it fits
+				self._dirty = False
+				metadata = self._metadata()
+			self._run(lambda: self._write(start, end, metadata))
+
+		def _put(self, at, data):
+			if self._mapped is not None:
+				self._mapped[at:at + len(data)] = data
+			else:
+				self._file.seek(at)
+				self._file.write(data)
+
+		def _write(self, start, end, metadata):
+			try:
+				size = self.size
+				for index in range(start, end):
+					at = (index % SessionRecorder.RING) * size
+					self._put(SessionRecorder.HEADER_SIZE + (index % self.capacity) * size, self._ring[at:at + size])
+				if metadata is not None:
+					self._put(SessionRecorder.HEADER.size, metadata)
+					self._metadataSize = len(metadata)
+				self._put(0, SessionRecorder.HEADER.pack(SessionRecorder.MAGIC, end, self._metadataSize))
+			except Exception as e:
+				diagnostics.debug("Recording failed: " + str(e))
+			finally:
+				with self._lock:
+					self._busy = False
+
+		def close(self):
+			"""Write the remaining frames and release the file; later frames are not recorded."""
+			self.stopped = True
+			while self._busy:
+				time.sleep(0.001)
+			if self._file is None or self._file.closed:
+				return
+			self._nextFlush = None
+			self.flush()
+			while self._busy:
+				time.sleep(0.001)
+			if self._mapped is not None:
+				self._mapped.close()
+			self._file.close()
+
+	class PoseTerms(object):
+		"""
+		The game-mode pose terms that do not depend on the TrackIR sample.
+
+		They change only when an action fires, a tuning step runs or the preset
+		changes. Whoever does that sets `AppState.poseDirty`, and the next pose
+		rebuilds the terms once from the Six_DOF_Calc_Helpers that tuning mode
+		calls directly: the zoom Z, the fixed head Y (None while it follows the
+		dynamic-Y axis), the side-view shift and its mirror boundary, the gun-view
+		X and Y offsets, and the whole pose of the custom view.
+		"""
+		__slots__ = ("custom", "y", "z", "sideX", "mirrorX", "gunX", "gunY")
+
+		def __init__(self):
+			self.custom = None
+			self.y = self.z = self.gunX = self.gunY = 0
+			self.sideX = self.mirrorX = None
+
+		def update(self, state, calc):
+			preset = state.preset
+			game = state.game
+			if game.isCustomView:
+				self.custom = calc._custom_pose()
+				return
+			self.custom = None
+			self.y = calc._head_y()
+			self.z = (preset.deltaZ2_1 if game.isZoomIn else 0) + (preset.deltaZ2_2 if game.isZoomOut else 0)
+			self.gunX, self.gunY = calc._gun_xy()
+			if game.isSideView:
+				self.sideX = abs(preset.deltaX2_1)
+				self.mirrorX = abs(state.autoCornerX_end)
+			else:
+				self.sideX = self.mirrorX = None
 
-		diagnostics.watch(state.preset["deltaYLow"])
-		diagnostics.watch(state.preset["deltaYHigh"])
-	
-		diagnostics.watch(state.preset["syaw"])
-		diagnostics.watch(state.preset["spitch"])
-		diagnostics.watch(trackIR.yaw)
-		diagnostics.watch(trackIR.pitch)
-		diagnostics.watch(trackIR.roll)
-		diagnostics.watch(trackIR.x)
-		diagnostics.watch(trackIR.y)
-		diagnostics.watch(trackIR.z)
-
-class Six_DOF_Calc_Helpers:
-	def __init__(self, state):
-		self.state = state
+	class Six_DOF_Calc_Helpers:
+		def __init__(self, state):
+			self.state = state
   
-	def _compute_manual_x(self, yaw):
-		if not self.state.game.get("isSideView", False):
+		def _compute_manual_x(self, yaw):
+			if not self.state.game.isSideView:
+				return 0
+			return Six_DOF_Calc_Helpers._side_x(yaw, abs(self.state.preset.deltaX2_1), abs(self.state.autoCornerX_end))
+
+		@staticmethod
+		def _side_x(yaw, shift, boundary):
+			"""Side-view X for a shift and mirror boundary, both already made positive."""
+			if -boundary <= yaw <= 0:
+				return -shift
+			elif 0 < yaw < boundary:
+				return shift
+			elif yaw < -boundary:
+				return shift * 3
+			elif boundary <= yaw:
+				return -shift * 3
 			return 0
-		mirror_x_boundary = self.state.autoCornerX_end
-		x = self.state.preset["deltaX2_1"]
-
-		if -abs(mirror_x_boundary) <= yaw <= 0:
-			return -abs(x)
-		elif 0 < yaw < abs(mirror_x_boundary):
-			return abs(x)
-		elif yaw < -abs(mirror_x_boundary):
-			return abs(x * 3)
-		elif abs(mirror_x_boundary) <= yaw:
-			return -abs(x * 3)
-		return 0
-
-	def _compute_manual_y(self, joy_y):
-		"""Update deltaY based on the current Y-axis state."""
-		if self.state.game.get("isHeadCenter", False):
-			return self.state.preset.get("deltaY0", 0)
-		if self.state.game.get("isHeadHigh", False):
-			return self.state.preset.get("deltaY2_1", 0)
-		if self.state.game.get("isHeadHighest", False):
-			return self.state.preset.get("deltaY2_2", 0)
-		if self.state.game.get("isHeadDynamic", False):
-			return filters.ensureMapRange(joy_y, 0, 1000, self.state.preset.get("deltaYLow", 0), self.state.preset.get("deltaYHigh", 0))
-		return 0
+
+		def _compute_manual_y(self, joy_y):
+			"""Update deltaY based on the current Y-axis state."""
+			y = self._head_y()
+			return self._dynamic_y(joy_y) if y is None else y
+
+		def _head_y(self):
+			"""The head Y the view flags fix, or None while it follows the dynamic-Y axis."""
+			if self.state.game.isHeadCenter:
+				return self.state.preset.deltaY0
+			if self.state.game.isHeadHigh:
+				return self.state.preset.deltaY2_1
+			if self.state.game.isHeadHighest:
+				return self.state.preset.deltaY2_2
+			if self.state.game.isHeadDynamic:
+				return None
+			return 0
+
+		def _gun_xy(self):
+			"""The X and Y offsets of the gun view, or zeros while it is off."""
+			if self.state.game.isGunViewAtCenter:
+				return self.state.preset.deltaX0, self.state.preset.deltaY0
+			return 0, 0
+
+		def _dynamic_y(self, joy_y):
+			return filters.ensureMapRange(joy_y, 0, 1000, self.state.preset.deltaYLow, self.state.preset.deltaYHigh)
  
-	def ensureMapRange(self, value, input_min, input_max, output_min, output_max):
-		# Avoid division by zero
-		if input_max - input_min == 0:
-			return output_min
-		
-		# Linear interpolation
-		normalized = (value - input_min) / (input_max - input_min)
-		return output_min + normalized * (output_max - output_min)
-
-	def _compute_auto_xyz(self, yaw):
-		autoX, autoY, autoZ = 0, 0, 0
-		if yaw != 0:
-			delta_x1 = self.state.preset["deltaX1"]
-			delta_y1 = self.state.preset["deltaY1"]
-			delta_z1 = self.state.preset["deltaZ1"]
-			if abs(yaw) <= self.state.autoCornerStart:
-				return autoX, autoY, autoZ
-			autoX = self.ensureMapRange(yaw, self.state.autoCornerStart, self.state.autoCornerEnd, 0, delta_x1)
-			autoY = self.ensureMapRange(abs(yaw), self.state.autoCornerStart, self.state.autoCornerEnd, 0, delta_y1)
-			autoZ = self.ensureMapRange(abs(yaw), self.state.autoCornerStart, self.state.autoCornerEnd, 0, delta_z1)
-		return autoX, autoY, autoZ
-
-	def _compute_fake_xyz(self, yaw, pitch, roll, x, y, z, autoX, autoY, autoZ, deltaX, deltaY, deltaZ):
-		is_y_on = abs(yaw) >= 45
+		def _compute_auto_xyz(self, yaw):
+			if yaw == 0 or abs(yaw) <= self.state.autoCornerStart:
+				return 0, 0, 0
+			preset = self.state.preset
+			curve_x, curve_y, curve_z = self.state.autoCurves
+			return curve_x.map(yaw, preset.deltaX1), curve_y.map(abs(yaw), preset.deltaY1), curve_z.map(abs(yaw), preset.deltaZ1)
+
+		def _compute_fake_xyz(self, yaw, pitch, roll, x, y, z, autoX, autoY, autoZ, deltaX, deltaY, deltaZ, gunX=0, gunY=0):
+			is_y_on = abs(yaw) >= 45
   
-		fake_yaw = yaw * 0.1
-		fake_pitch = pitch
-		fake_roll = roll
+			fake_yaw = yaw * 0.1
+			fake_pitch = pitch
+			fake_roll = roll
   
-		# calculate x
-		fake_temp_x = x * (abs(autoX) == 0) + (autoX * 1.0)
-		is_in_dead_zone = (abs(fake_temp_x) < 1 and abs(autoX) == 0)
-		def apply_dead_zone(value, threshold):
-			return value if abs(value) >= threshold or self.state.tuneMode != None else 0 
-		x_direction = apply_dead_zone(fake_temp_x, 1) #(fake_temp_x - fake_temp_x / fake_temp_x_divider)
-		fake_x = x_direction + deltaX + self.state.preset["deltaX0"] * self.state.game.get("isGunViewAtCenter", False)
+			# calculate x; raw X under 1 is a dead zone, except while tuning
+			fake_temp_x = x if autoX == 0 else autoX
+			x_direction = fake_temp_x if abs(fake_temp_x) >= 1 or self.state.tuneMode != None else 0
+			fake_x = x_direction + deltaX + gunX
 		
-		# calculate y
-		fake_y = (
-			y * is_y_on
-			+ deltaY
-			+ (autoY * 1.0)
-			+ self.state.preset["deltaY0"] * self.state.game.get("isGunViewAtCenter", False)
-			- self.state.game.get("y_offset", 0) * is_y_on
-		)
+			# calculate y
+			game = self.state.game
+			if is_y_on:
+				fake_y = y + deltaY + autoY + gunY - game.y_offset
+			else:
+				fake_y = deltaY + autoY + gunY
+				game.y_offset = y
   
-		fake_z = z + deltaZ + (autoZ * 1.0)
+			fake_z = z + deltaZ + autoZ
 	
-		if not is_y_on:
-			self.state.game["y_offset"] = y
-	
-		return fake_yaw, fake_pitch, 0, fake_x, fake_y, fake_z
+			return fake_yaw, fake_pitch, 0, fake_x, fake_y, fake_z
 
-	def _sync(self):
-		centerPendingFrameTimer = self.state.game.get("centerPendingFrameTimer", None)
+		def _custom_pose(self):
+			preset = self.state.preset
+			return preset.syaw, preset.spitch, 0, preset.deltaX2_4, preset.deltaY2_4, preset.deltaZ2_4
 
-		if centerPendingFrameTimer is not None:
-			if centerPendingFrameTimer == 0:
-				keyboard.setPressed(GlobalCenterKey)
-				self.state.game["centerPendingFrameTimer"] = -1
-			elif centerPendingFrameTimer == -5:
-				self.state.game["centerPendingFrameTimer"] = None
-			else:
-				self.state.game["centerPendingFrameTimer"] -= 1
-			data = struct.pack('<dddddd', 0, 0, 0, 0, 0, 0)
-			self.state.udpSocket.sendto(data, (UDP_IP, UDP_PORT))
+		def _sync(self):
+			if not self.state.game.centering:
+				return False
+			self.state.output.send(0, 0, 0, 0, 0, 0)
 			return True
-		return False
-
-class GameMode:
-	def __init__(self, state):
-		self.state = state
-		self.calc = Six_DOF_Calc_Helpers(self.state)
-
-	def proccessFrame(self): 
-		if self.calc._sync():
-			return
-  
-		self.state.flaps_control.update(current_time=time.time())
-		self.state.checkSix.update(state=self.state)
-		yaw = self.state.trackir.get("yaw", 0)
-		pitch = self.state.trackir.get("pitch", 0)
-		roll = self.state.trackir.get("roll", 0)
-		x = self.state.trackir.get("x", 0)
-		y = self.state.trackir.get("y", 0)
-		z = self.state.trackir.get("z", 0)
-	
-		autoX, autoY, autoZ = self.calc._compute_auto_xyz(yaw)
-		deltaX = self.calc._compute_manual_x(yaw)
-		deltaY = self.calc._compute_manual_y(stick_y)
-		deltaZ = (
-			self.state.preset["deltaZ2_1"] * self.state.game.get("isZoomIn", False) +
-			self.state.preset["deltaZ2_2"] * self.state.game.get("isZoomOut", False)
-		)
 
-		if self.state.game.get("isCustomView", False):
-			fake_yaw, fake_pitch, fake_roll = self.state.preset["syaw"], self.state.preset["spitch"], 0
-			fake_x, fake_y, fake_z = self.state.preset["deltaX2_4"], self.state.preset["deltaY2_4"], self.state.preset["deltaZ2_4"]
-		else:
-			fake_yaw, fake_pitch, fake_roll, fake_x, fake_y, fake_z = self.calc._compute_fake_xyz(
-				yaw, pitch, roll, x, y, z, autoX, autoY, autoZ, deltaX, deltaY, deltaZ
-			)
+	class GameMode:
+		def __init__(self, state):
+			self.state = state
+			self.calc = Six_DOF_Calc_Helpers(self.state)
+			self.terms = PoseTerms()
+			self.stickYSlot = state.input.axis(DYNAMIC_Y_AXIS)
+			self.sentSample = None
+
+		def proccessFrame(self): 
+			profiler = self.state.profiler
+			if EMIT_ON_TRACKIR and self.state.trackirSample and not profiler.stalled:
+				# poses go out from trackIR.update; the frame only runs the timed helpers
+				self._updateHelpers(profiler)
+				return
+			synced = self.calc._sync()
+			profiler.mark(FrameProfiler.SYNC)
+			if synced:
+				return
   
-		data = struct.pack('<dddddd', fake_x, fake_y, fake_z, fake_yaw, fake_pitch, fake_roll)
-		self.state.udpSocket.sendto(data, (UDP_IP, UDP_PORT))
-
-class TuningMode:
-	def __init__(self, state):
-		self.state = state
-		self.calc = Six_DOF_Calc_Helpers(self.state)
+			self._updateHelpers(profiler)
+			self._sendPose(profiler)
+
+		def emit(self):
+			"""Send the pose for the newest TrackIR sample right away, at most once per sample."""
+			sample = self.state.trackirSample
+			if sample == self.sentSample:
+				return
+			self.sentSample = sample
+			if not self.calc._sync():
+				self._sendPose(None)
+
+		def _updateHelpers(self, profiler):
+			self.state.flaps_control.update(current_time=self.state.now)
+			profiler.mark(FrameProfiler.FLAPS)
+			self.state.checkSix.update(state=self.state)
+			profiler.mark(FrameProfiler.CHECK_SIX)
+
+		def _sendPose(self, profiler):
+			state = self.state
+			calc = self.calc
+			terms = self.terms
+			if state.poseDirty:
+				state.poseDirty = False
+				terms.update(state, calc)
+			custom = terms.custom
+			if custom is None:
+				# one read of the published sample; fromTrackIR swaps in whole samples only
+				sample = state.trackir
+				yaw = sample.yaw
+				autoX, autoY, autoZ = calc._compute_auto_xyz(yaw)
+				deltaX = 0 if terms.sideX is None else Six_DOF_Calc_Helpers._side_x(yaw, terms.sideX, terms.mirrorX)
+				deltaY = terms.y
+				if deltaY is None:
+					deltaY = calc._dynamic_y(state.input.values[self.stickYSlot])
+				fake_yaw, fake_pitch, fake_roll, fake_x, fake_y, fake_z = calc._compute_fake_xyz(
+					yaw, sample.pitch, sample.roll, sample.x, sample.y, sample.z,
+					autoX, autoY, autoZ, deltaX, deltaY, terms.z, terms.gunX, terms.gunY
+				)
+			else:
+				fake_yaw, fake_pitch, fake_roll, fake_x, fake_y, fake_z = custom
+			if profiler is not None:
+				profiler.mark(FrameProfiler.POSE)
+
+			state.output.send(fake_x, fake_y, fake_z, fake_yaw, fake_pitch, fake_roll)
+			if profiler is not None:
+				profiler.mark(FrameProfiler.OUTPUT)
+
+	class TuningMode:
+		def __init__(self, state):
+			self.state = state
+			self.calc = Six_DOF_Calc_Helpers(self.state)
   
-	def proccessFrame(self): 
-		if self.calc._sync():
-			return
-
-		mode = self.state.tuneMode.name
+		def proccessFrame(self): 
+			profiler = self.state.profiler
+			synced = self.calc._sync()
+			profiler.mark(FrameProfiler.SYNC)
+			if synced:
+				return
+
+			mode = self.state.tuneMode.name
   
-		yaw = self.state.preset.get("manual_yaw", 0) if mode == "isAuto" else 0
+			yaw = self.state.preset.manual_yaw if mode == "isAuto" else 0
 		
-		pitch, roll, x, y, z = 0, 0, 0, 0, 0
+			pitch, roll, x, y, z = 0, 0, 0, 0, 0
 
-		autoX, autoY, autoZ = self.calc._compute_auto_xyz(yaw) if mode == "isAuto" else (0, 0, 0)
+			autoX, autoY, autoZ = self.calc._compute_auto_xyz(yaw) if mode == "isAuto" else (0, 0, 0)
 		
-		self.state.game["isSideView"] = mode == "isManualShiftX"
-		self.state.game["isGunViewAtCenter"] = True
-		self.state.update_y_axis_state(
-	  		center=(mode == "isCenter"), 
-			shift_1=(mode == "isManualShiftY1"), 
-		 	shift_2=(mode == "isManualShiftY2"), 
-		  	shift_dynamic=(mode == "isDynamicYLow" or mode == "isDynamicYHigh"))
-
-		joy_y = 1000 if mode == "isDynamicYHigh" else 0
+			self.state.game.isSideView = mode == "isManualShiftX"
+			self.state.game.isGunViewAtCenter = True
+			self.state.update_y_axis_state(
+		  		center=(mode == "isCenter"), 
+				shift_1=(mode == "isManualShiftY1"), 
+			 	shift_2=(mode == "isManualShiftY2"), 
+			  	shift_dynamic=(mode == "isDynamicYLow" or mode == "isDynamicYHigh"))
+
+			joy_y = 1000 if mode == "isDynamicYHigh" else 0
 		
-		deltaX = self.calc._compute_manual_x(yaw)
-		deltaY = self.calc._compute_manual_y(joy_y)
-		deltaZ = (
-			self.state.preset["deltaZ2_1"] * (mode == "isZoomIn") +
-			self.state.preset["deltaZ2_2"] * (mode == "isZoomOut" or mode == "isCenter" or mode == "isManualShiftY1" or mode == "isManualShiftY2")
-		)
-
-		if mode == "isCustomView":
-			fake_yaw, fake_pitch, fake_roll = self.state.preset["syaw"], self.state.preset["spitch"], 0
-			fake_x, fake_y, fake_z = self.state.preset["deltaX2_4"], self.state.preset["deltaY2_4"], self.state.preset["deltaZ2_4"]
-		else:
-			fake_yaw, fake_pitch, fake_roll, fake_x, fake_y, fake_z = self.calc._compute_fake_xyz(
-				yaw, pitch, roll, x, y, z, autoX, autoY, autoZ, deltaX, deltaY, deltaZ
+			deltaX = self.calc._compute_manual_x(yaw)
+			deltaY = self.calc._compute_manual_y(joy_y)
+			deltaZ = (
+				(self.state.preset.deltaZ2_1 if mode == "isZoomIn" else 0) +
+				(self.state.preset.deltaZ2_2 if mode in ("isZoomOut", "isCenter", "isManualShiftY1", "isManualShiftY2") else 0)
 			)
+
+			if mode == "isCustomView":
+				fake_yaw, fake_pitch, fake_roll, fake_x, fake_y, fake_z = self.calc._custom_pose()
+			else:
+				gunX, gunY = self.calc._gun_xy()
+				fake_yaw, fake_pitch, fake_roll, fake_x, fake_y, fake_z = self.calc._compute_fake_xyz(
+					yaw, pitch, roll, x, y, z, autoX, autoY, autoZ, deltaX, deltaY, deltaZ, gunX, gunY
+				)
+			profiler.mark(FrameProfiler.POSE)
   
-		data = struct.pack('<dddddd', fake_x, fake_y, fake_z, fake_yaw, fake_pitch, fake_roll)
-		self.state.udpSocket.sendto(data, (UDP_IP, UDP_PORT))
-
-class Application:
-	def __init__(self):
-		self.state = AppState()
-		def fromTrackIR():
-			self.state.trackir["yaw"] = trackIR.yaw
-			self.state.trackir["pitch"] = trackIR.pitch
-			self.state.trackir["roll"] = trackIR.roll
-			self.state.trackir["x"] = trackIR.x
-			self.state.trackir["y"] = trackIR.y
-			self.state.trackir["x"] = trackIR.z
-		trackIR.update += fromTrackIR
-		self.tuneMode = TuningMode(self.state)
-		self.gameMode = GameMode(self.state)
-		(ChangePresetAction()).handle(self.state)
+			self.state.output.send(fake_x, fake_y, fake_z, fake_yaw, fake_pitch, fake_roll)
+			profiler.mark(FrameProfiler.OUTPUT)
+			# the tuned view flags stay set for game mode, which has to rebuild its terms
+			self.state.poseDirty = True
+
+	class Application:
+		def __init__(self):
+			self.state = AppState()
+			def fromTrackIR():
+				state = self.state
+				# fill the back buffer, then publish it with one reference swap
+				sample = state.trackirBack
+				sample.yaw = trackIR.yaw
+				sample.pitch = trackIR.pitch
+				sample.roll = trackIR.roll
+				sample.x = trackIR.x
+				sample.y = trackIR.y
+				sample.z = trackIR.z
+				now = state.trackirTime = perf_counter()
+				prediction = state.prediction
+				if prediction:
+					for axis, stage in prediction:
+						setattr(sample, axis, stage.update(getattr(sample, axis), now))
+				state.trackirBack = state.trackir
+				state.trackir = sample
+				state.trackirSample += 1
+				state.profiler.sample()
+				if EMIT_ON_TRACKIR and state.tuneMode is None:
+					self.gameMode.emit()
+			trackIR.update += fromTrackIR
+			self.tuneMode = TuningMode(self.state)
+			self.gameMode = GameMode(self.state)
+			self.bindings = BindingTable.load(self.state.input, BINDINGS_FILE)
+			(ChangePresetAction()).handle(self.state)
+			if self.state.recorder is not None:
+				# the bindings fixed the input slots; a layout the header cannot hold fails here, at start
+				self.state.recorder.start(self.state)
  
-	def proccessFrame(self): 
-		self.tuneMode.proccessFrame() if self.state.tuneMode != None else self.gameMode.proccessFrame()
-		for action in EventStream.actions(self.state): action.handle(self.state)
-		Diagnostics.watch(self.state)
+		def proccessFrame(self): 
+			profiler = self.state.profiler
+			profiler.begin()
+			# the one clock read every timed behaviour of this frame goes by
+			now = self.state.now = monotonic()
+			self.state.input.capture()
+			if self.state.telemetry is not None:
+				self.state.telemetry.poll(now)
+			profiler.mark(FrameProfiler.INPUT)
+			self.state.timers.advance(now)
+			profiler.mark(FrameProfiler.TIMERS)
+			self.tuneMode.proccessFrame() if self.state.tuneMode != None else self.gameMode.proccessFrame()
+			self.bindings.dispatch(self.state)
+			profiler.mark(FrameProfiler.BINDINGS)
+			self.state.presets.poll(now, self.state)
+			profiler.mark(FrameProfiler.PRESETS)
+			self.state.diagnostics.update(now)
+			if self.state.overlay is not None:
+				self.state.overlay.publish(self.state)
+			if self.state.recorder is not None:
+				self.state.recorder.capture(self.state, now)
+			profiler.mark(FrameProfiler.DIAGNOSTICS)
+			profiler.end()
+
+		def stop(self):
+			"""The script is being stopped: write out what is still buffered."""
+			if self.state.recorder is not None:
+				self.state.recorder.close()
   
-if starting:
-	app = Application()
-app.proccessFrame()
\ No newline at end of file
+# FreePIE runs the script with its plugin globals and `starting` every frame, and once
+# more with `stopping` set when the script is stopped;
+# imported anywhere else (tools, CPython on Linux) it only defines the classes.
+if "starting" in globals():
+	if starting:
+		app = Application()
+	if globals().get("stopping"):
+		app.stop()
+	else:
+		app.proccessFrame()
\ No newline at end of file
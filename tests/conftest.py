@@ -0,0 +1,11 @@
+import pytest
+
+from tools.freepie_host import FreePieHost
+
+
+@pytest.fixture
+def host():
+	"""A host that has run the script's first pass, so `host.app` exists."""
+	host = FreePieHost()
+	host.step()
+	return host
@@ -0,0 +1,82 @@
+import pytest
+
+
+@pytest.fixture
+def namespace(host):
+	return host.namespace
+
+
+def curve(namespace, spec, start=30.0, end=140):
+	return namespace["AutoCornerCurve"](spec, start, end)
+
+
+def test_linear_curve_keeps_the_map_range_formula(namespace):
+	linear = curve(namespace, "linear")
+
+	assert linear.table is None
+	assert linear.map(85.0, 2.0) == 0 + ((85.0 - 30.0) / 110.0) * 2.0
+	assert linear.map(-85.0, 2.0) == 0 + ((-85.0 - 30.0) / 110.0) * 2.0
+
+
+@pytest.mark.parametrize("spec, expected", [
+	("ease-in", 0.25),
+	("ease-out", 0.75),
+	("ease-in-out", 0.5),
+	(["piecewise", [[0, 0], [0.5, 0.2], [1, 1]]], 0.2),
+	(["spline", [[0, 0], [0.5, 0.2], [1, 1]]], 0.2),
+])
+def test_table_curves_interpolate_their_shape(namespace, spec, expected):
+	lut = curve(namespace, spec)
+
+	assert len(lut.table) == namespace["AutoCornerCurve"].SIZE
+	assert lut.map(85.0, 2.0) == pytest.approx(2.0 * expected, abs=5e-3)
+	assert lut.map(140.0, 2.0) == pytest.approx(2.0)
+
+
+def test_table_curves_hold_past_the_end_and_are_odd_around_the_start(namespace):
+	lut = curve(namespace, "ease-in")
+
+	assert lut.map(175.0, 3.0) == lut.map(140.0, 3.0)
+	# yaw -40 is as far below the start (30) as 100 is above it
+	assert lut.map(-40.0, 3.0) == -lut.map(100.0, 3.0)
+	assert lut.map(-175.0, 3.0) == -lut.map(140.0, 3.0)
+
+
+@pytest.mark.parametrize("yaw", [-31.0, -40.0, -60.0, -80.0, 35.0, 85.0, 140.0])
+def test_a_straight_piecewise_table_matches_linear_for_either_sign(namespace, yaw):
+	linear = curve(namespace, "linear")
+	straight = curve(namespace, ["piecewise", [[0, 0], [1, 1]]])
+
+	# within |t| <= 1: below yaw -80 the table holds while linear keeps growing
+	assert straight.map(yaw, 2.0) == pytest.approx(linear.map(yaw, 2.0))
+
+
+def test_spline_does_not_overshoot_its_points(namespace):
+	lut = curve(namespace, ["spline", [[0, 0], [0.3, 0.8], [0.6, 0.85], [1, 1]]])
+
+	assert all(a <= b for a, b in zip(lut.table, lut.table[1:]))
+	assert max(lut.table) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("curves, message", [
+	({"w": "linear"}, "unknown axis"),
+	({"x": "cubic"}, "Unknown auto-corner curve"),
+	({"x": ["piecewise", [[0, 0]]]}, "at least two points"),
+])
+def test_invalid_curve_specs_are_rejected_when_the_preset_compiles(namespace, curves, message):
+	with pytest.raises(ValueError, match=message):
+		namespace["PresetRecord"]("custom", {"deltaX1": 1.0, "curves": curves})
+
+
+def test_tables_are_built_on_preset_switch_and_read_the_live_delta(namespace):
+	state = namespace["app"].state
+	state.preset = namespace["PresetRecord"]("custom", {"deltaX1": 1.0, "curves": {"x": "ease-in"}})
+	tables = state.autoCurves
+	calc = namespace["app"].gameMode.calc
+
+	before = calc._compute_auto_xyz(140.0)[0]
+	state.preset.deltaX1 = 2.0
+	after = calc._compute_auto_xyz(140.0)[0]
+
+	assert state.autoCurves is tables
+	assert (before, after) == (pytest.approx(1.0), pytest.approx(2.0))
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from tools.freepie_host import DEFAULT_SCRIPT, FreePieHost, InputTimeline
+
+
+@pytest.fixture
+def snapshot(host):
+	return host.namespace["InputSnapshot"](host.namespace["MemoryKeyState"]())
+
+
+def test_default_table_binds_every_preset_to_its_own_key(host, snapshot):
+	table = host.namespace["BindingTable"].load(snapshot)
+
+	triggers = dict((binding.actionId, binding.trigger) for binding in table.bindings)
+
+	assert triggers["preset.yakodin-and-b"] == "UpArrow + NumberPad4"
+	assert triggers["preset.la-five"] == "UpArrow + NumberPad5"
+
+
+def test_stateless_actions_are_shared_per_table(host, snapshot):
+	table = host.namespace["BindingTable"].compile([
+		("zoom.in", "F5", "press"),
+		("zoom.in", "Throttle button 7", "press"),
+	], snapshot)
+
+	first, second = table.bindings
+	assert first.action is second.action
+
+
+def test_duplicate_trigger_is_rejected(host, snapshot):
+	compile_table = lambda entries: host.namespace["BindingTable"].compile(entries, snapshot)
+
+	with pytest.raises(ValueError, match="bound to both"):
+		compile_table([
+			("preset.yakodin-and-b", "UpArrow + NumberPad4", "press"),
+			("preset.la-five", "UpArrow + NumberPad4", "press"),
+		])
+
+
+def test_modifier_order_does_not_hide_a_conflict(host, snapshot):
+	compile_table = lambda entries: host.namespace["BindingTable"].compile(entries, snapshot)
+
+	with pytest.raises(ValueError, match="bound to both"):
+		compile_table([
+			("zoom.in", "LeftAlt + LeftShift + F5", "press"),
+			("zoom.out", "LeftShift + LeftAlt + F5", "press"),
+		])
+
+
+@pytest.mark.parametrize("entry, message", [
+	(("no.such-action", "F1", "press"), "Unknown binding action"),
+	(("zoom.in", "F1", "toggle"), "unknown mode"),
+	(("zoom.in", "Throttle knob 3", "press"), "Unknown binding input"),
+	(("zoom.in", "F5", "sync"), "cannot sync"),
+])
+def test_invalid_entries_are_rejected(host, snapshot, entry, message):
+	with pytest.raises(ValueError, match=message):
+		host.namespace["BindingTable"].compile([entry], snapshot)
+
+
+def test_bindings_file_replaces_defaults(tmp_path):
+	bindings = tmp_path / "bindings.json"
+	bindings.write_text(json.dumps({"bindings": [["preset.lagg", "F9", "press"]]}))
+	script = tmp_path / "aom.py"
+	source = open(DEFAULT_SCRIPT).read()
+	script.write_text(source.replace("BINDINGS_FILE = None", "BINDINGS_FILE = " + repr(str(bindings))))
+	host = FreePieHost(str(script), InputTimeline().hold_key(3, "F9"))
+
+	host.run(5)
+
+	assert [binding.trigger for binding in host.app.bindings.bindings] == ["F9"]
+	assert host.speech.said[-1] == "lagg preset loaded"
+
+
+def test_sync_binding_follows_scroll_lock_toggle():
+	timeline = InputTimeline().toggle_key(2, "ScrollLock").toggle_key(4, "ScrollLock")
+	host = FreePieHost(timeline=timeline)
+
+	modes = [mode for mode, _ in host.run(6)]
+
+	assert modes == ["game", "game", "game", "tuning", "tuning", "game"]
@@ -0,0 +1,71 @@
+import pytest
+
+from tools.freepie_host import FreePieHost, InputTimeline
+
+
+def channels(host, **kwargs):
+	diagnostics = host.namespace["Diagnostics"](**kwargs)
+	counter = {"value": 0}
+	def read():
+		counter["value"] += 1
+		return counter["value"]
+	diagnostics.channel("reads", read)
+	return diagnostics
+
+
+def test_channels_are_sampled_and_published_at_their_own_rates(host):
+	diagnostics = channels(host, sampleInterval=0.05, publishInterval=0.2, size=100)
+	watched = host.diagnostics.watch_count
+
+	for frame in range(60):
+		diagnostics.update(frame / 60.0)
+
+	assert [values["reads"] for _, values in diagnostics.history()] == list(range(1, 21))
+	assert host.diagnostics.watch_count - watched == 5
+
+
+def test_history_keeps_the_newest_samples_in_order(host):
+	diagnostics = channels(host, sampleInterval=0, publishInterval=1, size=4)
+
+	for frame in range(10):
+		diagnostics.update(float(frame))
+
+	assert diagnostics.history() == [(float(t), {"reads": t + 1}) for t in range(6, 10)]
+
+
+def test_channels_are_fixed_once_sampling_starts(host):
+	diagnostics = channels(host)
+	with pytest.raises(ValueError, match="Duplicate"):
+		diagnostics.channel("reads", lambda: 0)
+
+	diagnostics.update(0.0)
+
+	with pytest.raises(ValueError, match="after sampling started"):
+		diagnostics.channel("late", lambda: 0)
+
+
+def test_watch_window_is_refreshed_at_the_publish_rate():
+	host = FreePieHost()
+	host.run(120)
+
+	assert host.diagnostics.watch_count == 20 * len(host.app.state.diagnostics.names)
+
+
+def test_dump_binding_prints_the_history():
+	keys = ["LeftAlt", "LeftControl", "LeftShift", "F11"]
+	host = FreePieHost(timeline=InputTimeline().hold_keys(30, keys))
+	host.run(32)
+
+	header, rows = host.diagnostics.messages[0], host.diagnostics.messages[1:]
+	assert header.startswith("time,preset.deltaX0,")
+	assert len(rows) == 15
+	assert all(len(row.split(",")) == len(header.split(",")) for row in rows)
+
+
+def test_every_channel_is_watched_under_its_own_name():
+	host = FreePieHost()
+	host.trackIR.set_pose(12.0, 3.0, 0.0, 1.5, 0.5, 0.25)
+	host.run(3)
+
+	assert list(host.diagnostics.watched) == host.app.state.diagnostics.names
+	assert host.diagnostics.watched["trackir.yaw"] == 12.0
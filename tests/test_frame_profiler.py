@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from tools.freepie_host import FreePieHost, InputTimeline, game_timeline
+
+
+class StepClock(object):
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+
+@pytest.fixture
+def clock():
+	return StepClock()
+
+
+@pytest.fixture
+def profiler(host, clock):
+	return host.namespace["FrameProfiler"](budget=0.002, stall=0.1, clock=clock)
+
+
+def frame(profiler, clock, *durations):
+	"""Run one frame whose stages (in STAGES order) take the given seconds."""
+	profiler.begin()
+	for stage, seconds in enumerate(durations):
+		clock.now += seconds
+		profiler.mark(stage)
+	profiler.end()
+
+
+def test_stage_times_land_in_their_buckets(host, clock, profiler):
+	FrameProfiler = host.namespace["FrameProfiler"]
+	frame(profiler, clock, 0.000005, 0, 0.00003)
+	frame(profiler, clock, 0.000005, 0, 0.03)
+
+	report = profiler.report()
+	sync = report["stages"]["sync"]
+	assert sync["histogram"][FrameProfiler.EDGES.index(0.00005)] == 1
+	assert sync["histogram"][-1] == 1
+	assert sync["max"] == pytest.approx(0.03)
+	assert report["stages"]["input"]["histogram"][0] == 2
+	assert report["stages"]["flaps"]["count"] == 0
+	assert report["stages"]["frame"]["count"] == report["frames"] == 2
+
+
+def test_frames_over_budget_are_flagged_with_their_breakdown(clock, profiler):
+	frame(profiler, clock, 0.0001, 0.0001)
+	frame(profiler, clock, 0.0001, 0, 0.0001, 0.0001, 0.0001, 0.003)
+
+	assert profiler.overruns == 1
+	assert profiler.lastOverrun["pose"] == pytest.approx(0.003)
+	assert profiler.lastOverrun["frame"] == pytest.approx(0.0034)
+
+
+def test_trackir_stalls_are_counted_once_per_gap(clock, profiler):
+	frame(profiler, clock)
+	assert profiler.stalls == 0
+
+	profiler.sample()
+	for _ in range(3):
+		clock.now += 0.06
+		frame(profiler, clock)
+	profiler.sample()
+	frame(profiler, clock)
+
+	assert profiler.stalls == 1
+	assert profiler.stalled is False
+
+
+def test_reports_export_as_csv_and_json(clock, profiler, tmp_path):
+	frame(profiler, clock, 0.0001)
+
+	profiler.export(str(tmp_path / "profile.csv"))
+	profiler.export(str(tmp_path / "profile.json"))
+
+	rows = (tmp_path / "profile.csv").read_text().splitlines()
+	assert rows[0].startswith("stage,count,mean_us,max_us,le_10us,")
+	assert rows[1].startswith("input,1,100.0,100.0,")
+	assert json.loads((tmp_path / "profile.json").read_text())["frames"] == 1
+
+
+def test_application_profiles_every_stage():
+	host = FreePieHost(timeline=game_timeline(120))
+	host.run(120)
+
+	stages = host.app.state.profiler.report()["stages"]
+	assert stages["frame"]["count"] == 120
+	for name in ("input", "timers", "sync", "bindings", "diagnostics"):
+		assert stages[name]["count"] == 120
+	assert stages["pose"]["count"] == stages["output"]["count"] > 0
+
+
+def test_export_binding_prints_csv_without_a_path():
+	keys = ["LeftAlt", "LeftControl", "LeftShift", "F10"]
+	host = FreePieHost(timeline=InputTimeline().hold_keys(3, keys))
+	host.run(5)
+
+	assert host.diagnostics.messages[0].startswith("stage,count,")
+	assert len(host.diagnostics.messages) == 1 + 11
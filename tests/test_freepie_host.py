@@ -0,0 +1,54 @@
+import struct
+
+from tools.freepie_host import FreePieHost, InputTimeline, game_timeline, percentile, summarize, tuning_timeline
+
+
+def test_script_runs_headless_and_sends_one_packet_per_frame():
+	host = FreePieHost(timeline=game_timeline(200))
+
+	host.run(200)
+
+	assert len(host.packets) == 200
+	data, address = host.packets[-1]
+	assert len(data) == struct.calcsize("<dddddd")
+	assert address == ("127.0.0.1", 5555)
+
+
+def test_preset_key_chord_loads_preset():
+	timeline = InputTimeline().hold_key(2, "UpArrow", 3).hold_key(3, "NumberPad1")
+	host = FreePieHost(timeline=timeline)
+
+	host.run(6)
+
+	assert host.speech.said == ["reset preset loaded", "lagg preset loaded"]
+	assert host.app.state.preset.deltaX1 == 1.2804
+
+
+def test_scroll_lock_toggle_switches_to_tuning_mode():
+	host = FreePieHost(timeline=tuning_timeline(30))
+
+	modes = [mode for mode, _ in host.run(30)]
+
+	assert modes[10] == "game"
+	assert modes[11] == "tuning"
+	assert host.app.state.tuneMode.name == "isAuto"
+
+
+def test_clock_is_deterministic():
+	host = FreePieHost(fps=100.0, start_time=50.0)
+
+	host.run(10)
+
+	assert abs(host.clock.now - 50.1) < 1e-9
+
+
+def test_summarize_reports_nearest_rank_percentiles():
+	samples = [("game", n / 1e6) for n in range(1, 101)]
+
+	report = summarize(samples)
+
+	assert report["game"]["frames"] == 100
+	assert abs(report["game"]["p50_us"] - 50) < 1e-6
+	assert abs(report["game"]["p99_us"] - 99) < 1e-6
+	assert abs(report["game"]["max_us"] - 100) < 1e-6
+	assert percentile([], 0.5) == 0.0
@@ -0,0 +1,140 @@
+import struct
+
+import pytest
+
+from tools.freepie_host import DEFAULT_SCRIPT, FreePieHost
+
+PORT = 4322
+
+
+def packet(flaps=None, eas=None, tick=7, packet_id=0x54000101, others=((2, (1.0, 2.0, 3.0)),)):
+	indicators = list(others)
+	if eas is not None:
+		indicators.append((6, (eas,)))
+	if flaps is not None:
+		indicators.append((11, (flaps, 0.5)))
+	body = b"".join(
+		struct.pack("<HB", indicator, len(values)) + struct.pack("<{}f".format(len(values)), *values)
+		for indicator, values in indicators
+	) + b"\x00"  # no events
+	header = struct.Struct("<IHIB")
+	return header.pack(packet_id, header.size + len(body), tick, len(indicators)) + body
+
+
+@pytest.fixture
+def host(tmp_path):
+	with open(DEFAULT_SCRIPT) as handle:
+		source = handle.read()
+	script = tmp_path / "aom.py"
+	script.write_text(source.replace("TELEMETRY_PORT      = None", "TELEMETRY_PORT      = {}".format(PORT)))
+	host = FreePieHost(str(script))
+	host.step()
+	return host
+
+
+def test_telemetry_is_off_unless_a_port_is_set():
+	host = FreePieHost()
+	host.step()
+
+	assert host.app.state.telemetry is None
+	assert host.sockets == [host.app.state.transport.socket]
+
+
+def test_the_socket_listens_on_the_loopback_interface_only(host):
+	assert host.app.state.telemetry.socket.address == ("127.0.0.1", PORT)
+
+
+def test_pending_datagrams_are_drained_once_per_frame(host):
+	telemetry = host.app.state.telemetry
+	host.deliver(PORT, packet(flaps=0.25, eas=50.0, tick=1))
+	host.deliver(PORT, packet(flaps=0.5, tick=2))
+	host.step()
+
+	assert (telemetry.tick, telemetry.flaps, telemetry.eas) == (2, 0.5, 50.0)
+	assert telemetry.received == 2
+	assert telemetry.fresh(host.clock.now)
+	assert not telemetry.fresh(host.clock.now + 1.0)
+
+
+@pytest.mark.parametrize("data", [
+	packet(flaps=0.5, packet_id=0x54000102),
+	packet(flaps=0.5)[:-1],
+	packet(flaps=0.5)[:8],
+	packet(),
+])
+def test_malformed_or_foreign_packets_are_rejected(host, data):
+	telemetry = host.app.state.telemetry
+	host.deliver(PORT, data)
+	host.step()
+
+	assert telemetry.flaps is None
+	assert telemetry.rejected == 1
+
+
+def test_flap_position_is_clamped(host):
+	host.deliver(PORT, packet(flaps=1.3))
+	host.step()
+
+	assert host.app.state.telemetry.flaps == 1.0
+
+
+def flaps_keys(host, since):
+	return [event for event in host.keyboard.emitted[since:] if event[1] in ("F", "LeftShift")]
+
+
+def test_opening_releases_the_keys_when_the_flaps_reach_the_target(host):
+	flaps = host.app.state.flaps_control
+	host.deliver(PORT, packet(flaps=0.0))
+	host.step()
+	since = len(host.keyboard.emitted)
+	flaps.open_flap(host.clock.now)
+	host.step()
+
+	assert flaps_keys(host, since) == [("down", "F")]
+
+	host.deliver(PORT, packet(flaps=0.6))
+	host.step()
+	assert flaps_keys(host, since) == [("down", "F")]
+
+	host.deliver(PORT, packet(flaps=1.0))
+	host.step()
+	assert flaps_keys(host, since) == [("down", "F"), ("up", "F")]
+	assert flaps.isFlapOpend() and not flaps.flap_flags["is_flap_opening"]
+
+
+def test_closing_releases_the_keys_once_the_flaps_are_up(host):
+	flaps = host.app.state.flaps_control
+	flaps.flap_flags["flap_opened"] = True
+	host.deliver(PORT, packet(flaps=1.0))
+	host.step()
+	since = len(host.keyboard.emitted)
+	flaps.close_flap(host.clock.now)
+	host.step()
+	host.deliver(PORT, packet(flaps=0.0))
+	host.step()
+
+	assert flaps_keys(host, since) == [("down", "F"), ("down", "LeftShift"), ("up", "F"), ("up", "LeftShift")]
+	assert not flaps.isFlapOpend()
+
+
+def test_without_fresh_telemetry_the_keys_are_held_for_the_timed_duration(host):
+	flaps = host.app.state.flaps_control
+	host.deliver(PORT, packet(flaps=0.0))
+	host.step()
+	host.run(40)  # the sample goes stale after half a second
+	since = len(host.keyboard.emitted)
+	flaps.open_flap(host.clock.now)
+	host.run(3 * 60)
+
+	assert flaps_keys(host, since) == [("down", "F")]
+
+	host.run(2)
+	assert flaps_keys(host, since) == [("down", "F"), ("up", "F")]
+
+
+def test_flaps_moved_from_the_cockpit_start_the_reminder(host):
+	host.deliver(PORT, packet(flaps=0.4))
+	host.run(70)
+
+	assert host.app.state.flaps_control.isFlapOpend()
+	assert "Flaps" in host.speech.said
@@ -0,0 +1,70 @@
+from collections import Counter
+
+from tools.freepie_host import FreePieHost, game_timeline
+
+
+def counting(counter, name, read):
+	def wrapper(code):
+		counter[(name, code)] += 1
+		return read(code)
+	return wrapper
+
+
+def test_each_bound_input_is_read_once_per_frame():
+	host = FreePieHost(timeline=game_timeline(200))
+	reads = Counter()
+	host.keyboard.getKeyDown = counting(reads, "down", host.keyboard.getKeyDown)
+	host.keyboard.getPressed = counting(reads, "pressed", host.keyboard.getPressed)
+	host.run(100)
+
+	reads.clear()
+	host.run(1)
+
+	assert reads
+	assert max(reads.values()) == 1
+	assert reads[("down", "RightShift")] == 1
+
+
+def test_lock_keys_use_one_bulk_key_state_read_per_frame():
+	host = FreePieHost()
+	calls = []
+	host.step()
+	user32 = host.app.state.input.keyState._user32
+	bulk_read = user32.GetKeyboardState
+	user32.GetKeyboardState = lambda buffer: calls.append(1) or bulk_read(buffer)
+
+	host.run(5)
+
+	assert len(calls) == 5
+
+
+def test_memory_key_state_backend_runs_without_win32():
+	host = FreePieHost()
+	host.step()
+	namespace = host.namespace
+	key_state = namespace["MemoryKeyState"]()
+	snapshot = namespace["InputSnapshot"](key_state)
+	slot = snapshot.input("ScrollLock", "toggled")
+
+	key_state.toggled.add(namespace["LOCK_KEYS"]["ScrollLock"])
+	snapshot.capture()
+
+	assert snapshot.values[slot] is True
+
+
+def test_inputs_are_deduplicated_into_shared_slots():
+	host = FreePieHost()
+	host.step()
+	snapshot = host.namespace["InputSnapshot"](host.namespace["MemoryKeyState"]())
+
+	first = snapshot.input("RightShift", "down")
+	second = snapshot.input("RightShift", "down")
+	pressed = snapshot.input("RightShift", "pressed")
+	button = snapshot.input("Throttle button 3", "down")
+	axis = snapshot.axis("Stick y")
+
+	assert first == second
+	assert len(set([first, pressed, button, axis])) == 4
+	host.joystick[1].y = 750
+	snapshot.capture()
+	assert snapshot.values[axis] == 750
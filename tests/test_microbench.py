@@ -0,0 +1,76 @@
+import pytest
+
+from tools import microbench
+from tools.freepie_host import DEFAULT_SCRIPT
+
+
+@pytest.fixture(scope="module")
+def results():
+	return microbench.run(number=200, repeat=1)
+
+
+def test_every_case_is_measured(results):
+	assert set(results) == set(name for name, _ in microbench.cases())
+	for result in results.values():
+		assert result["ns"] >= 0 and result["bytes"] >= 0 and result["blocks"] >= 0
+
+
+def test_the_pose_output_path_does_not_allocate(results):
+	for name in ("gameMode.sendPose", "transport.pack", "calc.compute_auto_xyz/corner", "calc.compute_fake_xyz"):
+		assert results[name]["bytes"] == 0, name
+
+
+def test_the_busy_dispatch_fires_actions(host):
+	state = host.app.state
+	gun = state.game.isGunViewAtCenter
+	state.input.values[:] = microbench._busy_values(host.app)
+	state.poseDirty = False
+	host.app.bindings.dispatch(state)
+
+	assert state.poseDirty
+	assert state.game.isGunViewAtCenter != gun
+
+
+def test_compare_flags_slowdowns_beyond_the_threshold_and_noise():
+	baseline = {
+		"slower": {"ns": 1000.0, "bytes": 0, "blocks": 0},
+		"noisy": {"ns": 40.0, "bytes": 0, "blocks": 0},
+		"steady": {"ns": 1000.0, "bytes": 0, "blocks": 0},
+	}
+	results = {
+		"slower": {"ns": 1300.0, "bytes": 0, "blocks": 0},
+		"noisy": {"ns": 60.0, "bytes": 0, "blocks": 0},
+		"steady": {"ns": 1200.0, "bytes": 0, "blocks": 0},
+		"new": {"ns": 5000.0, "bytes": 64, "blocks": 0},
+	}
+
+	assert [name for name, _ in microbench.compare(baseline, results)] == ["slower"]
+	assert microbench.compare(baseline, results, threshold=0.5) == []
+
+
+def test_compare_flags_any_new_allocation():
+	baseline = {"case": {"ns": 100.0, "bytes": 48, "blocks": 0}}
+
+	assert microbench.compare(baseline, {"case": {"ns": 100.0, "bytes": 48, "blocks": 0}}) == []
+	assert microbench.compare(baseline, {"case": {"ns": 90.0, "bytes": 96, "blocks": 0}}) == [
+		("case", "96 bytes/call, baseline 48"),
+	]
+
+
+def test_saved_baselines_load_back(tmp_path, results):
+	path = str(tmp_path / "bench" / "baseline.json")
+	microbench.save(results, path)
+
+	assert microbench.load(path) == results
+	assert microbench.main(["--only", "transport", "--number", "50", "--repeat", "1", "--check", "--baseline", path, "--threshold", "1000"]) == 0
+
+
+def test_check_measures_the_reference_script_in_the_same_run(capsys):
+	arguments = ["--only", "transport", "--number", "50", "--repeat", "1", "--threshold", "1000"]
+
+	assert microbench.main(arguments + ["--check", "--reference", DEFAULT_SCRIPT]) == 0
+	assert "0 regressions" in capsys.readouterr().out
+	baseline, results = microbench.run_against(DEFAULT_SCRIPT, only="transport", number=50, repeat=1)
+	assert set(baseline) == set(results) == {"transport.pack"}
+	baseline, results = microbench.run_against(DEFAULT_SCRIPT, names={"input.capture"}, number=50, repeat=1)
+	assert set(baseline) == set(results) == {"input.capture"}
@@ -0,0 +1,170 @@
+import struct
+
+import pytest
+
+from tools.freepie_host import FreePieHost
+
+ZERO = struct.pack("<dddddd", 0, 0, 0, 0, 0, 0)
+
+
+class Sampler(object):
+	def __init__(self):
+		self.time = None
+
+	def __call__(self):
+		return self.time
+
+
+@pytest.fixture
+def sampler():
+	return Sampler()
+
+
+@pytest.fixture
+def scheduler(host, sampler):
+	starts = []
+	scheduler = host.namespace["PoseScheduler"](
+		host.app.state.transport, 250, delay=0.01, maxExtrapolation=0.02, sampleTime=sampler, start=starts.append,
+	)
+	scheduler.starts = starts
+	del host.packets[:]
+	return scheduler
+
+
+def publish(scheduler, sampler, time, yaw):
+	sampler.time = time
+	scheduler.send(0, 0, 0, yaw, 0, 0)
+
+
+def test_poses_are_interpolated_between_the_two_latest_samples(scheduler, sampler):
+	publish(scheduler, sampler, 1.0, 10.0)
+	publish(scheduler, sampler, 1.01, 20.0)
+
+	assert scheduler.pose(1.015)[3] == pytest.approx(15.0)
+	assert scheduler.pose(1.0)[3] == 10.0
+
+
+def test_extrapolation_past_the_newest_sample_is_bounded(scheduler, sampler):
+	publish(scheduler, sampler, 1.0, 10.0)
+	publish(scheduler, sampler, 1.01, 20.0)
+
+	assert scheduler.pose(1.03)[3] == pytest.approx(30.0)
+	assert scheduler.pose(5.0)[3] == pytest.approx(40.0)
+
+
+def test_a_pose_without_a_new_sample_is_a_cut(scheduler, sampler):
+	publish(scheduler, sampler, 1.0, 10.0)
+	publish(scheduler, sampler, 1.01, 20.0)
+	publish(scheduler, sampler, 1.01, 0.0)
+
+	assert scheduler.pose(1.015)[3] == 0.0
+
+
+def test_ticks_send_through_the_transport(host, scheduler, sampler):
+	publish(scheduler, sampler, 1.0, 10.0)
+	publish(scheduler, sampler, 1.01, 20.0)
+
+	for tick in range(3):
+		scheduler.tick(1.015 + tick * 0.004)
+
+	yaws = [struct.unpack("<dddddd", data)[3] for data, _ in host.packets]
+	assert yaws == pytest.approx([15.0, 19.0, 23.0])
+	assert scheduler.ticks == 3
+
+
+def test_the_worker_starts_once_and_restarts_after_going_stale(scheduler, sampler):
+	publish(scheduler, sampler, 1.0, 10.0)
+	publish(scheduler, sampler, 1.01, 20.0)
+	assert len(scheduler.starts) == 1
+
+	scheduler.stale = 0
+	scheduler.starts[0]()
+	publish(scheduler, sampler, 1.02, 30.0)
+
+	assert len(scheduler.starts) == 2
+
+
+def test_per_frame_output_is_the_default(host):
+	assert host.app.state.output is host.app.state.transport
+
+
+@pytest.mark.parametrize("fps", [30.0, 60.0, 144.0])
+def test_recenter_timing_does_not_depend_on_the_frame_rate(fps):
+	host = FreePieHost(fps=fps)
+	host.run(2)
+	host.trackIR.set_pose(10.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+	host.app.state.recenter()
+	since = host.app.state.now
+
+	pressed = tracking = None
+	while tracking is None:
+		now = host.clock.now
+		del host.packets[:]
+		host.step()
+		if pressed is None and host.keyboard.emitted:
+			pressed = now - since
+		if host.packets[0][0] != ZERO:
+			tracking = now - since
+
+	# each timer fires on the first frame at or after its deadline (1e-9 absorbs clock rounding)
+	assert 0.1 - 1e-9 <= pressed < 0.1 + 1.0 / fps + 1e-9
+	assert 0.2 - 1e-9 <= tracking < 0.2 + 1.0 / fps + 1e-9
+
+
+def test_recenter_counts_from_the_frame_time_not_the_clock(host):
+	state = host.app.state
+	host.clock.advance(0.15)
+	state.recenter()
+
+	assert state.centerPress.due == state.now + 0.1
+	assert state.centerSettle.due == state.now + 0.2
+
+
+class WorkerClock(object):
+	"""perf_counter and time.sleep for a worker run: a sleep takes at least a 0.2 ms time slice."""
+
+	def __init__(self):
+		self.now = 1.0
+		self.sleeps = 0
+		self.unslept = 0
+
+	def read(self):
+		# a worker reading the clock again and again without sleeping is spinning
+		self.unslept += 1
+		assert self.unslept <= 10
+		return self.now
+
+	def sleep(self, seconds):
+		assert seconds >= 0
+		self.sleeps += 1
+		self.unslept = 0
+		self.now += max(seconds, 0.0002)
+
+
+class CountingLock(object):
+	def __init__(self):
+		self.taken = 0
+
+	def __enter__(self):
+		self.taken += 1
+
+	def __exit__(self, *exc):
+		return False
+
+
+def test_the_worker_sleeps_between_ticks_and_checks_the_heartbeat_once_per_tick(host, monkeypatch):
+	clock = WorkerClock()
+	monkeypatch.setitem(host.namespace, "perf_counter", clock.read)
+	monkeypatch.setattr(host.namespace["time"], "sleep", clock.sleep)
+	scheduler = host.namespace["PoseScheduler"](host.app.state.transport, 250, stale=0.1, start=lambda loop: None)
+	scheduler.send(0, 0, 0, 10.0, 0, 0)
+	scheduler._lock = lock = CountingLock()
+
+	scheduler._loop()
+
+	# 100 ms at 4 ms a tick, then the check that finds the heartbeat stale
+	assert 25 <= scheduler.ticks <= 26
+	# once for the heartbeat and once to read the pose per tick
+	assert lock.taken == 2 * scheduler.ticks + 1
+	# it sleeps to just before the tick and yields a few times
+	assert clock.sleeps <= 4 * scheduler.ticks
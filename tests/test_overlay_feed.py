@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import struct
+
+import pytest
+
+from tools.freepie_host import DEFAULT_SCRIPT, REPO_ROOT, FreePieHost
+
+MAPPING = "Local\\AomDesktop.OverlayState"
+EVENT = "Local\\AomDesktop.OverlayUpdated"
+SNAPSHOT_RECORD = os.path.join(REPO_ROOT, "src", "Aom.App", "Services", "Overlay", "OverlaySharedStateSnapshot.cs")
+
+
+def read_packet(view):
+	"""OverlaySharedStatePacket.TryRead: (sequence, snapshot) or None for an unstable frame."""
+	version, length, start, end = struct.unpack_from("<iiqq", view, 0)
+	if version != 1 or length <= 0 or start == 0 or start != end:
+		return None
+	return start, json.loads(bytes(view[24:24 + length]).decode("utf-8"))
+
+
+@pytest.fixture
+def script(tmp_path):
+	with open(DEFAULT_SCRIPT) as handle:
+		source = handle.read()
+	script = tmp_path / "aom.py"
+	script.write_text(source.replace("OVERLAY_MAPPING = None", "OVERLAY_MAPPING = {!r}".format(MAPPING)))
+	return str(script)
+
+
+@pytest.fixture
+def host(script):
+	host = FreePieHost(script)
+	host.run(2)
+	return host
+
+
+def test_the_feed_is_off_unless_a_mapping_is_set():
+	host = FreePieHost()
+	host.step()
+
+	assert host.app.state.overlay is None
+	assert MAPPING not in host.shared_memory
+
+
+def test_the_state_is_published_in_the_overlay_packet_format(host):
+	sequence, snapshot = read_packet(host.shared_memory[MAPPING])
+
+	assert len(host.shared_memory[MAPPING]) == 64 * 1024
+	assert snapshot["currentPresetDisplayName"] == "reset"
+	assert snapshot["runtimeStateSummary"] == "Game mode"
+	assert snapshot["outputPoseSummary"] == "free look"
+	assert snapshot["liveTrackIrStatus"] == "waiting"
+	assert snapshot["isVisible"] is True
+	assert host.wait_handles[EVENT].signals == sequence
+
+
+def test_snapshot_fields_match_the_overlay_snapshot_record(host):
+	with open(SNAPSHOT_RECORD) as handle:
+		parameters = re.findall(r"^\s+\w+ (\w+)[,)]", handle.read(), re.MULTILINE)
+	_, snapshot = read_packet(host.shared_memory[MAPPING])
+
+	assert sorted(snapshot) == sorted(name[0].lower() + name[1:] for name in parameters)
+	# the native reader matches `"key":` without whitespace
+	assert b'"isVisible":true' in bytes(host.shared_memory[MAPPING])
+
+
+def test_the_packet_is_only_written_when_the_shown_state_changes(host):
+	state = host.app.state
+	sequence, _ = read_packet(host.shared_memory[MAPPING])
+	host.run(10)
+
+	assert read_packet(host.shared_memory[MAPPING])[0] == sequence
+
+	state.game.isZoomIn = True
+	state.game.isHeadHigh = True
+	state.checkSix.switchCheckSix()
+	host.run(3)
+	changed, snapshot = read_packet(host.shared_memory[MAPPING])
+
+	assert changed == sequence + 1
+	assert snapshot["outputPoseSummary"] == "zoom in, head high"
+	assert snapshot["runtimeStateSummary"] == "Game mode, check six"
+
+
+def test_preset_tune_mode_and_flaps_show_up(host):
+	state = host.app.state
+	state.select("lagg")
+	host.keyboard.toggle("ScrollLock")
+	host.step()
+	state.tuneMode.name = "isAuto"
+	state.flaps_control.open_flap(host.clock.now)
+	host.trackIR.set_pose(0, 0, 0, 0, 0, 0)
+	host.step()
+	_, snapshot = read_packet(host.shared_memory[MAPPING])
+
+	assert snapshot["currentPresetDisplayName"] == "lagg"
+	assert snapshot["runtimeStateSummary"] == "Tune mode: isAuto, flaps opening"
+	assert snapshot["liveTrackIrStatus"] == "connected"
+
+
+def test_a_packet_longer_than_the_last_one_is_replaced_whole(host):
+	feed = host.app.state.overlay
+	feed.write(b'{"currentPresetDisplayName":"' + b"x" * 500 + b'"}')
+	feed.write(b'{"isVisible":false}')
+
+	assert read_packet(host.shared_memory[MAPPING])[1] == {"isVisible": False}
+
+
+def test_the_sequence_continues_from_the_previous_writer(script):
+	host = FreePieHost(script)
+	view = host.shared_memory[MAPPING] = bytearray(64 * 1024)
+	struct.pack_into("<iiqq", view, 0, 1, 2, 41, 41)
+	host.step()
+
+	assert read_packet(host.shared_memory[MAPPING])[0] == 42
@@ -0,0 +1,82 @@
+import runpy
+import threading
+
+import pytest
+
+from tools.freepie_host import DEFAULT_SCRIPT, FreePieHost, InputTimeline
+
+
+def test_no_assembly_is_loaded_until_a_preset_is_copied():
+	timeline = InputTimeline()
+	for frame in (10, 20):
+		timeline.hold_key(frame, "UpArrow", 2).hold_key(frame, "NumberPadPeriod")
+	host = FreePieHost(timeline=timeline)
+	host.run(5)
+
+	assert host.references == []
+
+	host.run(20)
+	assert host.references == ["System.Windows.Forms"]
+	assert host.clipboard.text is not None
+	assert host.speech.said.count("preset copied") == 2
+
+
+@pytest.fixture(scope="module")
+def script():
+	"""aom.py imported by plain CPython: no FreePIE globals, no CLR, no windll."""
+	return runpy.run_path(DEFAULT_SCRIPT, run_name="aom")
+
+
+def test_importing_outside_freepie_only_defines_the_classes(script):
+	assert "app" not in script
+	assert "Application" in script
+
+
+def test_platform_services_fall_back_to_portable_stand_ins(script):
+	Platform = script["Platform"]
+	clipboard = Platform.clipboard()
+	clipboard.SetText("text")
+
+	assert clipboard.text == "text"
+	assert type(Platform.keyState()).__name__ == "MemoryKeyState"
+	assert Platform.event("Local\\AomTest").Set()
+	Platform.say("six")
+
+	ran = threading.Event()
+	Platform.queueWork(ran.set)
+	assert ran.wait(5)
+
+
+def test_core_logic_runs_on_plain_python(script):
+	wheel = script["TimerWheel"](now=0.0)
+	queue = script["SpeechQueue"](wheel)
+	finished = threading.Event()
+	queue.say("Flaps", 2, 1.0)
+	queue.say("Flaps", 2, 1.0)
+	script["Platform"].queueWork(finished.set)
+	finished.wait(5)
+
+	assert queue.limited == 1
+
+	preset = script["LayeredPreset"](script["Presets"].compile()["lagg"])
+	preset.tune("deltaZ1", 2.5)
+	assert preset.undo() and preset.deltaZ1 == preset.base.deltaZ1
+
+
+def test_the_thread_helpers_resolve_the_clr_once(host, monkeypatch):
+	builtins = host.namespace["__builtins__"]
+	host_import = builtins["__import__"]
+	imports = []
+
+	def counting(name, *args, **kwargs):
+		imports.append(name)
+		return host_import(name, *args, **kwargs)
+	monkeypatch.setitem(builtins, "__import__", counting)
+	Platform = host.namespace["Platform"]
+	ran = []
+	for _ in range(3):
+		Platform.queueWork(lambda: ran.append("work"))
+		Platform.startThread(lambda: ran.append("thread"))
+
+	assert ran == ["work", "thread"] * 3
+	assert imports.count("System.Threading") <= 1
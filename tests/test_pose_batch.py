@@ -0,0 +1,96 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tools import pose_batch
+from tools.freepie_host import FreePieHost
+
+
+def scalar_packets(preset_name, axes, flags, host=None):
+	"""Run GameMode.proccessFrame sample by sample with the given flags."""
+	if host is None:
+		host = FreePieHost()
+		host.step()
+	app = host.app
+	state = app.state
+	state.preset = state.presets[preset_name]
+	packets_before = len(host.packets)
+	for index in range(len(axes["yaw"])):
+		for name in pose_batch.FLAG_FIELDS:
+			setattr(state.game, name, bool(flags[name][index]))
+		state.poseDirty = True
+		for name in ("yaw", "pitch", "roll", "x", "y", "z"):
+			setattr(state.trackir, name, float(axes[name][index]))
+		state.input.values[app.gameMode.stickYSlot] = int(axes["stick_y"][index])
+		app.gameMode.proccessFrame()
+	return [data for data, _ in host.packets[packets_before:]], state
+
+
+@pytest.mark.parametrize("preset_name", ["reset", "lagg", "yakodin", "f4", "yakodin and b", "la five"])
+def test_batch_is_bit_identical_to_scalar_path(preset_name):
+	axes, flags = pose_batch.synthetic_session(3000, seed=7)
+	axes["x"] = axes["x"] * 0.5  # straddle the X dead zone
+	expected, state = scalar_packets(preset_name, axes, flags)
+
+	batch = pose_batch.evaluate(state.preset, flags=flags, **axes)
+
+	actual = [row.tobytes() for row in pose_batch.as_packets(batch)]
+	assert actual == expected
+	assert batch.y_offset == state.game.y_offset
+
+
+def test_y_offset_latches_until_yaw_leaves_the_y_zone():
+	batch = pose_batch.evaluate(
+		{}, yaw=[0, 10, 60, 90, 20], pitch=[0] * 5, roll=[0] * 5,
+		x=[0] * 5, y=[1.0, 2.0, 5.0, 7.0, 3.0], z=[0] * 5, y_offset=0.5,
+	)
+
+	assert list(batch.y) == [0.0, 0.0, 3.0, 5.0, 0.0]
+	assert batch.y_offset == 3.0
+
+
+def test_custom_view_samples_do_not_move_the_latch():
+	flags = {"isCustomView": [False, True, False]}
+
+	batch = pose_batch.evaluate(
+		{"deltaY2_4": -4.0}, yaw=[0, 0, 60], pitch=[0] * 3, roll=[0] * 3,
+		x=[0] * 3, y=[1.0, 9.0, 4.0], z=[0] * 3, flags=flags,
+	)
+
+	assert list(batch.y) == [0.0, -4.0, 3.0]
+
+
+def test_dead_zone_is_disabled_while_tuning():
+	args = dict(yaw=[0, 0], pitch=[0, 0], roll=[0, 0], x=[0.5, 1.5], y=[0, 0], z=[0, 0])
+
+	assert list(pose_batch.evaluate({}, **args).x) == [0.0, 1.5]
+	assert list(pose_batch.evaluate({}, tuning=True, **args).x) == [0.5, 1.5]
+
+
+def test_unknown_flag_is_rejected():
+	with pytest.raises(ValueError, match="isSideVeiw"):
+		pose_batch.evaluate({}, [0], [0], [0], [0], [0], [0], flags={"isSideVeiw": [True]})
+
+
+def test_packets_match_struct_layout():
+	batch = pose_batch.evaluate({}, [0], [2.0], [0], [3.0], [0], [4.0])
+
+	assert pose_batch.as_packets(batch)[0].tobytes() == struct.pack("<dddddd", 3.0, 0.0, 4.0, 0.0, 2.0, 0.0)
+
+
+def test_batch_matches_scalar_path_with_curve_tables():
+	axes, flags = pose_batch.synthetic_session(2000, seed=3)
+	host = FreePieHost()
+	host.step()
+	state = host.app.state
+	state.presets["custom"] = host.namespace["PresetRecord"]("custom", {
+		"deltaX1": 1.5, "deltaY1": 2.0, "deltaZ1": 6.0,
+		"curves": {"x": "ease-in-out", "y": ["spline", [[0, 0], [0.4, 0.7], [1, 1]]], "z": ["piecewise", [[0, 0], [1, 1]]]},
+	})
+	expected, state = scalar_packets("custom", axes, flags, host)
+
+	batch = pose_batch.evaluate(state.preset, flags=flags, curves=state.autoCurves, **axes)
+
+	assert [row.tobytes() for row in pose_batch.as_packets(batch)] == expected
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from tools import pose_golden
+
+GOLDEN = pose_golden.load()
+
+
+@pytest.fixture(scope="module")
+def generated():
+	return pose_golden.generate()
+
+
+def test_every_preset_view_and_tune_mode_has_a_golden_case(host):
+	tune_modes = 1 + len(host.namespace["TuneModes"].MODES)
+
+	assert len(GOLDEN) == len(pose_golden.PRESETS) * (len(pose_golden.VIEWS) + tune_modes) + 2
+
+
+@pytest.mark.parametrize("group", ["game", "tune", "scenario"])
+def test_packets_match_the_golden_outputs(generated, group):
+	cases = dict((name, packets) for name, packets in generated.items() if name.startswith(group + "/"))
+	expected = dict((name, packets) for name, packets in GOLDEN.items() if name.startswith(group + "/"))
+
+	assert cases
+	assert pose_golden.compare(expected, cases) == []
+
+
+def test_compare_reports_packets_beyond_the_tolerance():
+	golden = {"case": [[1.0, 0, 0, 0, 0, 0], [2.0, 0, 0, 0, 0, 0]]}
+	actual = {"case": [[1.0 + 1e-12, 0, 0, 0, 0, 0], [2.1, 0, 0, 0, 0, 0], [3.0, 0, 0, 0, 0, 0]]}
+
+	assert pose_golden.compare(golden, actual) == [
+		("case", 1, [2.0, 0, 0, 0, 0, 0], [2.1, 0, 0, 0, 0, 0]),
+		("case", 2, None, [3.0, 0, 0, 0, 0, 0]),
+	]
+	assert len(pose_golden.compare(golden, actual, tolerance=0.2)) == 1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_x_inside_the_dead_zone_is_dropped_outside_the_auto_corner(host, seed):
+	rng = random.Random(seed)
+	state = host.app.state
+	calc = host.app.gameMode.calc
+	for _ in range(200):
+		yaw = rng.uniform(-state.autoCornerStart, state.autoCornerStart)
+		x = rng.uniform(-3, 3)
+		fake_x = calc._compute_fake_xyz(yaw, 0, 0, x, 0, 0, 0, 0, 0, 0, 0, 0)[3]
+
+		assert fake_x == (x if abs(x) >= 1 else 0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_the_dead_zone_is_off_while_tuning(host, seed):
+	rng = random.Random(seed)
+	calc = host.app.gameMode.calc
+	host.app.state.tuneMode = host.namespace["TuneMode"]()
+	for _ in range(200):
+		x = rng.uniform(-1, 1)
+
+		assert calc._compute_fake_xyz(0, 0, 0, x, 0, 0, 0, 0, 0, 0, 0, 0)[3] == x
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_side_view_x_mirrors_at_the_boundary(host, seed):
+	rng = random.Random(seed)
+	state = host.app.state
+	calc = host.app.gameMode.calc
+	state.game.isSideView = True
+	for _ in range(50):
+		boundary = rng.uniform(60, 170)
+		state.autoCornerX_end = boundary
+		state.preset.deltaX2_1 = shift = rng.uniform(-3, 3)
+		yaw = rng.uniform(1e-6, boundary - 1e-6)
+
+		# inside the boundary X leans away from the turn, past it three times as far into it
+		assert calc._compute_manual_x(yaw) == abs(shift)
+		assert calc._compute_manual_x(-yaw) == -abs(shift)
+		assert calc._compute_manual_x(boundary) == -abs(shift * 3)
+		assert calc._compute_manual_x(-boundary) == -abs(shift)
+		assert calc._compute_manual_x(-boundary - 1e-6) == abs(shift * 3)
+		assert calc._compute_manual_x(rng.uniform(boundary, 180)) == -abs(shift * 3)
+		assert calc._compute_manual_x(0) == -abs(shift)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_no_auto_corner_shift_up_to_the_corner_start(host, seed):
+	rng = random.Random(seed)
+	state = host.app.state
+	state.select("lagg")
+	calc = host.app.gameMode.calc
+	assert calc._compute_auto_xyz(-state.autoCornerStart) == (0, 0, 0)
+	for _ in range(200):
+		yaw = rng.uniform(-state.autoCornerStart, state.autoCornerStart)
+
+		assert calc._compute_auto_xyz(yaw) == (0, 0, 0)
@@ -0,0 +1,98 @@
+import mmap as real_mmap
+import struct
+
+import pytest
+
+from tools import pose_reader
+from tools.freepie_host import DEFAULT_SCRIPT, FreePieHost
+
+MAPPING = "Local\\AomPose.Output"
+
+
+def sinks_script(tmp_path, sinks):
+	with open(DEFAULT_SCRIPT) as handle:
+		source = handle.read()
+	source = source.replace('OUTPUT_SINKS = ("udp",)', "OUTPUT_SINKS = {!r}".format(sinks))
+	script = tmp_path / "aom.py"
+	script.write_text(source)
+	return str(script)
+
+
+@pytest.fixture
+def host(tmp_path):
+	host = FreePieHost(sinks_script(tmp_path, ("udp", "shm")))
+	host.step()
+	return host
+
+
+def test_udp_is_the_only_sink_by_default():
+	host = FreePieHost()
+	host.step()
+
+	assert type(host.app.state.transport).__name__ == "PoseTransport"
+	assert MAPPING not in host.shared_memory
+
+
+def test_every_pose_lands_in_both_sinks(host):
+	host.trackIR.set_pose(12.0, 3.0, 0.0, 1.5, 0.5, 0.25)
+	host.run(3)
+	pose = pose_reader.read(host.shared_memory[MAPPING])
+
+	assert struct.pack("<6d", *pose[2:]) == host.packets[-1][0]
+	assert pose.sequence == 2 * len(host.packets)
+	assert pose.time == host.clock.now - host.clock.step
+	assert host.app.state.transport.sent == 2 * len(host.packets)
+
+
+def test_the_shared_memory_sink_alone_sends_no_packets(tmp_path):
+	host = FreePieHost(sinks_script(tmp_path, ("shm",)))
+	host.run(5)
+
+	assert host.packets == []
+	assert pose_reader.read(host.shared_memory[MAPPING]).sequence == 10
+
+
+def test_a_slot_being_written_is_not_read(host):
+	view = host.shared_memory[MAPPING]
+	struct.pack_into("<Q", view, 8, 7)
+
+	assert pose_reader.read(view, attempts=3) is None
+
+
+def test_the_reader_returns_each_pose_once(host):
+	reader = pose_reader.PoseReader(host.shared_memory[MAPPING])
+
+	assert reader.poll() is not None
+	assert reader.poll() is None
+
+	host.step()
+	assert reader.poll().sequence == reader.sequence
+
+
+def test_the_sequence_continues_from_the_previous_writer(tmp_path):
+	host = FreePieHost(sinks_script(tmp_path, ("shm",)))
+	view = host.shared_memory[MAPPING] = bytearray(72)
+	struct.pack_into("<Q", view, 8, 41)
+	host.step()
+
+	assert pose_reader.read(view).sequence == 44
+
+
+def test_unknown_sinks_are_rejected(host):
+	PoseSinks = host.namespace["PoseSinks"]
+
+	with pytest.raises(ValueError, match="pipe"):
+		PoseSinks.create(("udp", "pipe"))
+	with pytest.raises(ValueError):
+		PoseSinks.create(())
+
+
+def test_a_sink_the_platform_cannot_open_is_left_out(host, monkeypatch):
+	# named mappings are Windows only: elsewhere mmap rejects the tagname
+	monkeypatch.setattr(host.namespace["mmap"], "mmap", real_mmap.mmap)
+	PoseSinks = host.namespace["PoseSinks"]
+
+	assert type(PoseSinks.create(("udp", "shm"))).__name__ == "PoseTransport"
+	assert host.diagnostics.messages[-1].startswith("Pose output 'shm' disabled")
+	with pytest.raises(ValueError, match="could be opened"):
+		PoseSinks.create(("shm",))
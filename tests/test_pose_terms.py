@@ -0,0 +1,122 @@
+import struct
+
+import pytest
+
+
+MODIFIERS = ["LeftAlt", "LeftControl", "LeftShift"]
+
+
+@pytest.fixture
+def host(host):
+	host.app.state.select("lagg")
+	host.trackIR.set_pose(10.0, 2.0, 0.0, 1.5, 0.3, 0.25)
+	host.step()
+	return host
+
+
+def last_pose(host):
+	return struct.unpack("<6d", host.packets[-1][0])
+
+
+@pytest.fixture
+def rebuilds(host, monkeypatch):
+	PoseTerms = type(host.app.gameMode.terms)
+	update = PoseTerms.update
+	calls = []
+
+	def counting(self, state, calc):
+		calls.append(state.preset.name)
+		update(self, state, calc)
+	monkeypatch.setattr(PoseTerms, "update", counting)
+	return calls
+
+
+def test_terms_are_rebuilt_only_after_an_action(host, rebuilds):
+	host.run(30)
+	assert rebuilds == []
+
+	for key in MODIFIERS + ["F5"]:
+		host.keyboard.press(key)
+	host.step()
+	for key in MODIFIERS + ["F5"]:
+		host.keyboard.release(key)
+	host.run(30)
+
+	assert len(rebuilds) == 1
+	assert last_pose(host)[2] == 0.25 + host.app.state.preset.deltaZ2_1
+
+
+def test_a_preset_switch_marks_the_terms_dirty(host):
+	host.app.state.game.isZoomIn = True
+	host.app.state.poseDirty = True
+	host.step()
+	zoomed = last_pose(host)[2]
+
+	host.app.state.select("reset")
+	host.step()
+
+	assert zoomed == 0.25 - 4.0
+	assert last_pose(host)[2] == 0.25
+
+
+def test_flags_written_without_marking_keep_the_cached_terms(host):
+	before = last_pose(host)
+	host.app.state.game.isZoomIn = True
+	host.step()
+
+	assert last_pose(host) == before
+
+	host.app.state.poseDirty = True
+	host.step()
+	assert last_pose(host) != before
+
+
+def test_the_gun_view_offsets_are_cached_terms(host):
+	state = host.app.state
+	before = last_pose(host)
+	state.game.isGunViewAtCenter = True
+	host.step()
+
+	assert last_pose(host) == before
+
+	state.poseDirty = True
+	host.step()
+	assert (host.app.gameMode.terms.gunX, host.app.gameMode.terms.gunY) == (state.preset.deltaX0, state.preset.deltaY0)
+	assert last_pose(host)[0] == pytest.approx(before[0] + state.preset.deltaX0)
+
+
+def test_the_custom_view_sends_its_fixed_pose(host):
+	preset = host.app.state.preset
+	host.joystick[0].press(2)
+	host.step()
+	host.trackIR.set_pose(-120.0, 7.0, 0.0, 3.0, 1.0, 2.0)
+	host.step()
+
+	assert last_pose(host) == (preset.deltaX2_4, preset.deltaY2_4, preset.deltaZ2_4, preset.syaw, preset.spitch, 0)
+
+
+def test_tuning_leaves_game_mode_to_rebuild_its_terms(host):
+	host.keyboard.toggle("ScrollLock")
+	host.run(3)
+	host.keyboard.toggle("ScrollLock")
+	host.run(3)
+
+	# the tune modes set the gun view and head flags; game mode must not reuse its old terms
+	game = host.app.state.game
+	assert game.isGunViewAtCenter
+	assert last_pose(host)[0] == pytest.approx(1.5 + host.app.state.preset.deltaX0)
+
+
+def test_game_mode_runs_the_helpers_tuning_mode_uses(host, monkeypatch):
+	# one implementation of the pose math: the helper property tests cover game mode too
+	Helpers = type(host.app.gameMode.calc)
+	compute = Helpers._compute_fake_xyz
+	calls = []
+
+	def counting(self, *args):
+		calls.append(args[0])
+		return compute(self, *args)
+	monkeypatch.setattr(Helpers, "_compute_fake_xyz", counting)
+	host.run(3)
+
+	assert calls == [10.0, 10.0, 10.0]
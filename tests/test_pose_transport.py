@@ -0,0 +1,55 @@
+import socket
+import struct
+
+
+def transport(host, **kwargs):
+	del host.packets[:]
+	return host.namespace["PoseTransport"](("127.0.0.1", 5555), **kwargs)
+
+
+def test_packets_go_through_the_connected_socket(host):
+	output = transport(host)
+	buffer = output.packet
+
+	output.send(1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+	output.send(1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+
+	assert output.socket.address == ("127.0.0.1", 5555)
+	assert host.packets == [(struct.pack("<dddddd", 1, 2, 3, 4, 5, 6), ("127.0.0.1", 5555))] * 2
+	assert output.packet is buffer
+	assert (output.sent, output.skipped, output.failed) == (2, 0, 0)
+
+
+def test_unchanged_poses_are_skipped_until_the_keepalive(host):
+	output = transport(host, epsilon=0.01, keepalive=0.5)
+
+	output.send(0, 0, 0, 10.0, 0, 0)
+	output.send(0, 0, 0, 10.005, 0, 0)
+	host.clock.advance(0.2)
+	output.send(0, 0, 0, 10.0, 0, 0)
+	output.send(0, 0, 0, 10.5, 0, 0)
+	host.clock.advance(0.6)
+	output.send(0, 0, 0, 10.5, 0, 0)
+
+	yaws = [struct.unpack("<dddddd", data)[3] for data, _ in host.packets]
+	assert yaws == [10.0, 10.5, 10.5]
+	assert (output.sent, output.skipped) == (3, 2)
+
+
+def test_send_errors_are_counted_not_raised(host):
+	output = transport(host)
+
+	def refused(data):
+		raise socket.error("connection refused")
+	output.socket.send = refused
+
+	assert output.send(0, 0, 0, 0, 0, 0) is False
+	assert (output.sent, output.failed) == (0, 1)
+
+
+def test_game_mode_counts_one_packet_per_frame(host):
+	host.run(10)
+
+	output = host.app.state.output
+	assert output.sent == len(host.packets) == 11
+	assert output.skipped == output.failed == 0
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+
+@pytest.fixture
+def create(host):
+	return host.namespace["PoseFilter"].create
+
+
+def run(stage, samples, rate=120.0):
+	return [stage.update(value, index / rate) for index, value in enumerate(samples)]
+
+
+def test_velocity_prediction_extrapolates_by_the_lead(create):
+	stage = create(["velocity", {"lead": 0.025}])
+
+	outputs = run(stage, [0.0, 1.2, 2.4, 3.6])
+
+	assert outputs[0] == 0.0
+	assert outputs[-1] == pytest.approx(3.6 + 144.0 * 0.025)
+
+
+def test_alpha_beta_locks_onto_a_constant_rate(create):
+	stage = create(["alpha-beta", {"alpha": 0.5, "beta": 0.2, "lead": 0.05}])
+
+	outputs = run(stage, [index * 0.5 for index in range(600)])
+
+	assert outputs[-1] == pytest.approx(599 * 0.5 + 60.0 * 0.05, abs=1e-6)
+
+
+def test_one_euro_smooths_jitter_around_a_still_head(create):
+	rng = random.Random(7)
+	noise = [rng.gauss(0, 1.0) for _ in range(600)]
+	stage = create(["one-euro", {"minCutoff": 1.0, "beta": 0.0}])
+
+	outputs = run(stage, noise)[100:]
+
+	spread = lambda values: max(values) - min(values)
+	assert spread(outputs) < spread(noise[100:]) / 4
+
+
+def test_repeated_timestamps_return_the_last_output(create):
+	stage = create("velocity")
+	stage.update(1.0, 0.0)
+	first = stage.update(2.0, 0.01)
+
+	assert stage.update(5.0, 0.01) == first
+
+
+@pytest.mark.parametrize("prediction, message", [
+	({"yaw": "kalman"}, "Unknown prediction filter"),
+	({"yaw": ["velocity", {"lag": 0.1}]}, "unknown parameters: lag"),
+	({"yaw": ["one-euro", {"beta": "fast"}]}, "must be a number"),
+	({"heave": "velocity"}, "unknown axis 'heave'"),
+])
+def test_invalid_prediction_specs_are_rejected(host, prediction, message):
+	with pytest.raises(ValueError, match=message):
+		host.namespace["PresetRecord"]("custom", {"prediction": prediction})
+
+
+def test_presets_without_prediction_pass_trackir_through(host):
+	host.trackIR.set_pose(12.5, -3.25, 0.0, 1.5, 0.75, 0.0)
+
+	assert host.app.state.prediction == ()
+	assert (host.app.state.trackir.yaw, host.app.state.trackir.pitch) == (12.5, -3.25)
+
+
+def test_preset_prediction_filters_trackir_samples(host):
+	host.namespace["perf_counter"] = host.clock.time
+	state = host.app.state
+	state.preset = host.namespace["PresetRecord"]("custom", {"prediction": {"yaw": ["velocity", {"lead": 0.5}]}})
+
+	for yaw in (10.0, 11.0):
+		host.trackIR.set_pose(yaw, 0.0, 0.0, 0.0, 0.0, 0.0)
+		host.clock.advance(1.0)
+
+	assert state.trackir.yaw == 11.5
+	assert state.trackir.pitch == 0.0
+
+
+def test_switching_presets_resets_filter_state(host):
+	state = host.app.state
+	preset = host.namespace["PresetRecord"]("custom", {"prediction": {"yaw": "velocity"}})
+	state.preset = preset
+	stage = state.prediction[0][1]
+	stage.update(1.0, 0.0)
+
+	state.preset = preset
+
+	assert state.prediction[0][1] is not stage
+	assert state.prediction[0][1].update(4.0, 1.0) == 4.0
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from tools.freepie_host import FreePieHost, InputTimeline
+
+
+@pytest.fixture
+def host(host):
+	host.namespace["ChangePresetAction"]("lagg").handle(host.app.state)
+	del host.speech.said[:]
+	return host
+
+
+def exporter(host, directory=None, clipboard=True, done=None):
+	results = []
+	export = host.namespace["PresetExporter"](
+		done or (lambda preset, text, error: results.append((preset, text, error))),
+		directory=directory, clipboard=clipboard,
+	)
+	export.results = results
+	return export
+
+
+def test_copy_binding_exports_to_the_clipboard_and_announces_it():
+	timeline = InputTimeline().hold_keys(2, ["UpArrow", "NumberPad1"]).hold_keys(5, ["UpArrow", "NumberPadPeriod"])
+	host = FreePieHost(timeline=timeline)
+	host.run(8)
+
+	values = json.loads(host.clipboard.text)
+	assert values["deltaZ1"] == 6.52
+	assert host.speech.said[-1] == "preset copied"
+
+
+def test_export_works_on_a_snapshot(host):
+	state = host.app.state
+	export = exporter(host)
+	state.preset.deltaX1 = 3.0
+
+	export.submit(state.preset)
+	preset, text, error = export.results[0]
+
+	assert preset is not state.preset
+	assert json.loads(text)["deltaX1"] == 3.0
+	assert error is None
+
+
+def test_exports_are_written_as_versioned_files(host, tmp_path):
+	state = host.app.state
+	state.preset = host.namespace["PresetRecord"]("la five", {"deltaX1": 1.0, "curves": {"x": "ease-in"}})
+	export = exporter(host, directory=str(tmp_path), clipboard=False)
+
+	export.submit(state.preset)
+	export.submit(state.preset)
+
+	assert sorted(path.name for path in tmp_path.iterdir()) == ["la-five.v1.json", "la-five.v2.json"]
+	saved = json.loads((tmp_path / "la-five.v2.json").read_text())
+	assert saved["curves"] == {"x": "ease-in"}
+	assert host.clipboard.text is None
+
+
+def test_export_failures_are_reported_to_the_callback(host, tmp_path):
+	export = exporter(host, directory=str(tmp_path / "missing"), clipboard=False)
+
+	export.submit(host.app.state.preset)
+	export.submit(host.app.state.preset)
+
+	assert [type(error) for _, _, error in export.results] == [FileNotFoundError] * 2
+
+
+def test_failed_exports_are_announced(host):
+	def refuse(text):
+		raise RuntimeError("clipboard busy")
+	host.clipboard.SetText = refuse
+
+	host.app.state.exporter.submit(host.app.state.preset)
+
+	assert host.speech.said == ["preset export failed"]
+	assert host.diagnostics.messages[-1] == "Error exporting preset: clipboard busy"
@@ -0,0 +1,91 @@
+import pytest
+
+from tools.freepie_host import FreePieHost, InputTimeline
+
+
+@pytest.fixture
+def state(host):
+	state = host.app.state
+	state.select("lagg")
+	return state
+
+
+def test_tuning_never_writes_the_catalog(host, state):
+	state.preset.tune("deltaX1", 3.0)
+
+	assert state.preset.deltaX1 == 3.0
+	assert state.presets["lagg"].deltaX1 == 1.2804
+	assert state.preset.base is state.presets["lagg"]
+	assert state.preset.overrides == {"deltaX1": 3.0}
+
+
+def test_undo_steps_back_one_change_at_a_time(state):
+	state.preset.tune("deltaX1", 2.0)
+	state.preset.tune("deltaX1", 3.0)
+	state.preset.revert("deltaX1")
+
+	assert state.preset.deltaX1 == 1.2804
+	assert state.preset.undo() and state.preset.deltaX1 == 3.0
+	assert state.preset.undo() and state.preset.deltaX1 == 2.0
+	assert state.preset.undo() and state.preset.deltaX1 == 1.2804
+	assert state.preset.overrides == {}
+	assert state.preset.undo() is False
+
+
+def test_switching_back_keeps_the_session_layer(host, state):
+	layer = state.preset
+	layer.tune("deltaZ1", 5.0)
+	tables = state.autoCurves
+
+	state.select("f4")
+	state.select("lagg")
+
+	assert state.preset is layer
+	assert state.preset.deltaZ1 == 5.0
+	assert state.autoCurves is tables
+
+
+def test_unknown_presets_resolve_to_zeros(state):
+	state.select("spitfire")
+
+	assert state.preset.name == "spitfire"
+	assert state.preset.items() == [(field, 0.0) for field, _ in state.preset.items()]
+
+
+def test_undo_and_revert_bindings_work_in_tune_mode():
+	timeline = (
+		InputTimeline()
+		.hold_keys(2, ["UpArrow", "NumberPad1"])
+		.toggle_key(4, "ScrollLock")
+		.hold_keys(6, ["RightControl", "Insert"])
+		.hold_keys(8, ["RightShift", "PageUp"], frames=3)
+		.hold_keys(14, ["RightShift", "Backspace"])
+		.hold_keys(16, ["RightControl", "Backspace"])
+	)
+	host = FreePieHost(timeline=timeline)
+
+	host.run(13)
+	tuned = host.app.state.preset.deltaZ1
+	host.run(3)
+	undone = host.app.state.preset.deltaZ1
+	host.run(3)
+
+	assert tuned == pytest.approx(6.52 + 3 * 0.01)
+	assert undone == pytest.approx(6.52 + 2 * 0.01)
+	assert host.app.state.preset.deltaZ1 == 6.52
+	assert host.speech.said[-2:] == ["undo", "reverted"]
+
+
+def test_tuning_survives_switches_on_later_frames(host, state):
+	# the layer made on one frame must be found again on later frames, not wrapped anew
+	state.preset.tune("deltaX1", 9.0)
+	host.step()
+	state.select("f4")
+	host.step()
+	state.select("lagg")
+	host.step()
+
+	assert state.preset.deltaX1 == 9.0
+	assert state.preset.base is state.presets["lagg"]
+	assert state.preset.revert("deltaX1") and state.preset.deltaX1 == 1.2804
+	assert state.preset.undo() and state.preset.deltaX1 == 9.0
@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def store(host, tmp_path):
+	return host.namespace["PresetStore"](str(tmp_path), interval=1.0, run=lambda work: work())
+
+
+def rewrite(path, **values):
+	data = json.loads(path.read_text())
+	data.update(values)
+	path.write_text(json.dumps(data))
+	stat = path.stat()
+	os.utime(str(path), (stat.st_atime, stat.st_mtime + 5))
+
+
+def poll_twice(store, state, now):
+	# the first poll scans on the worker, the second swaps the result in
+	store.poll(now, state)
+	store.poll(now + 0.01, state)
+
+
+def test_without_a_directory_the_builtin_presets_are_used(host):
+	store = host.namespace["PresetStore"](None)
+
+	assert store["lagg"].deltaZ1 == 6.52
+	assert "la five" in store and "spitfire" not in store
+	with pytest.raises(KeyError):
+		store["spitfire"]
+
+
+def test_an_empty_directory_is_seeded_from_the_builtin_presets(host, store, tmp_path):
+	index = json.loads((tmp_path / "index.json").read_text())["presets"]
+
+	assert index["la five"] == "la-five.json"
+	assert store.names() == sorted(host.namespace["Presets"].all)
+	assert store["yakodin"].items() == host.app.state.presets["yakodin"].items()
+
+
+def test_presets_are_parsed_only_when_first_selected(store, tmp_path):
+	(tmp_path / "f4.json").write_text("not json")
+
+	assert store.get("lagg").deltaX1 == 1.2804
+	assert sorted(store._records) == ["lagg"]
+
+
+def test_changed_files_hot_swap_the_active_preset(host, store, tmp_path):
+	state = host.app.state
+	state.preset = store["lagg"]
+	poll_twice(store, state, 100.0)
+
+	rewrite(tmp_path / "lagg.json", deltaX1=2.5)
+	poll_twice(store, state, 100.5)
+	assert state.preset.deltaX1 == 1.2804
+
+	poll_twice(store, state, 101.0)
+	assert state.preset.deltaX1 == 2.5
+	assert state.preset.base is store["lagg"]
+
+
+def test_tuned_values_are_written_back(host, store, tmp_path):
+	state = host.app.state
+	state.preset = store["f4"]
+	poll_twice(store, state, 100.0)
+
+	state.preset.deltaZ1 = 4.25
+	poll_twice(store, state, 101.0)
+
+	assert json.loads((tmp_path / "f4.json").read_text())["deltaZ1"] == 4.25
+	assert state.preset.deltaZ1 == 4.25
+
+
+def test_new_index_entries_become_selectable(host, store, tmp_path):
+	(tmp_path / "spitfire.json").write_text(json.dumps({"deltaX1": 1.1}))
+	rewrite(tmp_path / "index.json", presets=dict(json.loads((tmp_path / "index.json").read_text())["presets"], spitfire="spitfire.json"))
+
+	host.app.state.presets = store
+	poll_twice(store, host.app.state, 100.0)
+	host.namespace["ChangePresetAction"]("spitfire").handle(host.app.state)
+
+	assert host.app.state.preset.deltaX1 == 1.1
+
+
+def test_broken_files_keep_the_loaded_preset(host, store, tmp_path):
+	state = host.app.state
+	state.preset = store["lagg"]
+	(tmp_path / "lagg.json").write_text("{")
+
+	poll_twice(store, state, 100.0)
+
+	assert state.preset.deltaX1 == 1.2804
+	assert host.diagnostics.messages[-1].startswith("Error syncing presets:")
@@ -0,0 +1,153 @@
+import struct
+
+import pytest
+
+from tools import session_replay
+from tools.freepie_host import DEFAULT_SCRIPT, FreePieHost, game_timeline, tuning_timeline
+
+
+def recording_script(tmp_path, record_path, frames=1000):
+	with open(DEFAULT_SCRIPT) as handle:
+		source = handle.read()
+	source = source.replace("RECORD_PATH   = None", "RECORD_PATH   = {!r}".format(str(record_path)))
+	source = source.replace("RECORD_FRAMES = 360000", "RECORD_FRAMES = {}".format(frames))
+	script = tmp_path / "aom.py"
+	script.write_text(source)
+	return str(script)
+
+
+def record(tmp_path, timeline, frames, capacity=1000):
+	path = tmp_path / "session.aomrec"
+	host = FreePieHost(recording_script(tmp_path, path, capacity), timeline(frames))
+	host.run(frames)
+	host.app.state.recorder.close()
+	return host, session_replay.read(str(path))
+
+
+def test_recording_is_off_by_default():
+	host = FreePieHost()
+	host.step()
+
+	assert host.app.state.recorder is None
+
+
+def test_every_frame_is_recorded_with_the_packet_it_sent(tmp_path):
+	host, recording = record(tmp_path, game_timeline, 700)
+	frames = recording.frames
+
+	assert len(frames) == 700
+	assert [frame.packet for frame in frames] == [packet for packet, _ in host.packets]
+	assert frames[-1].time == pytest.approx(host.clock.now - host.clock.step)
+	assert frames[-1].trackir == (host.trackIR.yaw, host.trackIR.pitch, host.trackIR.roll, host.trackIR.x, host.trackIR.y, host.trackIR.z)
+	assert (frames[0].preset, frames[-1].preset) == ("reset", "lagg")
+	assert recording.layout["axes"] == [["axis", "1", "y"]]
+	assert frames[-1].axes == (host.joystick[1].y,)
+	game = host.app.state.game
+	assert frames[-1].flags == dict((name, getattr(game, name)) for name in recording.layout["flags"])
+	assert any(frame.flags != frames[0].flags for frame in frames)
+
+
+def test_frames_hold_the_pose_the_frame_sent_while_a_scheduler_outputs(tmp_path):
+	path = tmp_path / "session.aomrec"
+	host = FreePieHost(recording_script(tmp_path, path), game_timeline(60))
+	host.step()
+	state = host.app.state
+	scheduler = host.namespace["PoseScheduler"](state.transport, 250, start=lambda loop: None)
+	send = scheduler.send
+	sent = []
+
+	def sending(*pose):
+		sent.append(struct.pack("<6d", *pose))
+		result = send(*pose)
+		# a worker tick packing the transport's buffer in the middle of the frame
+		state.transport.packet[:] = b"\xff" * len(state.transport.packet)
+		return result
+	scheduler.send = sending
+	state.output = scheduler
+	host.run(59)
+	state.recorder.close()
+
+	assert [frame.packet for frame in session_replay.read(str(path)).frames[1:]] == sent
+
+
+def test_buttons_are_recorded_as_bits_per_input_slot(tmp_path):
+	host, recording = record(tmp_path, game_timeline, 10)
+	slot = recording.layout["buttons"].index(["down", "UpArrow"])
+
+	# game_timeline holds UpArrow on frames 5-7
+	assert [frame.buttons[slot] for frame in recording.frames] == [False] * 5 + [True] * 3 + [False] * 2
+
+
+def test_the_file_keeps_the_last_capacity_frames(tmp_path):
+	host, recording = record(tmp_path, game_timeline, 130, capacity=50)
+	times = [frame.time for frame in recording.frames]
+
+	assert len(times) == 50
+	assert times == sorted(times)
+	assert times[-1] == pytest.approx(host.clock.now - host.clock.step)
+
+
+@pytest.mark.parametrize("timeline", [game_timeline, tuning_timeline])
+def test_replay_reproduces_the_recorded_packets(tmp_path, timeline):
+	host, recording = record(tmp_path, timeline, 900)
+	replayed = list(session_replay.replay(recording))
+
+	assert len(replayed) == 899
+	assert [packet for _, packet in replayed] == [frame.packet for frame in recording.frames[1:]]
+
+
+def test_replay_rejects_a_recording_from_another_binding_table(tmp_path):
+	host, recording = record(tmp_path, game_timeline, 5)
+	recording.layout["buttons"].pop()
+
+	with pytest.raises(ValueError):
+		list(session_replay.replay(recording))
+
+
+def test_replay_restores_values_tuned_before_the_oldest_frame(tmp_path):
+	# 900 frames of tuning into a 500-frame file: the catalog values are long gone
+	host, recording = record(tmp_path, tuning_timeline, 900, capacity=500)
+	first = recording.frames[0]
+	catalog = host.app.state.presets[first.preset]
+	replayed = list(session_replay.replay(recording))
+
+	assert any(first.values[field] != value for field, value in catalog.items())
+	assert [packet for _, packet in replayed] == [frame.packet for frame in recording.frames[1:]]
+
+
+def test_stopping_the_script_writes_the_buffered_frames(tmp_path):
+	path = tmp_path / "session.aomrec"
+	host = FreePieHost(recording_script(tmp_path, path), game_timeline(40))
+	host.run(40)
+	host.stop()
+
+	assert len(session_replay.read(str(path)).frames) == 40
+	assert host.app.state.recorder.stopped
+
+
+def test_a_layout_too_big_for_the_header_fails_at_start(tmp_path, host, monkeypatch):
+	SessionRecorder = host.namespace["SessionRecorder"]
+	monkeypatch.setattr(SessionRecorder, "HEADER_SIZE", 256)
+
+	with pytest.raises(ValueError, match="does not fit"):
+		SessionRecorder(str(tmp_path / "session.aomrec"), capacity=10).start(host.app.state)
+
+
+def test_a_preset_that_no_longer_fits_stops_the_recording(tmp_path, host):
+	path = tmp_path / "session.aomrec"
+	state = host.app.state
+	SessionRecorder = host.namespace["SessionRecorder"]
+	recorder = SessionRecorder(str(path), capacity=10, run=lambda work: work())
+	recorder.start(state)
+	# a preset name that leaves 5 bytes of the header free (each name adds ', "name"')
+	free = SessionRecorder.HEADER_SIZE - SessionRecorder.HEADER.size - len(recorder._metadata())
+	state.select("x" * (free - 4 - 5))
+	recorder.capture(state, 1.0)
+
+	state.select("a preset added after the header filled up")
+	recorder.capture(state, 2.0)
+	recorder.capture(state, 3.0)
+
+	assert recorder.stopped and recorder.written == 1
+	assert host.diagnostics.messages[-1].startswith("Recording stopped")
+	assert [frame.time for frame in session_replay.read(str(path)).frames] == [1.0]
@@ -0,0 +1,90 @@
+import pytest
+
+
+@pytest.fixture
+def host(host):
+	del host.speech.said[:]
+	return host
+
+
+@pytest.fixture
+def queue(host):
+	"""A SpeechQueue whose worker runs only when the test drains it."""
+	work = []
+	queue = host.namespace["SpeechQueue"](host.app.state.timers, run=work.append)
+	queue.work = work
+	return queue
+
+
+def drain(queue):
+	while queue.work:
+		queue.work.pop(0)()
+
+
+def test_say_only_queues_and_starts_one_worker(host, queue):
+	queue.say("lagg preset loaded")
+	queue.say("check six activated")
+
+	assert host.speech.said == []
+	assert len(queue.work) == 1
+
+	drain(queue)
+
+	assert host.speech.said == ["lagg preset loaded", "check six activated"]
+	assert queue.spoken == 2
+
+
+def test_mode_changes_are_spoken_before_repeated_cues(host, queue):
+	SpeechQueue = host.namespace["SpeechQueue"]
+	queue.say("Flaps", SpeechQueue.REPEAT)
+	queue.say("preset copied")
+	queue.say("Game mode", SpeechQueue.MODE)
+
+	drain(queue)
+
+	assert host.speech.said == ["Game mode", "preset copied", "Flaps"]
+
+
+def test_pending_duplicates_are_merged(host, queue):
+	queue.say("six")
+	queue.say("six")
+	drain(queue)
+	queue.say("six")
+	drain(queue)
+
+	assert host.speech.said == ["six", "six"]
+	assert queue.merged == 1
+
+
+def test_rate_limited_cues_wait_for_their_interval(host, queue):
+	SpeechQueue = host.namespace["SpeechQueue"]
+	for _ in range(3):
+		queue.say("Flaps", SpeechQueue.REPEAT, 1.0)
+		drain(queue)
+		host.clock.advance(0.6)
+		host.app.state.timers.advance(host.clock.now)
+
+	assert host.speech.said == ["Flaps", "Flaps"]
+	assert queue.limited == 1
+
+
+def test_a_failing_voice_does_not_stall_the_queue(host, queue):
+	def broken(text):
+		raise RuntimeError("no voice")
+	host.speech.say = broken
+	queue.say("Game mode")
+	drain(queue)
+	del host.speech.say
+
+	queue.say("preset copied")
+	drain(queue)
+
+	assert host.speech.said == ["preset copied"]
+	assert host.diagnostics.messages == ["Speech failed: no voice"]
+
+
+def test_actions_announce_through_the_queue(host):
+	host.namespace["ChangePresetAction"]("lagg").handle(host.app.state)
+
+	assert host.speech.said == ["lagg preset loaded"]
+	assert host.app.state.callouts.spoken == 2
@@ -0,0 +1,167 @@
+import pytest
+
+
+@pytest.fixture
+def host(host):
+	del host.speech.said[:]
+	return host
+
+
+@pytest.fixture
+def wheel(host):
+	return host.namespace["TimerWheel"](resolution=0.01, size=16, now=100.0)
+
+
+def recording(host, fired, name):
+	return host.namespace["Timer"](lambda now: fired.append((name, now)))
+
+
+def test_due_timers_fire_in_deadline_order_with_the_frame_time(host, wheel):
+	fired = []
+	late, early, later = (recording(host, fired, name) for name in ("late", "early", "later"))
+	wheel.schedule(late, 100.055)
+	wheel.schedule(early, 100.05)
+	wheel.schedule(later, 100.2)
+
+	wheel.advance(100.04)
+	assert fired == []
+
+	wheel.advance(100.06)
+	assert fired == [("early", 100.06), ("late", 100.06)]
+	assert not early.active and later.active
+
+	wheel.advance(100.3)
+	assert fired[-1] == ("later", 100.3)
+	assert wheel.fired == 3
+
+
+def test_a_timer_is_not_fired_early_from_its_own_tick(host, wheel):
+	fired = []
+	timer = recording(host, fired, "timer")
+	wheel.schedule(timer, 100.018)
+
+	wheel.advance(100.012)
+	assert fired == []
+
+	wheel.advance(100.019)
+	assert fired == [("timer", 100.019)]
+
+
+def test_timers_more_than_a_turn_ahead_wait_for_their_turn(host, wheel):
+	fired = []
+	timer = recording(host, fired, "timer")
+	# 16 buckets of 10 ms: 100.5 shares a bucket with ticks visited well before it
+	wheel.schedule(timer, 100.5)
+
+	now = 100.0
+	while now < 100.49:
+		now += 0.013
+		wheel.advance(now)
+		if now < 100.5:
+			assert fired == []
+	wheel.advance(100.51)
+	assert fired == [("timer", 100.51)]
+
+
+def test_rearming_moves_and_cancelling_drops_a_timer(host, wheel):
+	fired = []
+	moved, cancelled = recording(host, fired, "moved"), recording(host, fired, "cancelled")
+	wheel.schedule(moved, 100.02)
+	wheel.schedule(cancelled, 100.02)
+	wheel.schedule(moved, 100.08)
+	wheel.cancel(cancelled)
+
+	wheel.advance(100.05)
+	assert fired == []
+
+	wheel.advance(100.1)
+	assert fired == [("moved", 100.1)]
+
+
+def test_a_deadline_already_passed_fires_on_the_next_advance(host, wheel):
+	fired = []
+	timer = recording(host, fired, "timer")
+	wheel.advance(101.0)
+	wheel.schedule(timer, 99.0)
+	wheel.advance(101.0)
+
+	assert fired == [("timer", 101.0)]
+
+
+def test_callbacks_can_rearm_their_own_timer(host, wheel):
+	Timer = host.namespace["Timer"]
+	fired = []
+
+	def repeat(now):
+		fired.append(now)
+		wheel.schedule(timer, now + 0.1)
+	timer = Timer(repeat)
+	wheel.after(timer, 0)
+
+	for frame in range(1, 31):
+		wheel.advance(100.0 + frame / 60.0)
+
+	assert len(fired) == 5
+
+
+def test_check_six_calls_out_six_seconds_after_the_last_look_back(host):
+	state = host.app.state
+	state.checkSix.switchCheckSix()
+	host.run(4 * 60)
+	host.trackIR.set_pose(170.0, 0, 0, 0, 0, 0)
+	host.step()
+	host.trackIR.set_pose(0, 0, 0, 0, 0, 0)
+	host.run(int(5.9 * 60))
+
+	assert "six" not in host.speech.said
+
+	host.run(12)
+	assert host.speech.said.count("six") == 1
+
+	host.run(2 * 60)
+	assert host.speech.said.count("six") == 2
+
+
+def test_check_six_holds_back_while_the_flaps_are_down(host):
+	state = host.app.state
+	state.checkSix.switchCheckSix()
+	state.flaps_control.open_flap(state.now)
+	host.run(8 * 60)
+
+	assert "six" not in host.speech.said
+	assert "Flaps" in host.speech.said
+
+	state.flaps_control.close_flap(state.now)
+	host.run(2 * 60)
+	assert "six" in host.speech.said
+
+
+def test_flap_keys_are_released_by_their_timer(host):
+	state = host.app.state
+	since = len(host.keyboard.emitted)
+	state.flaps_control.close_flap(state.now)
+	host.run(4 * 60 - 1)
+
+	assert ("up", "F") not in host.keyboard.emitted[since:]
+
+	host.run(2)
+	assert host.keyboard.emitted[since:] == [("down", "F"), ("down", "LeftShift"), ("up", "F"), ("up", "LeftShift")]
+	assert not state.flaps_control.isFlapOpend()
+
+
+def test_timers_due_together_fire_in_the_order_they_were_armed(host, wheel):
+	fired = []
+	timers = [recording(host, fired, index) for index in range(20)]
+	for timer in timers:
+		wheel.schedule(timer, 100.05)
+	wheel.advance(100.05)
+
+	assert [name for name, _ in fired] == list(range(20))
+
+
+def test_the_flaps_reminder_repeats_every_second(host):
+	state = host.app.state
+	state.flaps_control.open_flap(state.now)
+	host.run(10 * 60 + 1)
+
+	assert host.speech.said.count("Flaps") == 10
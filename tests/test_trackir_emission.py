@@ -0,0 +1,92 @@
+import struct
+
+import pytest
+
+from tools.freepie_host import DEFAULT_SCRIPT, FreePieHost, InputTimeline
+
+
+def yaws(packets):
+	return [struct.unpack("<dddddd", data)[3] for data, _ in packets]
+
+
+@pytest.fixture
+def event_host(tmp_path):
+	script = tmp_path / "aom.py"
+	script.write_text(open(DEFAULT_SCRIPT).read().replace("EMIT_ON_TRACKIR = False", "EMIT_ON_TRACKIR = True"))
+	host = FreePieHost(str(script))
+	host.step()
+	del host.packets[:]
+	return host
+
+
+def test_trackir_z_lands_in_z():
+	host = FreePieHost()
+	host.step()
+
+	host.trackIR.set_pose(0.0, 0.0, 0.0, 1.5, 0.25, -2.0)
+	host.step()
+
+	sample = host.app.state.trackir
+	assert (sample.x, sample.y, sample.z) == (1.5, 0.25, -2.0)
+	assert struct.unpack("<dddddd", host.packets[-1][0])[2] == -2.0
+
+
+def test_samples_are_published_whole():
+	host = FreePieHost()
+	host.step()
+	state = host.app.state
+	front = state.trackir
+
+	host.trackIR.set_pose(20.0, 1.0, 0.0, 0.0, 0.0, 0.0)
+
+	assert state.trackir is not front and state.trackirBack is front
+	assert (front.yaw, state.trackir.yaw) == (0, 20.0)
+	assert state.trackirSample == 1
+
+
+def test_frame_mode_sends_only_from_the_frame():
+	host = FreePieHost()
+	host.step()
+	del host.packets[:]
+
+	host.trackIR.set_pose(20.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+	assert host.packets == []
+
+
+def test_event_mode_sends_once_per_sample(event_host):
+	event_host.trackIR.set_pose(20.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+	assert yaws(event_host.packets) == [2.0]
+
+	event_host.step()
+	event_host.app.gameMode.emit()
+	event_host.trackIR.set_pose(30.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+	assert yaws(event_host.packets) == [2.0, 3.0]
+
+
+def test_event_mode_falls_back_to_the_frame_without_samples(event_host):
+	event_host.run(3)
+	assert len(event_host.packets) == 3
+
+	event_host.trackIR.set_pose(20.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+	del event_host.packets[:]
+	event_host.run(3)
+	assert event_host.packets == []
+
+	event_host.app.state.profiler.stalled = True
+	event_host.step()
+	assert yaws(event_host.packets) == [2.0]
+
+
+def test_event_mode_leaves_tune_mode_to_the_frame(tmp_path):
+	script = tmp_path / "aom.py"
+	script.write_text(open(DEFAULT_SCRIPT).read().replace("EMIT_ON_TRACKIR = False", "EMIT_ON_TRACKIR = True"))
+	host = FreePieHost(str(script), InputTimeline().toggle_key(1, "ScrollLock"))
+	host.run(3)
+	del host.packets[:]
+
+	host.trackIR.set_pose(20.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+	assert host.packets == []
+	host.step()
+	assert len(host.packets) == 1
@@ -0,0 +1,624 @@
+"""Headless FreePIE stand-in for driving and timing ``aom.py`` off Windows.
+
+FreePIE compiles the script once and then executes the whole module body on
+every iteration of its loop, with ``starting`` set only on the first pass and
+``stopping`` only on the extra last pass when the script is stopped (``stop``).
+``FreePieHost`` does the same against fake versions of the globals the script
+expects (``keyboard``, ``joystick``, ``trackIR``, ``speech``, ``diagnostics``,
+``filters``, ``Key``) and of the Windows-only modules it imports (``clr``,
+``System.*``, ``ctypes.windll``).  Time is a deterministic clock that advances
+by one frame per pass, UDP output is captured instead of sent, named shared
+memory lives in ``shared_memory``, assemblies passed to ``clr.AddReference``
+are listed in ``references``, and inputs are driven from an ``InputTimeline``.
+
+Run ``python -m tools.freepie_host`` to print per-frame latency for the
+built-in game and tuning scenarios.
+"""
+
+import argparse
+import builtins
+import ctypes as _real_ctypes
+import json
+import math
+import mmap as _real_mmap
+import os
+import socket as _real_socket
+import sys
+import time as _real_time
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCRIPT = os.path.join(REPO_ROOT, "aom.py")
+
+JOYSTICK_COUNT = 4
+
+# Win32 virtual-key codes for the lock keys the script queries through
+# GetKeyState and GetKeyboardState.
+VIRTUAL_KEYS = {
+	0x14: "CapsLock",
+	0x90: "NumberLock",
+	0x91: "ScrollLock",
+}
+
+
+class _KeyEnum(type):
+	def __getattr__(cls, name):
+		if name.startswith("__") or not name.isidentifier():
+			raise AttributeError(name)
+		return name
+
+
+class Key(metaclass=_KeyEnum):
+	"""Stand-in for FreePIE's ``Key`` enum; every member is its own name."""
+
+
+class FakeClock(object):
+	def __init__(self, start=1000.0, step=1.0 / 60.0):
+		self.now = float(start)
+		self.step = float(step)
+
+	def advance(self, seconds=None):
+		self.now += self.step if seconds is None else seconds
+
+	def time(self):
+		return self.now
+
+
+class FakeEvent(object):
+	"""FreePIE-style event that supports ``event += handler``."""
+
+	def __init__(self):
+		self.handlers = []
+
+	def __iadd__(self, handler):
+		self.handlers.append(handler)
+		return self
+
+	def __isub__(self, handler):
+		self.handlers.remove(handler)
+		return self
+
+	def fire(self):
+		for handler in list(self.handlers):
+			handler()
+
+
+class _EdgeInput(object):
+	"""Down/pressed bookkeeping shared by the fake keyboard and joysticks."""
+
+	def __init__(self):
+		self.down = set()
+		self.previous = set()
+
+	def press(self, code):
+		self.down.add(code)
+
+	def release(self, code):
+		self.down.discard(code)
+
+	def getDown(self, code):
+		return code in self.down
+
+	def getPressed(self, code):
+		return code in self.down and code not in self.previous
+
+	def getReleased(self, code):
+		return code in self.previous and code not in self.down
+
+	def latch(self):
+		self.previous = set(self.down)
+
+
+class FakeKeyboard(_EdgeInput):
+	def __init__(self):
+		_EdgeInput.__init__(self)
+		self.toggled = set()
+		self.emitted = []
+
+	def toggle(self, key):
+		if key in self.toggled:
+			self.toggled.discard(key)
+		else:
+			self.toggled.add(key)
+
+	def getKeyDown(self, key):
+		return self.getDown(key)
+
+	def getKeyUp(self, key):
+		return not self.getDown(key)
+
+	def setKeyDown(self, key):
+		self.emitted.append(("down", key))
+
+	def setKeyUp(self, key):
+		self.emitted.append(("up", key))
+
+	def setPressed(self, key):
+		self.emitted.append(("pressed", key))
+
+
+class FakeJoystick(_EdgeInput):
+	def __init__(self):
+		_EdgeInput.__init__(self)
+		self.x = 0
+		self.y = 0
+		self.z = 0
+		self.xRotation = 0
+		self.yRotation = 0
+		self.zRotation = 0
+		self.sliders = [0, 0]
+
+
+class FakeTrackIR(object):
+	def __init__(self):
+		self.yaw = 0.0
+		self.pitch = 0.0
+		self.roll = 0.0
+		self.x = 0.0
+		self.y = 0.0
+		self.z = 0.0
+		self.update = FakeEvent()
+
+	def set_pose(self, yaw, pitch, roll, x, y, z):
+		self.yaw, self.pitch, self.roll = yaw, pitch, roll
+		self.x, self.y, self.z = x, y, z
+		self.update.fire()
+
+
+class FakeSpeech(object):
+	def __init__(self):
+		self.said = []
+
+	def say(self, text):
+		self.said.append(text)
+
+
+class FakeDiagnostics(object):
+	def __init__(self):
+		self.watch_count = 0
+		self.watched = {}
+		self.messages = []
+
+	def watch(self, value, indexer=None):
+		# FreePIE fills in the indexer (the watch label) for literal calls
+		self.watch_count += 1
+		self.watched[indexer] = value
+
+	def debug(self, message):
+		self.messages.append(message)
+
+
+class FakeFilters(object):
+	"""The subset of FreePIE's ``filters`` plugin used by the script."""
+
+	def mapRange(self, x, x_min, x_max, y_min, y_max):
+		return y_min + (y_max - y_min) * (x - x_min) / (x_max - x_min)
+
+	def ensureMapRange(self, x, x_min, x_max, y_min, y_max):
+		return max(min(((x - x_min) / (x_max - x_min)) * (y_max - y_min) + y_min, y_max), y_min)
+
+
+class FakeClipboard(object):
+	def __init__(self):
+		self.text = None
+
+	def SetText(self, text):
+		self.text = text
+
+	def GetText(self):
+		return self.text
+
+
+class FakeUdpSocket(object):
+	"""Captures datagrams instead of putting them on the wire; ``inbox`` feeds ``recv_into``."""
+
+	def __init__(self, sink):
+		self._sink = sink
+		self.address = None
+		self.inbox = []
+
+	def recv_into(self, buffer):
+		if not self.inbox:
+			raise BlockingIOError("no datagram pending")
+		data = self.inbox.pop(0)
+		buffer[:len(data)] = data
+		return len(data)
+
+	def connect(self, address):
+		self.address = address
+
+	def sendto(self, data, address):
+		self._sink.append((bytes(data), address))
+		return len(data)
+
+	def send(self, data):
+		return self.sendto(data, self.address)
+
+	def setblocking(self, flag):
+		pass
+
+	def setsockopt(self, *args):
+		pass
+
+	def bind(self, address):
+		self.address = address
+
+	def close(self):
+		pass
+
+
+class FakeSharedMemory(bytearray):
+	"""Named ``mmap`` segment (``tagname``), kept in ``FreePieHost.shared_memory``."""
+
+	def flush(self, *args):
+		pass
+
+	def close(self):
+		pass
+
+
+class FakeWaitHandle(object):
+	"""Named ``EventWaitHandle`` that counts ``Set`` calls."""
+
+	def __init__(self):
+		self.signals = 0
+
+	def Set(self):
+		self.signals += 1
+		return True
+
+
+class _ModuleProxy(types.ModuleType):
+	"""Module whose overrides win and whose other attributes come from ``real``."""
+
+	def __init__(self, name, real=None, **overrides):
+		types.ModuleType.__init__(self, name)
+		self.__dict__["_real"] = real
+		self.__dict__.update(overrides)
+
+	def __getattr__(self, name):
+		real = self.__dict__.get("_real")
+		if real is None:
+			raise AttributeError(name)
+		return getattr(real, name)
+
+
+class _SyncThread(object):
+	"""``System.Threading.Thread`` that runs its delegate on ``Start``."""
+
+	def __init__(self, start):
+		self._start = start
+
+	def SetApartmentState(self, state):
+		pass
+
+	def Start(self):
+		self._start()
+
+	def Join(self):
+		pass
+
+
+def _run_work_item(callback, state=None):
+	"""``ThreadPool.QueueUserWorkItem`` that runs the callback before returning."""
+	callback(state)
+	return True
+
+
+class InputTimeline(object):
+	"""Scripted input: actions keyed by frame plus an optional TrackIR pose source."""
+
+	def __init__(self, pose=None):
+		self._events = {}
+		self.pose = pose
+
+	def at(self, frame, action):
+		self._events.setdefault(frame, []).append(action)
+		return self
+
+	def hold_key(self, frame, key, frames=1):
+		self.at(frame, lambda host: host.keyboard.press(key))
+		return self.at(frame + frames, lambda host: host.keyboard.release(key))
+
+	def hold_keys(self, frame, keys, frames=1):
+		for key in keys:
+			self.hold_key(frame, key, frames)
+		return self
+
+	def hold_button(self, frame, joystick, button, frames=1):
+		self.at(frame, lambda host: host.joystick[joystick].press(button))
+		return self.at(frame + frames, lambda host: host.joystick[joystick].release(button))
+
+	def toggle_key(self, frame, key):
+		return self.at(frame, lambda host: host.keyboard.toggle(key))
+
+	def set_axis(self, frame, joystick, axis, value):
+		return self.at(frame, lambda host: setattr(host.joystick[joystick], axis, value))
+
+	def apply(self, host, frame):
+		for action in self._events.get(frame, ()):
+			action(host)
+		if self.pose is not None:
+			host.trackIR.set_pose(*self.pose(frame, host.clock.now))
+
+
+class FreePieHost(object):
+	def __init__(self, script_path=DEFAULT_SCRIPT, timeline=None, fps=60.0, start_time=1000.0):
+		with open(script_path) as handle:
+			self._code = compile(handle.read(), script_path, "exec")
+		self.timeline = timeline if timeline is not None else InputTimeline()
+		self.clock = FakeClock(start_time, 1.0 / fps)
+		self.keyboard = FakeKeyboard()
+		self.joystick = [FakeJoystick() for _ in range(JOYSTICK_COUNT)]
+		self.trackIR = FakeTrackIR()
+		self.speech = FakeSpeech()
+		self.diagnostics = FakeDiagnostics()
+		self.filters = FakeFilters()
+		self.clipboard = FakeClipboard()
+		self.references = []
+		self.packets = []
+		self.sockets = []
+		self.shared_memory = {}
+		self.wait_handles = {}
+		self.frame = 0
+		self.namespace = self._build_namespace()
+
+	@property
+	def app(self):
+		return self.namespace.get("app")
+
+	@property
+	def mode(self):
+		app = self.app
+		return "tuning" if app is not None and app.state.tuneMode is not None else "game"
+
+	def step(self):
+		"""Run one script pass and return ``(mode, seconds)`` for it."""
+		self.timeline.apply(self, self.frame)
+		mode = self.mode
+		self.namespace["starting"] = self.frame == 0
+		self.namespace["stopping"] = False
+		started = _real_time.perf_counter()
+		exec(self._code, self.namespace)
+		elapsed = _real_time.perf_counter() - started
+		self.keyboard.latch()
+		for joystick in self.joystick:
+			joystick.latch()
+		self.clock.advance()
+		self.frame += 1
+		return mode, elapsed
+
+	def run(self, frames):
+		return [self.step() for _ in range(frames)]
+
+	def stop(self):
+		"""Run the last pass FreePIE makes when the script is stopped."""
+		self.namespace["starting"] = False
+		self.namespace["stopping"] = True
+		exec(self._code, self.namespace)
+
+	def _get_key_state(self, virtual_key):
+		name = VIRTUAL_KEYS.get(virtual_key)
+		state = 0
+		if name in self.keyboard.toggled:
+			state |= 0x0001
+		if name in self.keyboard.down:
+			state |= 0x8000
+		return state
+
+	def _get_keyboard_state(self, buffer):
+		for virtual_key in VIRTUAL_KEYS:
+			state = self._get_key_state(virtual_key)
+			buffer[virtual_key] = (state >> 8) | (state & 0x01)
+		return 1
+
+	def deliver(self, port, data):
+		"""Queue a datagram for the socket the script bound to ``port``."""
+		for udp in self.sockets:
+			if udp.address is not None and udp.address[1] == port:
+				udp.inbox.append(bytes(data))
+				return
+		raise ValueError("No socket bound to port {}".format(port))
+
+	def _open_socket(self, *args, **kwargs):
+		udp = FakeUdpSocket(self.packets)
+		self.sockets.append(udp)
+		return udp
+
+	def _open_mapping(self, fileno, length, tagname=None, **kwargs):
+		if tagname is None:
+			return _real_mmap.mmap(fileno, length, **kwargs)
+		mapping = self.shared_memory.get(tagname)
+		if mapping is None:
+			mapping = self.shared_memory[tagname] = FakeSharedMemory(length)
+		return mapping
+
+	def _open_wait_handle(self, initial, mode, name):
+		return self.wait_handles.setdefault(name, FakeWaitHandle())
+
+	def _build_namespace(self):
+		clock = self.clock
+		fake_time = _ModuleProxy(
+			"time", _real_time,
+			time=clock.time,
+			monotonic=clock.time,
+			clock=clock.time,
+			sleep=clock.advance,
+		)
+		fake_socket = _ModuleProxy(
+			"socket", _real_socket,
+			socket=self._open_socket,
+		)
+		user32 = types.SimpleNamespace(
+			GetKeyState=self._get_key_state,
+			GetKeyboardState=self._get_keyboard_state,
+		)
+		fake_ctypes = _ModuleProxy(
+			"ctypes", _real_ctypes,
+			windll=types.SimpleNamespace(user32=user32),
+		)
+		forms = _ModuleProxy("System.Windows.Forms", Clipboard=self.clipboard)
+		threading = _ModuleProxy(
+			"System.Threading",
+			Thread=_SyncThread,
+			ThreadStart=lambda run: run,
+			ThreadPool=types.SimpleNamespace(QueueUserWorkItem=_run_work_item),
+			ApartmentState=types.SimpleNamespace(STA="STA", MTA="MTA"),
+			EventWaitHandle=self._open_wait_handle,
+			EventResetMode=types.SimpleNamespace(AutoReset="AutoReset", ManualReset="ManualReset"),
+		)
+		fake_mmap = _ModuleProxy("mmap", _real_mmap, mmap=self._open_mapping)
+		windows = _ModuleProxy("System.Windows", Forms=forms)
+		system = _ModuleProxy("System", Windows=windows, Threading=threading)
+		modules = {
+			"clr": _ModuleProxy("clr", AddReference=self.references.append),
+			"System": system,
+			"System.Windows": windows,
+			"System.Windows.Forms": forms,
+			"System.Threading": threading,
+			"time": fake_time,
+			"socket": fake_socket,
+			"ctypes": fake_ctypes,
+			"mmap": fake_mmap,
+		}
+
+		def host_import(name, globals=None, locals=None, fromlist=(), level=0):
+			if level == 0 and name.split(".")[0] in modules:
+				return modules[name] if fromlist else modules[name.split(".")[0]]
+			return builtins.__import__(name, globals, locals, fromlist, level)
+
+		host_builtins = dict(builtins.__dict__)
+		host_builtins["__import__"] = host_import
+		return {
+			"__builtins__": host_builtins,
+			"__name__": "__main__",
+			"Key": Key,
+			"keyboard": self.keyboard,
+			"joystick": self.joystick,
+			"trackIR": self.trackIR,
+			"speech": self.speech,
+			"diagnostics": self.diagnostics,
+			"filters": self.filters,
+			"starting": True,
+			"stopping": False,
+		}
+
+
+# === Built-in scenarios ===
+
+THROTTLE = 0
+STICK = 1
+
+
+def sweep_pose(frame, now):
+	"""Slow head sweep across both rear corners with a little jitter."""
+	yaw = 170.0 * math.sin(frame * 2.0 * math.pi / 480.0)
+	pitch = 10.0 * math.sin(frame * 2.0 * math.pi / 300.0)
+	roll = 2.0 * math.sin(frame * 0.05)
+	x = 3.0 * math.sin(frame * 0.02)
+	y = 1.5 * math.sin(frame * 0.03)
+	z = 0.5 * math.sin(frame * 0.04)
+	return yaw, pitch, roll, x, y, z
+
+
+MODIFIERS = ("LeftAlt", "LeftControl", "LeftShift")
+
+
+def game_timeline(frames):
+	"""Game-mode session: preset load, then periodic view, zoom and flap inputs."""
+	timeline = InputTimeline(sweep_pose)
+	timeline.hold_key(5, "UpArrow", 3).hold_key(6, "NumberPad1")
+	for start in range(60, frames, 600):
+		timeline.hold_button(start, THROTTLE, 3, 120)
+		timeline.hold_keys(start + 150, MODIFIERS, 2).hold_key(start + 150, "F5")
+		timeline.hold_button(start + 200, THROTTLE, 4)
+		timeline.hold_button(start + 250, THROTTLE, 60)
+		timeline.hold_button(start + 300, STICK, 1)
+		timeline.hold_button(start + 350, THROTTLE, 19)
+		timeline.hold_button(start + 400, THROTTLE, 2, 60)
+		timeline.hold_button(start + 500, STICK, 0)
+		timeline.set_axis(start + 550, STICK, "y", (start * 7) % 1000)
+	return timeline
+
+
+def tuning_timeline(frames):
+	"""Tune-mode session: enter via ScrollLock, cycle modes, nudge every axis."""
+	timeline = InputTimeline(sweep_pose)
+	timeline.hold_key(5, "UpArrow", 3).hold_key(6, "NumberPad2")
+	timeline.toggle_key(10, "ScrollLock")
+	tuner_keys = ("LeftArrow", "UpArrow", "PageUp", "Delete", "Home", "RightArrow", "DownArrow", "PageDown")
+	for start in range(20, frames, 400):
+		timeline.hold_key(start, "RightControl", 2).hold_key(start, "Insert")
+		for offset in range(30, 390, 30):
+			key = tuner_keys[(offset // 30) % len(tuner_keys)]
+			timeline.hold_key(start + offset, "RightShift", 10).hold_key(start + offset, key, 10)
+	return timeline
+
+
+SCENARIOS = {
+	"game": game_timeline,
+	"tuning": tuning_timeline,
+}
+
+
+def percentile(ordered, fraction):
+	"""Nearest-rank percentile of an already sorted sequence."""
+	if not ordered:
+		return 0.0
+	index = int(math.ceil(fraction * len(ordered))) - 1
+	return ordered[max(0, min(index, len(ordered) - 1))]
+
+
+def summarize(samples):
+	"""Group ``(mode, seconds)`` samples into per-mode latency stats in microseconds."""
+	by_mode = {}
+	for mode, seconds in samples:
+		by_mode.setdefault(mode, []).append(seconds * 1e6)
+	report = {}
+	for mode, values in sorted(by_mode.items()):
+		values.sort()
+		report[mode] = {
+			"frames": len(values),
+			"p50_us": percentile(values, 0.50),
+			"p99_us": percentile(values, 0.99),
+			"max_us": values[-1],
+			"mean_us": sum(values) / len(values),
+		}
+	return report
+
+
+def run_scenario(name, frames, fps=60.0, warmup=10, script_path=DEFAULT_SCRIPT):
+	host = FreePieHost(script_path, SCENARIOS[name](frames), fps=fps)
+	samples = host.run(frames)
+	return summarize(samples[warmup:])
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--frames", type=int, default=5000)
+	parser.add_argument("--fps", type=float, default=60.0)
+	parser.add_argument("--warmup", type=int, default=10)
+	parser.add_argument("--scenario", choices=sorted(SCENARIOS) + ["all"], default="all")
+	parser.add_argument("--script", default=DEFAULT_SCRIPT)
+	parser.add_argument("--json", action="store_true", help="print the report as JSON")
+	args = parser.parse_args(argv)
+
+	names = sorted(SCENARIOS) if args.scenario == "all" else [args.scenario]
+	report = dict(
+		(name, run_scenario(name, args.frames, args.fps, args.warmup, args.script))
+		for name in names
+	)
+	if args.json:
+		json.dump(report, sys.stdout, indent=2, sort_keys=True)
+		sys.stdout.write("\n")
+		return 0
+	print("{:<10} {:<8} {:>7} {:>10} {:>10} {:>10}".format("scenario", "mode", "frames", "p50 us", "p99 us", "max us"))
+	for name in names:
+		for mode, stats in report[name].items():
+			print("{:<10} {:<8} {:>7} {:>10.1f} {:>10.1f} {:>10.1f}".format(
+				name, mode, stats["frames"], stats["p50_us"], stats["p99_us"], stats["max_us"]))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
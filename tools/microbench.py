@@ -0,0 +1,321 @@
+"""Microbenchmarks for the hot functions of ``aom.py``, with a regression gate.
+
+Every case calls one function of a running script in a ``FreePieHost``
+(after a few warm-up frames) and is reported as:
+
+* ``ns``: nanoseconds per call, the best of ``repeat`` timed loops (with the
+  garbage collector off) minus the cost of calling an empty function;
+* ``bytes``: the most memory one call holds at once beyond what it started
+  with (tracemalloc peak), i.e. what it allocates even if it frees it again;
+* ``blocks``: memory blocks still allocated per call after ``number`` calls,
+  which is non-zero only for something that grows.
+
+The host's socket is swapped for a null sink, so the output path measures
+``aom.py``'s own work rather than the fake socket's bookkeeping.
+
+``python -m tools.microbench`` prints the table.  ``--check`` exits non-zero
+when a case got slower than its baseline by more than ``--threshold`` or
+allocates more bytes per call.  Timings only compare on one machine, so no
+baseline is kept in the repository: by default ``--check`` measures
+``aom.py`` as of the git revision ``--against`` (HEAD), or the script
+``--reference``, and the working tree in the same run, their timed loops
+taking turns, and reports a case only if a second such run flags it too.
+``--save PATH`` keeps a run for a later ``--check --baseline PATH`` on the
+same machine.
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from tools.freepie_host import DEFAULT_SCRIPT, REPO_ROOT, FreePieHost
+
+THRESHOLD = 0.25
+# differences below this many nanoseconds are timer noise, whatever the ratio
+NOISE_NS = 30.0
+NUMBER = 20000
+REPEAT = 5
+
+
+class _NullSink(object):
+	"""Stands in for the pose output; the packing is measured on its own."""
+
+	def send(self, x, y, z, yaw, pitch, roll):
+		return True
+
+
+def _host(script, **flags):
+	"""A host running `script`, with the view `flags` set and the null sink as pose output."""
+	host = FreePieHost(script)
+	host.trackIR.set_pose(95.0, 4.0, 0.0, 1.5, 0.4, 0.3)
+	host.run(5)
+	state = host.app.state
+	state.output = _NullSink()
+	for flag, value in flags.items():
+		setattr(state.game, flag, value)
+	state.poseDirty = True
+	return host
+
+
+# view actions a busy frame fires together; each one only flips view flags, so
+# firing them on every call neither speaks, recenters nor leaves game mode
+BUSY_ACTIONS = (
+	"view.gun-toggle", "view.head-center", "head.high", "head.highest", "head.dynamic",
+	"zoom.out", "zoom.in", "zoom.center",
+)
+
+
+def _busy_values(app):
+	"""Input values where every BUSY_ACTIONS binding fires: its trigger and modifiers down."""
+	values = list(app.state.input.values)
+	for binding in app.bindings.bindings:
+		if binding.actionId in BUSY_ACTIONS:
+			values[binding.slot] = True
+			for slot in binding.modifiers:
+				values[slot] = True
+	return values
+
+
+def cases(script=DEFAULT_SCRIPT):
+	"""[(name, zero-argument callable), ...] for every benchmarked function."""
+	# cases that need other view flags, or change them, get a host of their own
+	host = _host(script)
+	app = host.app
+	state = app.state
+	ns = host.namespace
+	calc = app.gameMode.calc
+	busy = _host(script).app
+	side = _host(script, isSideView=True).app.gameMode.calc
+	dynamic = _host(script, isHeadDynamic=True).app.gameMode.calc
+
+	def dispatch(app, values):
+		def run():
+			app.state.input.values[:] = values
+			app.bindings.dispatch(app.state)
+		return run
+
+	tune = ns["TuneMode"]("isAuto")
+	zoom = ns["TuneMode"]("isZoomIn")
+	modes = ns["TuneModes"]
+	last = modes.MODES[-1]["name"]
+	packet = ns["PoseTransport"].PACKET
+	buffer = state.transport.packet
+	diagnostics = state.diagnostics
+	clock = [state.now]
+
+	def sample_diagnostics():
+		clock[0] += diagnostics.sampleInterval
+		diagnostics.update(clock[0])
+
+	return [
+		("bindings.dispatch/idle", dispatch(app, list(state.input.values))),
+		("bindings.dispatch/busy", dispatch(busy, _busy_values(busy))),
+		("calc.compute_manual_x/side", lambda: side._compute_manual_x(95.0)),
+		("calc.compute_manual_y/dynamic", lambda: dynamic._compute_manual_y(600)),
+		("calc.compute_auto_xyz/corner", lambda: calc._compute_auto_xyz(95.0)),
+		("calc.compute_auto_xyz/center", lambda: calc._compute_auto_xyz(10.0)),
+		("calc.compute_fake_xyz", lambda: calc._compute_fake_xyz(95.0, 4.0, 0.0, 1.5, 0.4, 0.3, 1.0, 2.0, 3.0, 0.5, 0.5, 0.5)),
+		("gameMode.sendPose", lambda: app.gameMode._sendPose(None)),
+		("tuneMode.modify/isAuto", lambda: tune.modify(state, "x", 0.01)),
+		("tuneMode.modify/isZoomIn", lambda: zoom.modify(state, "z", 0.05)),
+		("tuneModes.Mode/last", lambda: modes.Mode(last)),
+		("transport.pack", lambda: packet.pack_into(buffer, 0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)),
+		("diagnostics.update/idle", lambda: diagnostics.update(clock[0])),
+		("diagnostics.update/sample", sample_diagnostics),
+		("input.capture", state.input.capture),
+		("timers.advance/idle", lambda: state.timers.advance(state.now)),
+	]
+
+
+def _loop(function, number):
+	# like timeit: a collection landing in one loop but not another is noise, not the function
+	enabled = gc.isenabled()
+	gc.disable()
+	try:
+		start = time.perf_counter()
+		for _ in range(number):
+			function()
+		return time.perf_counter() - start
+	finally:
+		if enabled:
+			gc.enable()
+
+
+def _timings(functions, number, repeat):
+	"""Best ns per call of each of `functions`, their timed loops taking turns."""
+	for function in functions:
+		function()
+	loops = [float("inf")] * len(functions)
+	overhead = float("inf")
+	for _ in range(repeat):
+		overhead = min(overhead, _loop(_empty, number))
+		for index, function in enumerate(functions):
+			loops[index] = min(loops[index], _loop(function, number))
+	return [round(max(0.0, (loop - overhead) / number * 1e9), 1) for loop in loops]
+
+
+def _memory(function, number):
+	"""(peak bytes, blocks kept) per call of `function`."""
+	gc.collect()
+	tracemalloc.start()
+	try:
+		peak = None
+		for _ in range(3):
+			current = tracemalloc.get_traced_memory()[0]
+			tracemalloc.reset_peak()
+			function()
+			used = tracemalloc.get_traced_memory()[1] - current
+			peak = used if peak is None else min(peak, used)
+	finally:
+		tracemalloc.stop()
+
+	gc.collect()
+	before = sys.getallocatedblocks()
+	for _ in range(number):
+		function()
+	gc.collect()
+	blocks = max(0, sys.getallocatedblocks() - before) / float(number)
+	return peak, round(blocks, 3)
+
+
+def measure(function, number=NUMBER, repeat=REPEAT):
+	"""{"ns", "bytes", "blocks"} per call of `function`; see the module docstring."""
+	ns, = _timings([function], number, repeat)
+	peak, blocks = _memory(function, number)
+	return {"ns": ns, "bytes": peak, "blocks": blocks}
+
+
+def _empty():
+	pass
+
+
+def run(script=DEFAULT_SCRIPT, number=NUMBER, repeat=REPEAT, only=None):
+	"""{case name: measurement} for every case whose name contains `only`."""
+	return dict(
+		(name, measure(function, number, repeat))
+		for name, function in cases(script) if only is None or only in name
+	)
+
+
+def run_against(reference, script=DEFAULT_SCRIPT, number=NUMBER, repeat=REPEAT, only=None, names=None):
+	"""
+	(baseline, results) for the `reference` script and `script`, measured in
+	one run with their timed loops taking turns, so both see the same machine
+	and load. `names` limits the run to those cases.
+	"""
+	before = dict(cases(reference))
+	baseline = {}
+	results = {}
+	for name, function in cases(script):
+		if only is not None and only not in name or names is not None and name not in names:
+			continue
+		if name not in before:
+			results[name] = measure(function, number, repeat)
+			continue
+		base, ns = _timings([before[name], function], number, repeat)
+		peak, blocks = _memory(before[name], number)
+		baseline[name] = {"ns": base, "bytes": peak, "blocks": blocks}
+		peak, blocks = _memory(function, number)
+		results[name] = {"ns": ns, "bytes": peak, "blocks": blocks}
+	return baseline, results
+
+
+def script_at(revision, directory=None):
+	"""Write ``aom.py`` as of the git `revision` to a file in `directory` and return its path."""
+	source = subprocess.check_output(["git", "show", revision + ":aom.py"], cwd=REPO_ROOT)
+	handle, path = tempfile.mkstemp(prefix="aom-", suffix=".py", dir=directory)
+	with os.fdopen(handle, "wb") as output:
+		output.write(source)
+	return path
+
+
+def load(path):
+	with open(path) as handle:
+		return json.load(handle)["cases"]
+
+
+def save(results, path):
+	directory = os.path.dirname(path)
+	if directory and not os.path.isdir(directory):
+		os.makedirs(directory)
+	with open(path, "w") as handle:
+		json.dump({"python": sys.version.split()[0], "cases": results}, handle, indent=1, sort_keys=True)
+		handle.write("\n")
+
+
+def compare(baseline, results, threshold=THRESHOLD):
+	"""[(case, reason), ...] for every case slower or allocating more than its baseline."""
+	regressions = []
+	for name in sorted(results):
+		base = baseline.get(name)
+		if base is None:
+			continue
+		result = results[name]
+		if result["ns"] > base["ns"] * (1 + threshold) and result["ns"] - base["ns"] > NOISE_NS:
+			regressions.append((name, "{:.1f} ns/call, baseline {:.1f}".format(result["ns"], base["ns"])))
+		if result["bytes"] > base["bytes"]:
+			regressions.append((name, "{} bytes/call, baseline {}".format(result["bytes"], base["bytes"])))
+	return regressions
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--script", default=DEFAULT_SCRIPT)
+	parser.add_argument("--against", default="HEAD", help="git revision whose aom.py --check measures as the baseline")
+	parser.add_argument("--reference", help="script --check measures as the baseline instead of --against")
+	parser.add_argument("--baseline", help="results saved with --save that --check compares with instead")
+	parser.add_argument("--number", type=int, default=NUMBER, help="calls per timed loop")
+	parser.add_argument("--repeat", type=int, default=REPEAT, help="timed loops per case; the best counts")
+	parser.add_argument("--only", help="run the cases whose name contains this")
+	parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed fractional slowdown")
+	action = parser.add_mutually_exclusive_group()
+	action.add_argument("--save", metavar="PATH", help="write the results to PATH")
+	action.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+	args = parser.parse_args(argv)
+
+	reference = None
+	if args.check and args.baseline is None:
+		reference = args.reference or script_at(args.against)
+	try:
+		if reference is not None:
+			baseline, results = run_against(reference, args.script, args.number, args.repeat, args.only)
+		else:
+			baseline = load(args.baseline) if args.check else None
+			results = run(args.script, args.number, args.repeat, args.only)
+		regressions = compare(baseline, results, args.threshold) if args.check else []
+		if regressions and reference is not None:
+			# a slower machine moment can catch one side alone; report what a second run confirms
+			flagged = set(name for name, _ in regressions)
+			again = run_against(reference, args.script, args.number, args.repeat, names=flagged)
+			regressions = compare(again[0], again[1], args.threshold)
+	finally:
+		if reference is not None and args.reference is None:
+			os.remove(reference)
+
+	print("{:32} {:>10} {:>10} {:>8} {:>8}".format("case", "ns/call", "baseline", "bytes", "blocks"))
+	for name in sorted(results):
+		result = results[name]
+		base = (baseline or {}).get(name)
+		print("{:32} {:>10.1f} {:>10} {:>8} {:>8}".format(
+			name, result["ns"], "-" if base is None else "{:.1f}".format(base["ns"]), result["bytes"], result["blocks"]
+		))
+	if args.save:
+		save(results, args.save)
+		print("results written to {}".format(args.save))
+		return 0
+	if args.check:
+		for name, reason in regressions:
+			print("REGRESSION {}: {}".format(name, reason))
+		print("{} regressions".format(len(regressions)))
+		return 1 if regressions else 0
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,200 @@
+"""Vectorized evaluation of the ``aom.py`` game-mode pose math over whole recordings.
+
+``evaluate`` is the array form of ``GameMode.proccessFrame``: the auto-corner
+offsets (``_compute_auto_xyz``), the side-view mirror (``_compute_manual_x``),
+the head-Y modes (``_compute_manual_y``), zoom, gun view, the custom view and
+``_compute_fake_xyz`` with its X dead zone and ``y_offset`` latch.  Every
+operation is performed in the same order and precision as the scalar path, so
+packing a row of the result gives the bytes the script would have sent.
+
+Run ``python -m tools.pose_batch`` to time a synthetic one-hour 120 Hz session.
+"""
+
+import argparse
+import collections
+import sys
+import time
+
+import numpy as np
+
+# Mirrors the AppState defaults in aom.py.
+AUTO_CORNER_START = 30.0
+AUTO_CORNER_END = 140
+AUTO_CORNER_X_END = 140
+
+# Per-sample state.game flags read by the pose math.
+FLAG_FIELDS = (
+	"isSideView", "isCustomView", "isGunViewAtCenter",
+	"isZoomIn", "isZoomOut",
+	"isHeadCenter", "isHeadHigh", "isHeadHighest", "isHeadDynamic",
+)
+
+PoseBatch = collections.namedtuple("PoseBatch", "x y z yaw pitch roll y_offset")
+
+
+def _field(preset, name):
+	if isinstance(preset, dict):
+		return preset.get(name, 0.0)
+	return getattr(preset, name)
+
+
+def _ensure_map_range(value, x_min, x_max, y_min, y_max):
+	# FreePIE's filters.ensureMapRange
+	return np.maximum(np.minimum(((value - x_min) / (x_max - x_min)) * (y_max - y_min) + y_min, y_max), y_min)
+
+
+def _auto_offset(curve, value, scale, start, span):
+	# AutoCornerCurve.map; `value` is signed yaw for X and |yaw| for Y/Z
+	table = None if curve is None else curve.table
+	if table is None:
+		return 0 + ((value - start) / span) * (scale - 0)
+	table = np.asarray(table, dtype=np.float64)
+	last = len(table) - 1
+	signed = (value - curve.start) * curve.step
+	position = np.abs(signed)
+	index = np.clip(position, 0, last - 1).astype(np.int64)
+	unit = table[index] + (table[index + 1] - table[index]) * (position - index)
+	unit = np.where(position >= last, table[-1], unit)
+	return np.where(signed < 0, -unit * scale, unit * scale)
+
+
+def evaluate(
+	preset, yaw, pitch, roll, x, y, z, stick_y=None, flags=None,
+	auto_corner_start=AUTO_CORNER_START, auto_corner_end=AUTO_CORNER_END, auto_corner_x_end=AUTO_CORNER_X_END,
+	y_offset=0.0, tuning=False, curves=None,
+):
+	"""
+	Evaluate the game-mode pose for every sample.
+
+	`preset` is a PresetRecord or a preset dict, the axes are equal-length
+	sequences, `stick_y` is the dynamic head-Y axis and `flags` maps any of
+	FLAG_FIELDS to per-sample booleans (missing flags are False).  `y_offset`
+	is the latch value before the first sample; the returned PoseBatch carries
+	the latch value after the last one.  `curves` is the (x, y, z)
+	AutoCornerCurve tuple of the AppState that loaded the preset; without it
+	every axis is linear.
+	"""
+	yaw = np.asarray(yaw, dtype=np.float64)
+	pitch = np.asarray(pitch, dtype=np.float64)
+	x = np.asarray(x, dtype=np.float64)
+	y = np.asarray(y, dtype=np.float64)
+	z = np.asarray(z, dtype=np.float64)
+	count = len(yaw)
+	stick_y = np.zeros(count) if stick_y is None else np.asarray(stick_y, dtype=np.float64)
+	flags = flags or {}
+	unknown = sorted(set(flags) - set(FLAG_FIELDS))
+	if unknown:
+		raise ValueError("Unknown view flags: {}".format(", ".join(unknown)))
+
+	def flag(name):
+		return np.zeros(count, dtype=bool) if name not in flags else np.asarray(flags[name], dtype=bool)
+
+	field = lambda name: _field(preset, name)
+	abs_yaw = np.abs(yaw)
+
+	# _compute_auto_xyz
+	span = auto_corner_end - auto_corner_start
+	if span == 0:
+		auto_x = auto_y = auto_z = np.zeros(count)
+	else:
+		curve_x, curve_y, curve_z = curves or (None, None, None)
+		in_corner = (yaw != 0) & (abs_yaw > auto_corner_start)
+		auto_x = np.where(in_corner, _auto_offset(curve_x, yaw, field("deltaX1"), auto_corner_start, span), 0.0)
+		auto_y = np.where(in_corner, _auto_offset(curve_y, abs_yaw, field("deltaY1"), auto_corner_start, span), 0.0)
+		auto_z = np.where(in_corner, _auto_offset(curve_z, abs_yaw, field("deltaZ1"), auto_corner_start, span), 0.0)
+
+	# _compute_manual_x
+	boundary = abs(auto_corner_x_end)
+	shift_x = field("deltaX2_1")
+	manual_x = np.select(
+		[(-boundary <= yaw) & (yaw <= 0), (0 < yaw) & (yaw < boundary), yaw < -boundary, boundary <= yaw],
+		[-abs(shift_x), abs(shift_x), abs(shift_x * 3), -abs(shift_x * 3)],
+		0.0,
+	)
+	manual_x = np.where(flag("isSideView"), manual_x, 0.0)
+
+	# _compute_manual_y
+	manual_y = np.select(
+		[flag("isHeadCenter"), flag("isHeadHigh"), flag("isHeadHighest"), flag("isHeadDynamic")],
+		[field("deltaY0"), field("deltaY2_1"), field("deltaY2_2"), _ensure_map_range(stick_y, 0, 1000, field("deltaYLow"), field("deltaYHigh"))],
+		0.0,
+	)
+
+	delta_z = np.where(flag("isZoomIn"), field("deltaZ2_1"), 0.0) + np.where(flag("isZoomOut"), field("deltaZ2_2"), 0.0)
+
+	# _gun_xy
+	gun = flag("isGunViewAtCenter")
+	gun_x = np.where(gun, field("deltaX0"), 0.0)
+	gun_y = np.where(gun, field("deltaY0"), 0.0)
+
+	# _compute_fake_xyz
+	is_y_on = abs_yaw >= 45
+
+	temp_x = np.where(auto_x == 0, x, auto_x)
+	x_direction = temp_x if tuning else np.where(np.abs(temp_x) >= 1, temp_x, 0.0)
+	fake_x = x_direction + manual_x + gun_x
+
+	# y_offset latches y on every non-custom sample outside the Y zone and is
+	# read back on the samples inside it.
+	custom = flag("isCustomView")
+	latch = np.where(~custom & ~is_y_on, np.arange(count), -1)
+	np.maximum.accumulate(latch, out=latch)
+	offsets = np.where(latch >= 0, y[np.maximum(latch, 0)], y_offset)
+	fake_y = np.where(is_y_on, y + manual_y + auto_y + gun_y - offsets, manual_y + auto_y + gun_y)
+	fake_z = z + delta_z + auto_z
+
+	return PoseBatch(
+		x=np.where(custom, field("deltaX2_4"), fake_x),
+		y=np.where(custom, field("deltaY2_4"), fake_y),
+		z=np.where(custom, field("deltaZ2_4"), fake_z),
+		yaw=np.where(custom, field("syaw"), yaw * 0.1),
+		pitch=np.where(custom, field("spitch"), pitch),
+		roll=np.zeros(count),
+		y_offset=float(offsets[-1]) if count else y_offset,
+	)
+
+
+def as_packets(batch):
+	"""(N, 6) little-endian doubles laid out like the OpenTrack UDP packet."""
+	return np.column_stack([batch.x, batch.y, batch.z, batch.yaw, batch.pitch, batch.roll]).astype("<f8")
+
+
+def synthetic_session(samples, seed=0):
+	"""Random head motion with the view flags flipping every few seconds."""
+	rng = np.random.default_rng(seed)
+	t = np.arange(samples) / 120.0
+	axes = dict(
+		yaw=170.0 * np.sin(t * 0.7) + rng.normal(0, 2, samples),
+		pitch=10.0 * np.sin(t * 0.3),
+		roll=np.zeros(samples),
+		x=3.0 * np.sin(t * 1.1),
+		y=1.5 * np.sin(t * 0.9),
+		z=0.5 * np.sin(t * 1.3),
+		stick_y=rng.integers(0, 1001, samples),
+	)
+	blocks = samples // 600 + 1
+	flags = dict(
+		(name, np.repeat(rng.random(blocks) < 0.3, 600)[:samples])
+		for name in FLAG_FIELDS
+	)
+	return axes, flags
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--hours", type=float, default=1.0)
+	parser.add_argument("--rate", type=float, default=120.0, help="TrackIR sample rate in Hz")
+	args = parser.parse_args(argv)
+
+	samples = int(args.hours * 3600 * args.rate)
+	axes, flags = synthetic_session(samples)
+	preset = {"deltaX1": 1.2804, "deltaY1": -0.1304, "deltaZ1": 6.52, "deltaX2_1": 1.6, "deltaYLow": -0.65, "deltaYHigh": 1.4}
+	started = time.perf_counter()
+	evaluate(preset, flags=flags, **axes)
+	elapsed = time.perf_counter() - started
+	print("{} samples in {:.3f} s ({:.1f} M samples/s)".format(samples, elapsed, samples / elapsed / 1e6))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
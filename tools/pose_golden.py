@@ -0,0 +1,199 @@
+"""Golden pose outputs for regression-testing the ``aom.py`` pose pipeline.
+
+``generate`` drives the script in a ``FreePieHost`` through three groups of
+cases and returns the packets each one sent, unpacked to
+``[x, y, z, yaw, pitch, roll]`` lists:
+
+* ``game/<preset>/<view>``: ``GameMode`` over a grid of TrackIR samples that
+  straddles the auto-corner start, the Y zone, the mirror-X boundary and the
+  X dead zone, for every preset and every view-flag combination in ``VIEWS``;
+* ``tune/<preset>/<mode>``: ``TuningMode`` for every preset and tune mode,
+  swept over ``manual_yaw`` for ``isAuto``;
+* ``scenario/<name>``: the headless host's game and tuning timelines, as
+  reference recordings of whole sessions.
+
+``compare`` lists the packets that differ from a golden set by more than a
+tolerance.  Run ``python -m tools.pose_golden`` to check ``aom.py`` (or
+``--script`` for a variant of it) against ``GOLDEN_PATH`` and exit non-zero
+on any difference; ``--update`` rewrites the golden file.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+
+from tools.freepie_host import DEFAULT_SCRIPT, REPO_ROOT, FreePieHost, game_timeline, tuning_timeline
+
+GOLDEN_PATH = os.path.join(REPO_ROOT, "tests", "golden", "pose.json")
+TOLERANCE = 1e-9
+PACKET = struct.Struct("<dddddd")
+
+PRESETS = ("reset", "lagg", "yakodin", "f4", "yakodin and b", "la five")
+
+# View-flag combinations reachable through the bindings; head-Y modes are exclusive.
+VIEWS = (
+	("plain", ()),
+	("side", ("isSideView",)),
+	("custom", ("isCustomView",)),
+	("gun", ("isGunViewAtCenter",)),
+	("zoom-in", ("isZoomIn",)),
+	("zoom-out", ("isZoomOut",)),
+	("head-center", ("isHeadCenter",)),
+	("head-high", ("isHeadHigh",)),
+	("head-highest", ("isHeadHighest",)),
+	("head-dynamic", ("isHeadDynamic",)),
+	("side-zoom-in-dynamic", ("isSideView", "isZoomIn", "isHeadDynamic")),
+	("side-gun-high", ("isSideView", "isGunViewAtCenter", "isHeadHigh")),
+	("custom-side-zoom-out", ("isCustomView", "isSideView", "isZoomOut")),
+)
+
+# Just inside and outside every yaw boundary of the pose math.
+YAWS = (
+	-180.0, -140.0, -139.99, -90.0, -45.0, -44.99, -30.01, -30.0,
+	0.0, 30.0, 30.01, 44.99, 45.0, 90.0, 139.99, 140.0, 180.0,
+)
+XS = (-1.5, -0.99, 0.5, 1.0)
+MANUAL_YAWS = (-140.0, -120.0, -90.0, -45.0, -30.5)
+SCENARIO_FRAMES = 600
+
+
+def _unpack(packets):
+	# ten decimals keeps the golden file small and is well inside TOLERANCE
+	return [[round(value, 10) for value in PACKET.unpack(data)] for data, _ in packets]
+
+
+def _host(script):
+	host = FreePieHost(script)
+	host.step()
+	return host
+
+
+def grid():
+	"""The (yaw, pitch, roll, x, y, z, stick_y) samples every game case runs through."""
+	samples = []
+	for yaw in YAWS:
+		for x in XS:
+			index = len(samples)
+			samples.append((
+				yaw, (index % 9 - 4) * 2.5, 0.0, x,
+				(index * 37 % 11 - 5) * 0.3, (index * 13 % 7 - 3) * 0.5, index * 123 % 1001,
+			))
+	return samples
+
+
+def _game_cases(script):
+	cases = {}
+	samples = grid()
+	for preset in PRESETS:
+		host = _host(script)
+		app = host.app
+		state = app.state
+		state.select(preset)
+		flags = state.game.VIEW
+		for view, enabled in VIEWS:
+			for flag in flags:
+				setattr(state.game, flag, flag in enabled)
+			# set behind the bindings' back, so the cached pose terms are stale
+			state.poseDirty = True
+			state.game.y_offset = 0
+			sent = len(host.packets)
+			for yaw, pitch, roll, x, y, z, stick_y in samples:
+				sample = state.trackir
+				sample.yaw, sample.pitch, sample.roll, sample.x, sample.y, sample.z = yaw, pitch, roll, x, y, z
+				state.input.values[app.gameMode.stickYSlot] = stick_y
+				app.gameMode.proccessFrame()
+			cases["game/{}/{}".format(preset, view)] = _unpack(host.packets[sent:])
+	return cases
+
+
+def _tune_cases(script):
+	cases = {}
+	for preset in PRESETS:
+		host = _host(script)
+		app = host.app
+		state = app.state
+		TuneMode = host.namespace["TuneMode"]
+		modes = ["undefined"] + [mode["name"] for mode in host.namespace["TuneModes"].MODES]
+		for mode in modes:
+			state.select(preset)
+			state.game = host.namespace["GameFlags"]()
+			state.tuneMode = TuneMode(mode)
+			sent = len(host.packets)
+			for manual_yaw in MANUAL_YAWS if mode == "isAuto" else (state.preset.manual_yaw,):
+				state.preset.manual_yaw = manual_yaw
+				app.tuneMode.proccessFrame()
+			cases["tune/{}/{}".format(preset, mode)] = _unpack(host.packets[sent:])
+			state.layers.clear()
+	return cases
+
+
+def _scenario_cases(script):
+	cases = {}
+	for name, timeline in (("game", game_timeline), ("tuning", tuning_timeline)):
+		host = FreePieHost(script, timeline(SCENARIO_FRAMES))
+		host.run(SCENARIO_FRAMES)
+		cases["scenario/" + name] = _unpack(host.packets)
+	return cases
+
+
+def generate(script=DEFAULT_SCRIPT):
+	"""{case name: [[x, y, z, yaw, pitch, roll], ...]} for every golden case."""
+	cases = {}
+	cases.update(_game_cases(script))
+	cases.update(_tune_cases(script))
+	cases.update(_scenario_cases(script))
+	return cases
+
+
+def load(path=GOLDEN_PATH):
+	with open(path) as handle:
+		return json.load(handle)["cases"]
+
+
+def save(cases, path=GOLDEN_PATH):
+	with open(path, "w") as handle:
+		json.dump({"cases": cases}, handle, sort_keys=True, separators=(",", ":"))
+		handle.write("\n")
+
+
+def compare(expected, actual, tolerance=TOLERANCE):
+	"""
+	[(case, packet index, expected, actual), ...] for every packet further
+	than `tolerance` from the golden one on any axis; a missing packet is
+	reported with None on its side.
+	"""
+	differences = []
+	for case in sorted(set(expected) | set(actual)):
+		golden, packets = expected.get(case, []), actual.get(case, [])
+		for index in range(max(len(golden), len(packets))):
+			want = golden[index] if index < len(golden) else None
+			got = packets[index] if index < len(packets) else None
+			if want is None or got is None or any(abs(a - b) > tolerance for a, b in zip(want, got)):
+				differences.append((case, index, want, got))
+	return differences
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--script", default=DEFAULT_SCRIPT)
+	parser.add_argument("--golden", default=GOLDEN_PATH)
+	parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+	parser.add_argument("--update", action="store_true", help="rewrite the golden file from --script")
+	args = parser.parse_args(argv)
+
+	cases = generate(args.script)
+	if args.update:
+		save(cases, args.golden)
+		print("{} cases, {} packets written to {}".format(len(cases), sum(map(len, cases.values())), args.golden))
+		return 0
+	differences = compare(load(args.golden), cases, args.tolerance)
+	for case, index, want, got in differences[:20]:
+		print("{} #{}: expected {} got {}".format(case, index, want, got))
+	print("{} packets differ".format(len(differences)))
+	return 1 if differences else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
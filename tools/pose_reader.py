@@ -0,0 +1,90 @@
+"""Reference reader for the ``aom.py`` shared-memory pose output.
+
+With ``"shm"`` in ``OUTPUT_SINKS`` the script writes every pose into a
+seqlock slot in the named shared memory ``POSE_MAPPING``; see
+``SharedMemoryPoseSink`` in ``aom.py``.  ``read`` takes one consistent copy
+of the slot, or None while the writer is in the middle of a pose.
+``PoseReader.poll`` returns each pose once.
+
+Run ``python -m tools.pose_reader`` on the FreePIE machine to print the
+poses as they arrive.
+"""
+
+import argparse
+import collections
+import mmap
+import struct
+import sys
+import time
+
+MAPPING = "Local\\AomPose.Output"
+MAGIC = b"AOMP"
+VERSION = 1
+HEADER = struct.Struct("<4sI")
+SEQUENCE = struct.Struct("<Q")
+POSE = struct.Struct("<d6d")
+SEQUENCE_OFFSET = 8
+TIME_OFFSET = 16
+SLOT_SIZE = 72
+
+Pose = collections.namedtuple("Pose", "sequence time x y z yaw pitch roll")
+
+
+def read(view, attempts=100):
+	"""
+	The Pose in the slot `view`, or None when no pose was written yet or the
+	writer kept it busy for `attempts` tries.
+	"""
+	magic, version = HEADER.unpack_from(view, 0)
+	if magic != MAGIC or version != VERSION:
+		return None
+	for _ in range(attempts):
+		before = SEQUENCE.unpack_from(view, SEQUENCE_OFFSET)[0]
+		if before & 1:
+			continue
+		values = POSE.unpack_from(view, TIME_OFFSET)
+		if SEQUENCE.unpack_from(view, SEQUENCE_OFFSET)[0] == before:
+			return Pose(before, *values) if before else None
+	return None
+
+
+class PoseReader(object):
+	"""Polls a slot and hands out each pose once."""
+
+	def __init__(self, view):
+		self.view = view
+		self.sequence = 0
+
+	@classmethod
+	def open(cls, mapping=MAPPING):
+		# named mappings are a Windows feature; the script creates the slot
+		return cls(mmap.mmap(-1, SLOT_SIZE, tagname=mapping))
+
+	def poll(self):
+		"""The newest pose if the writer sent one since the last call, else None."""
+		pose = read(self.view)
+		if pose is None or pose.sequence == self.sequence:
+			return None
+		self.sequence = pose.sequence
+		return pose
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--mapping", default=MAPPING)
+	parser.add_argument("--interval", type=float, default=0.001, help="seconds between polls")
+	args = parser.parse_args(argv)
+
+	reader = PoseReader.open(args.mapping)
+	try:
+		while True:
+			pose = reader.poll()
+			if pose is not None:
+				print("#{} {:.4f}  x {:8.3f} y {:8.3f} z {:8.3f}  yaw {:8.3f} pitch {:8.3f} roll {:8.3f}".format(*pose))
+			time.sleep(args.interval)
+	except KeyboardInterrupt:
+		return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
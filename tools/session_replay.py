@@ -0,0 +1,144 @@
+"""Read ``aom.py`` session recordings and replay them through the script.
+
+A recording (``RECORD_PATH``) is a header followed by a ring of fixed-size
+frames; see ``SessionRecorder`` in ``aom.py``.  ``read`` decodes the frames
+oldest first.  ``replay`` restores the view state and preset values of the
+first frame in a ``FreePieHost`` and then runs every later frame through
+``Application.proccessFrame`` with the recorded clock, TrackIR samples and
+input slots, yielding each frame with the packet the replay sent.  Preset
+values the recording says were tuned in between are restored before the
+frame that first used them.
+
+Run ``python -m tools.session_replay recording.aomrec`` to replay a file and
+count the frames whose packet differs from the recorded one.
+"""
+
+import argparse
+import collections
+import json
+import struct
+import sys
+
+from tools.freepie_host import DEFAULT_SCRIPT, FreePieHost
+
+MAGIC = b"AOMREC02"
+HEADER = struct.Struct("<8sQI")
+HEADER_SIZE = 65536
+
+Recording = collections.namedtuple("Recording", "layout frames")
+Frame = collections.namedtuple(
+	"Frame", "time trackir y_offset packet sample preset tune_mode flags values buttons axes"
+)
+
+
+def read(path):
+	"""Decode the recording at `path` into a Recording, frames oldest first."""
+	with open(path, "rb") as handle:
+		data = handle.read()
+	magic, written, length = HEADER.unpack_from(data, 0)
+	if magic != MAGIC:
+		raise ValueError("{} is not a session recording".format(path))
+	layout = json.loads(data[HEADER.size:HEADER.size + length].decode("utf-8"))
+	frame = struct.Struct(layout["frame"])
+	values = struct.Struct(layout["values"])
+	inputs = struct.Struct(layout["inputs"])
+	size, capacity, offset = layout["size"], layout["capacity"], layout["packetOffset"]
+	buttons = len(layout["buttons"])
+	words = (buttons + 63) // 64
+	frames = []
+	for index in range(max(0, written - capacity), written):
+		at = HEADER_SIZE + (index % capacity) * size
+		fields = frame.unpack_from(data, at)
+		preset_values = values.unpack_from(data, at + frame.size)
+		slots = inputs.unpack_from(data, at + frame.size + values.size)
+		bits = 0
+		for word in range(words):
+			bits |= slots[word] << (word * 64)
+		frames.append(Frame(
+			time=fields[0],
+			trackir=fields[1:7],
+			y_offset=fields[7],
+			packet=bytes(data[at + offset:at + offset + 48]),
+			sample=fields[8],
+			preset=layout["presets"][fields[9]],
+			tune_mode=None if fields[10] < 0 else layout["tuneModes"][fields[10]],
+			flags=dict((name, bool(fields[11] >> bit & 1)) for bit, name in enumerate(layout["flags"])),
+			values=dict(zip(layout["fields"], preset_values)),
+			buttons=tuple(bool(bits >> bit & 1) for bit in range(buttons)),
+			axes=tuple(slots[words:]),
+		))
+	return Recording(layout, frames)
+
+
+def _restore(state, values):
+	"""Tune the active preset to the recorded `values` where the replay's differ."""
+	layer = state.preset
+	for field, value in values.items():
+		if getattr(layer, field) != value:
+			layer.tune(field, value)
+			state.poseDirty = True
+
+
+def replay(recording, script=DEFAULT_SCRIPT):
+	"""
+	Yield ``(frame, packet)`` for every frame after the first; `packet` is
+	the bytes the replayed frame sent, or None when it sent nothing.
+	"""
+	frames = recording.frames
+	if not frames:
+		return
+	host = FreePieHost(script, start_time=frames[0].time)
+	host.step()
+	state = host.app.state
+	slots = state.input.slots()
+	buttons = [slot for slot, ident in slots if ident[0] != "axis"]
+	axes = [slot for slot, ident in slots if ident[0] == "axis"]
+	if (len(buttons), len(axes)) != (len(recording.layout["buttons"]), len(recording.layout["axes"])):
+		raise ValueError("The recording was made with a different binding table")
+
+	first = frames[0]
+	state.select(first.preset)
+	state.tuneMode = None if first.tune_mode is None else host.namespace["TuneMode"](first.tune_mode)
+	for name, value in first.flags.items():
+		setattr(state.game, name, value)
+	state.game.y_offset = first.y_offset
+	values = list(state.input.values)
+	sample = first.sample
+	previous = first
+	for frame in frames[1:]:
+		# values recorded after the previous frame are what this one starts from; tuning
+		# the inputs replayed already matches, the rest (e.g. before the oldest frame) is restored
+		_restore(state, previous.values)
+		previous = frame
+		host.clock.now = frame.time
+		if frame.sample != sample:
+			sample = frame.sample
+			host.trackIR.set_pose(*frame.trackir)
+		for slot, value in zip(buttons, frame.buttons):
+			values[slot] = value
+		for slot, value in zip(axes, frame.axes):
+			values[slot] = value
+		state.input.load(values)
+		sent = len(host.packets)
+		host.step()
+		yield frame, host.packets[-1][0] if len(host.packets) > sent else None
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("recording")
+	parser.add_argument("--script", default=DEFAULT_SCRIPT)
+	args = parser.parse_args(argv)
+
+	recording = read(args.recording)
+	replayed = differing = 0
+	for frame, packet in replay(recording, args.script):
+		replayed += 1
+		if packet is not None and packet != frame.packet:
+			differing += 1
+	print("{} frames replayed, {} packets differ".format(replayed, differing))
+	return 1 if differing else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())